@@ -0,0 +1,218 @@
+"""
+Execute the same silex action on many scenes in a single maya session
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from silex_maya.utils.plugins import get_required_plugins, load_plugins
+from silex_maya.utils.standalone import (
+    initialize_standalone,
+    reset_scene,
+    run_silex_cli,
+)
+from silex_maya.utils.worker_pool import WorkerError
+from silex_maya.utils.worker_service import connect_service, run_in_service
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logger(log_file: Optional[str] = None):
+    """
+    The batch logs go to their own file or to stderr, apart from the output of maya
+    """
+    handler: logging.Handler = (
+        logging.FileHandler(log_file)
+        if log_file
+        else logging.StreamHandler(sys.stderr)
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def find_scenes(patterns: List[str], list_files: List[str]) -> List[str]:
+    """
+    Expand the glob patterns and read the scene lists, the order is kept
+    """
+    for list_file in list_files:
+        with open(list_file, "r") as scene_list:
+            patterns = patterns + [line.strip() for line in scene_list if line.strip()]
+
+    scenes: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        scenes.extend(os.path.abspath(match) for match in matches)
+    return list(dict.fromkeys(scenes))
+
+
+def open_scene(scene: str):
+    from maya import cmds
+
+    load_plugins(get_required_plugins(scene), logger)
+    cmds.file(scene, open=True, force=True)
+
+
+def run_scene(scene: str, argv: List[str]) -> dict:
+    """
+    Open the scene, execute the action on it and start again from a new scene
+    """
+    result = {"scene": scene, "returncode": None, "error": None}
+    start = time.perf_counter()
+    try:
+        if not os.path.isfile(scene):
+            raise FileNotFoundError(f"The scene {scene} does not exist")
+        open_scene(scene)
+        result["returncode"] = run_silex_cli(argv)
+    except Exception:
+        result["error"] = traceback.format_exc()
+        logger.error("Could not process %s\n%s", scene, result["error"])
+    finally:
+        try:
+            reset_scene()
+        except Exception:
+            logger.exception("Could not reset the scene after %s", scene)
+
+    result["duration"] = round(time.perf_counter() - start, 3)
+    result["success"] = result["error"] is None and result["returncode"] == 0
+    return result
+
+
+def run_scene_in_service(scene: str, argv: List[str]) -> dict:
+    """
+    Execute run_scene in a worker of the running service
+    """
+
+    def on_log(name: str, level: int, text: str):
+        logger.log(level, "[%s] %s", os.path.basename(scene), text)
+
+    connection = connect_service()
+    try:
+        if connection is None:
+            raise WorkerError("The worker service is not running anymore")
+        job = ("call", run_scene, (scene, argv), {})
+        return run_in_service(connection, job, on_log)
+    except WorkerError as exception:
+        logger.error("Could not process %s: %s", scene, exception)
+        return {
+            "scene": scene,
+            "returncode": None,
+            "error": str(exception),
+            "duration": 0.0,
+            "success": False,
+        }
+
+
+def run_scenes_in_service(
+    scenes: List[str], argv: List[str], parallel: int, stop_on_error: bool
+) -> List[dict]:
+    """
+    Execute the scenes in the warm workers of the service, the order is kept
+    """
+    with ThreadPoolExecutor(parallel) as executor:
+        futures = [
+            executor.submit(run_scene_in_service, scene, argv) for scene in scenes
+        ]
+        results = []
+        for future in futures:
+            if future.cancelled():
+                break
+            results.append(future.result())
+            logger.info("[%s/%s] %s", len(results), len(scenes), results[-1]["scene"])
+            if stop_on_error and not results[-1]["success"]:
+                for pending in futures:
+                    pending.cancel()
+                break
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="silex batch",
+        description="Execute an action on each scene, in a single maya session",
+        epilog="The arguments after a -- are given to the action",
+    )
+    parser.add_argument("scenes", nargs="*", help="Scenes or glob patterns")
+    parser.add_argument("--action", "-a", required=True, help="Action to execute")
+    parser.add_argument(
+        "--scene-list",
+        action="append",
+        default=[],
+        help="Text file with a scene or a glob pattern per line",
+    )
+    parser.add_argument(
+        "--summary",
+        "-s",
+        help="Write the JSON summary to this file, by default in the current directory",
+    )
+    parser.add_argument("--log-file", help="Write the batch logs to this file")
+    parser.add_argument(
+        "--stop-on-error", action="store_true", help="Stop at the first failed scene"
+    )
+    parser.add_argument(
+        "--parallel",
+        "-p",
+        type=int,
+        default=4,
+        help="Scenes executed at once when a worker service is running",
+    )
+
+    # The arguments of the action are parsed by silex, not by the batch
+    argv = list(sys.argv[1:] if argv is None else argv)
+    action_args: List[str] = []
+    if "--" in argv:
+        action_args = argv[argv.index("--") + 1 :]
+        argv = argv[: argv.index("--")]
+    args = parser.parse_args(argv)
+    action_argv = ["action", args.action] + action_args
+    setup_logger(args.log_file)
+
+    scenes = find_scenes(args.scenes, args.scene_list)
+    logger.info("Executing the action %s on %s scenes", args.action, len(scenes))
+
+    # A running worker service executes the scenes in its warm workers,
+    # otherwise maya is initialized once for all the scenes
+    results = []
+    service = connect_service()
+    if service is not None:
+        service.close()
+        logger.info("Executing the scenes in the worker service")
+        results = run_scenes_in_service(
+            scenes, action_argv, max(args.parallel, 1), args.stop_on_error
+        )
+    else:
+        initialize_standalone()
+        for index, scene in enumerate(scenes):
+            logger.info("[%s/%s] %s", index + 1, len(scenes), scene)
+            results.append(run_scene(scene, action_argv))
+            if args.stop_on_error and not results[-1]["success"]:
+                break
+
+    summary = {
+        "action": args.action,
+        "scenes": results,
+        "succeeded": sum(result["success"] for result in results),
+        "failed": sum(not result["success"] for result in results),
+        "skipped": len(scenes) - len(results),
+    }
+    summary_path = args.summary or f"silex_batch_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=4)
+    logger.info(
+        "%s succeeded, %s failed, %s skipped, summary written to %s",
+        summary["succeeded"],
+        summary["failed"],
+        summary["skipped"],
+        os.path.abspath(summary_path),
+    )
+
+    return 0 if summary["failed"] == 0 and summary["skipped"] == 0 else 1
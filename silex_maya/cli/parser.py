@@ -1,11 +1,51 @@
-import contextlib
+import logging
+import sys
+from typing import List, Optional
 
 from silex_client.cli.parser import main
 
+from silex_maya.utils.standalone import initialize_standalone
+from silex_maya.utils.worker_pool import WorkerError
+from silex_maya.utils.worker_service import connect_service, run_in_service
+
+
+def run_cli_in_service(argv: List[str]) -> Optional[int]:
+    """
+    Execute the command line in a worker of the running service,
+    return None when there is no service
+    """
+    connection = connect_service()
+    if connection is None:
+        return None
+
+    def on_log(name: str, level: int, text: str):
+        sys.stderr.write(f"{text}\n")
+
+    try:
+        return run_in_service(connection, ("cli", list(argv)), on_log)
+    except WorkerError as exception:
+        logging.getLogger(__name__).error(str(exception))
+        return 1
+
+
 if __name__ == "__main__":
-    with contextlib.suppress(ImportError, RuntimeError):
-        import maya.standalone
+    # The batch subcommand runs the silex command line on many scenes
+    if sys.argv[1:2] == ["batch"]:
+        from silex_maya.cli.batch import main as batch_main
+
+        sys.exit(batch_main(sys.argv[2:]))
+
+    # The service subcommand starts the workers that execute the next command lines
+    if sys.argv[1:2] == ["service"]:
+        from silex_maya.cli.service import main as service_main
+
+        sys.exit(service_main(sys.argv[2:]))
 
-        maya.standalone.initialize(name="python")
+    # A running worker service executes the command line in a warm mayapy,
+    # this process does not initialize maya
+    exit_code = run_cli_in_service(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
 
+    initialize_standalone()
     main()
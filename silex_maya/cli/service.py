@@ -0,0 +1,45 @@
+"""
+Start a pool of warm mayapy workers that execute the silex command lines
+and the batches of this machine
+"""
+
+import argparse
+import logging
+from typing import List, Optional
+
+from silex_maya.utils.worker_pool import MayapyWorkerPool
+from silex_maya.utils.worker_service import WorkerService
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="silex service",
+        description="Execute the silex command lines in long lived mayapy workers",
+    )
+    parser.add_argument("--workers", "-w", type=int, default=2)
+    parser.add_argument("--plugins", nargs="*", default=[], help="Plugins to preload")
+    parser.add_argument(
+        "--max-jobs", type=int, default=50, help="Jobs before a worker is recycled"
+    )
+    parser.add_argument(
+        "--max-memory-growth",
+        type=float,
+        default=4.0,
+        help="Memory growth in GB before a worker is recycled",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    pool = MayapyWorkerPool(
+        args.workers,
+        args.plugins,
+        max_jobs=args.max_jobs,
+        max_memory_growth=int(args.max_memory_growth * 1024 ** 3),
+    )
+    with pool:
+        WorkerService(pool).serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
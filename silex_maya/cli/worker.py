@@ -0,0 +1,115 @@
+"""
+Long lived mayapy process that executes the jobs sent by a MayapyWorkerPool
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import sys
+import threading
+import traceback
+from multiprocessing.connection import Connection, Listener
+
+from silex_maya.utils.standalone import (
+    get_memory_usage,
+    initialize_standalone,
+    reset_scene,
+    run_silex_cli,
+)
+from silex_maya.utils.worker_pool import ADDRESS_PREFIX, AUTHKEY_ENV
+
+
+class ConnectionHandler(logging.Handler):
+    """
+    Stream the log records of the current job back to the pool
+    """
+
+    def __init__(self, connection: Connection, lock: threading.Lock):
+        super().__init__()
+        self.connection = connection
+        self.send_lock = lock
+        self.job_id = None
+
+    def emit(self, record: logging.LogRecord):
+        if self.job_id is None:
+            return
+        try:
+            message = self.format(record)
+            with self.send_lock:
+                self.connection.send(
+                    ("log", self.job_id, record.name, record.levelno, message)
+                )
+        except Exception:
+            self.handleError(record)
+
+
+def execute_job(job: tuple):
+    kind, _, *arguments = job
+    if kind == "cli":
+        return run_silex_cli(arguments[0])
+    if kind == "call":
+        function, args, kwargs = arguments
+        return function(*args, **kwargs)
+    raise ValueError(f"Unknown job type {kind}")
+
+
+def serve(connection: Connection):
+    lock = threading.Lock()
+    handler = ConnectionHandler(connection, lock)
+    logging.getLogger().addHandler(handler)
+
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job[0] == "stop":
+            return
+
+        handler.job_id = job[1]
+        try:
+            result = ("result", job[1], execute_job(job), None)
+        except Exception:
+            result = ("result", job[1], None, traceback.format_exc())
+        finally:
+            handler.job_id = None
+
+        # The next job must not see the scene of the previous one
+        try:
+            reset_scene()
+        except Exception:
+            logging.getLogger(__name__).exception("Could not reset the scene")
+
+        with lock:
+            try:
+                connection.send(result + (get_memory_usage(),))
+            except (TypeError, AttributeError, pickle.PicklingError):
+                error = f"The result of the job can't be sent back: {result[2]!r}"
+                connection.send(("result", job[1], None, error, get_memory_usage()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Silex mayapy worker")
+    parser.add_argument("--plugins", nargs="*", default=[])
+    args = parser.parse_args()
+
+    if not initialize_standalone():
+        sys.exit("The worker must be executed with mayapy")
+
+    # Preload the plugins, so the jobs don't pay for it
+    from silex_maya.utils.plugins import load_plugins
+
+    load_plugins(args.plugins)
+
+    authkey = bytes.fromhex(os.environ.pop(AUTHKEY_ENV))
+    with Listener(("localhost", 0), authkey=authkey) as listener:
+        host, port = listener.address
+        print(f"{ADDRESS_PREFIX} {host}:{port}", flush=True)
+        with listener.accept() as connection:
+            connection.send(("ready", os.getpid(), get_memory_usage()))
+            serve(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import pathlib
+import typing
+from typing import Any, Dict, List
+
+from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import ListParameterMeta
+from silex_maya.utils.dependency_graph import bundle_scene
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+
+class BundleScene(CommandBase):
+    """
+    Bundle a maya ascii scene with all its nested references and textures,
+    without opening the scenes in maya
+    """
+
+    parameters = {
+        "file_path": {
+            "label": "Scene to bundle",
+            "type": pathlib.Path,
+            "value": None,
+        },
+        "destinations": {
+            "label": "Bundle locations",
+            "type": ListParameterMeta(str),
+            "value": None,
+        },
+        "max_workers": {
+            "label": "Parallel workers",
+            "type": int,
+            "value": 4,
+            "hide": True,
+        },
+    }
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        file_path: pathlib.Path = parameters["file_path"]
+        destinations: List[str] = parameters["destinations"]
+        max_workers: int = parameters["max_workers"]
+
+        # The bundle is blocking, it is executed outside of the event loop
+        loop = asyncio.get_running_loop()
+        for destination in destinations:
+            logger.info("Bundling %s to %s", file_path, destination)
+            graph = await loop.run_in_executor(
+                None, bundle_scene, file_path, destination, max_workers, logger
+            )
+            logger.info("Bundled %s files", len(graph.nodes))
+
+        return {"new_path": destinations}
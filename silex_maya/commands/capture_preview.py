@@ -1,50 +1,260 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import os
 import pathlib
+import shutil
 import tempfile
+import time
 import typing
-import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from maya import cmds, mel
 from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import IntArrayParameterMeta
+from silex_maya.utils.avi import BackgroundEncoder
+from silex_maya.utils.local_cache import LocalCache
+from silex_maya.utils.snapshot import get_scene_state
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
 if typing.TYPE_CHECKING:
     from silex_client.action.action_query import ActionQuery
 
+# The previews are kept, an unchanged scene reuses its last thumbnail
+thumbnail_cache = LocalCache(
+    pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "thumbnails",
+    max_size=200 * 1024 * 1024,
+)
+
 
 class CapturePreview(CommandBase):
     """
     Capture the current viewport either as a playblast or a single frame
     """
 
-    def create_thumbnail(self) -> Optional[str]:
-        file_name = str(uuid.uuid4())
-
-        # Create temp path
-        tmp_path = (pathlib.Path(tempfile.gettempdir()) / file_name).as_posix()
+    parameters = {
+        "width": {
+            "label": "Preview width",
+            "type": int,
+            "value": 1920,
+            "hide": True,
+        },
+        "quality": {
+            "label": "Jpeg quality",
+            "type": int,
+            "value": 70,
+            "hide": True,
+        },
+        "use_cache": {
+            "label": "Reuse the previous preview if the scene did not change",
+            "type": bool,
+            "value": True,
+            "hide": True,
+        },
+        "sequence": {
+            "label": "Capture a frame range as a movie",
+            "type": bool,
+            "value": False,
+        },
+        "timeline_as_framerange": {
+            "label": "Take timeline as frame-range?",
+            "type": bool,
+            "value": True,
+        },
+        "frame_range": {
+            "label": "Frame Range",
+            "type": IntArrayParameterMeta(2),
+            "value": [0, 0],
+        },
+        "fps": {
+            "label": "Frames per second",
+            "type": int,
+            "value": 24,
+        },
+        "chunk_size": {
+            "label": "Number of frames captured between two encodings",
+            "type": int,
+            "value": 10,
+            "hide": True,
+        },
+    }
 
-        current_frame = int(cmds.currentTime(query=True))
+    @staticmethod
+    def _get_panel_camera() -> Optional[str]:
+        panel = cmds.getPanel(withFocus=True)
+        if not panel or cmds.getPanel(typeOf=panel) != "modelPanel":
+            return None
+        camera = cmds.modelPanel(panel, query=True, camera=True)
+        # The panel can return the camera's shape instead of its transform
+        if cmds.objectType(camera) == "camera":
+            camera = cmds.listRelatives(camera, parent=True)[0]
+        return camera
 
+    def _get_preview_camera(self) -> Optional[str]:
         # Filter user cameras
         default_cameras = ["front", "persp", "side", "top"]
-        scene_cameras = cmds.listCameras()
-        non_default_cameras = list(set(scene_cameras) - set(default_cameras))
-
-        preview_width = 1920
-        preview_height = preview_width * 0.6
+        scene_cameras: List[str] = cmds.listCameras()
+        non_default_cameras = sorted(set(scene_cameras) - set(default_cameras))
 
         if len(non_default_cameras):
-            cmds.lookThru(non_default_cameras[0])
+            return non_default_cameras[0]
+        return self._get_panel_camera()
+
+    @staticmethod
+    def _get_preview_name(scene_state: str, settings: List[Any]) -> str:
+        # The modified scenes are told apart by their revision
+        key = [scene_state, *settings]
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def create_thumbnail(
+        self, width: int, quality: int, use_cache: bool, logger: logging.Logger
+    ) -> Optional[str]:
+        current_frame = int(cmds.currentTime(query=True))
+        preview_width = width
+        preview_height = int(preview_width * 0.6)
+        camera = self._get_preview_camera()
+
+        scene_state = get_scene_state()
+        file_name = self._get_preview_name(
+            scene_state, [camera, current_frame, width, quality]
+        )
+        thumbnail_name = f"{file_name}.0000.jpg"
+
+        cached_thumbnail = thumbnail_cache.lookup(thumbnail_name)
+        if use_cache and cached_thumbnail is not None:
+            logger.info("The scene did not change, reusing %s", cached_thumbnail)
+            return cached_thumbnail.as_posix()
 
+        # Switching the camera re-renders the viewport, it is avoided when possible
+        if camera is not None and camera != self._get_panel_camera():
+            cmds.lookThru(camera)
+
+        tmp_path = thumbnail_cache.get_path(file_name).as_posix()
         mel.eval(
-            f'playblast -format image -filename "{tmp_path}" -clearCache 1 -viewer 0 -frame {current_frame} -showOrnaments 0 -percent 50 -compression "jpg" -quality 70 -widthHeight {preview_width} {preview_height};'
+            f'playblast -format image -filename "{tmp_path}" -clearCache 1 -viewer 0 -frame {current_frame} -showOrnaments 0 -percent 50 -compression "jpg" -quality {quality} -widthHeight {preview_width} {preview_height};'
+        )
+
+        thumbnail = thumbnail_cache.get_path(thumbnail_name)
+        thumbnail_cache.evict(keep=[thumbnail])
+        return thumbnail.as_posix()
+
+    @staticmethod
+    def playblast_frames(
+        file_path: str, start: int, end: int, width: int, quality: int
+    ) -> List[pathlib.Path]:
+        # The ornaments, the viewer and the sound are disabled to capture faster
+        cmds.playblast(
+            format="image",
+            compression="jpg",
+            filename=file_path,
+            startTime=start,
+            endTime=end,
+            framePadding=4,
+            quality=quality,
+            widthHeight=(width, int(width * 0.6)),
+            percent=50,
+            viewer=False,
+            showOrnaments=False,
+            offScreen=True,
+            clearCache=True,
+            forceOverwrite=True,
+        )
+        return [
+            pathlib.Path(f"{file_path}.{frame:04d}.jpg")
+            for frame in range(start, end + 1)
+        ]
+
+    async def create_movie(
+        self, parameters: Dict[str, Any], logger: logging.Logger
+    ) -> str:
+        """
+        Playblast a frame range by chunks, while the previous chunks are
+        encoded to a motion jpeg movie
+        """
+        start, end = parameters["frame_range"]
+        if parameters["timeline_as_framerange"]:
+            start = await execute_in_main_thread(
+                cmds.playbackOptions, minTime=True, query=True
+            )
+            end = await execute_in_main_thread(
+                cmds.playbackOptions, maxTime=True, query=True
+            )
+        start, end = int(start), int(end)
+        width: int = parameters["width"]
+        quality: int = parameters["quality"]
+        fps: int = parameters["fps"]
+        chunk_size: int = max(1, parameters["chunk_size"])
+
+        camera = await execute_in_main_thread(self._get_preview_camera)
+        scene_state = await execute_in_main_thread(get_scene_state)
+        file_name = self._get_preview_name(
+            scene_state, [camera, start, end, width, quality, fps]
         )
+        movie_name = f"{file_name}.avi"
+
+        cached_movie = thumbnail_cache.lookup(movie_name)
+        if parameters["use_cache"] and cached_movie is not None:
+            logger.info("The scene did not change, reusing %s", cached_movie)
+            return cached_movie.as_posix()
+
+        if camera is not None:
+            panel_camera = await execute_in_main_thread(self._get_panel_camera)
+            if camera != panel_camera:
+                await execute_in_main_thread(cmds.lookThru, camera)
+
+        frames_directory = thumbnail_cache.get_path(f"{file_name}_frames")
+        frames_directory.mkdir(exist_ok=True)
+        movie = thumbnail_cache.get_path(movie_name)
+        temp_movie = movie.with_suffix(".avi.tmp")
+        encoder = BackgroundEncoder(temp_movie, fps)
+        encoder.start()
 
-        return f"{tmp_path}.0000.jpg"
+        capture_time = 0.0
+        started_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        finished = False
+        try:
+            for chunk_start in range(start, end + 1, chunk_size):
+                chunk_end = min(chunk_start + chunk_size - 1, end)
+                chunk_started_at = time.perf_counter()
+                frames = await execute_in_main_thread(
+                    self.playblast_frames,
+                    (frames_directory / file_name).as_posix(),
+                    chunk_start,
+                    chunk_end,
+                    width,
+                    quality,
+                )
+                capture_time += time.perf_counter() - chunk_started_at
+                # The chunk is encoded while the next one is captured
+                for frame in frames:
+                    encoder.add(frame)
+
+            await loop.run_in_executor(None, encoder.finish)
+            finished = True
+        finally:
+            # The encoder must not outlive a failed capture
+            if not finished:
+                await loop.run_in_executor(None, encoder.cancel)
+                try:
+                    temp_movie.unlink()
+                except OSError:
+                    pass
+            shutil.rmtree(frames_directory, ignore_errors=True)
+
+        os.replace(temp_movie, movie)
+        thumbnail_cache.evict(keep=[movie])
+        logger.info(
+            "Captured %s frames in %.2fs, encoded in %.2fs (%.2fs in total)",
+            encoder.frame_count,
+            capture_time,
+            encoder.encode_time,
+            time.perf_counter() - started_at,
+        )
+        return movie.as_posix()
 
     @CommandBase.conform_command()
     async def __call__(
@@ -53,5 +263,27 @@ class CapturePreview(CommandBase):
         action_query: ActionQuery,
         logger: logging.Logger,
     ):
+        if parameters["sequence"]:
+            return await self.create_movie(parameters, logger)
+
         # Take a thumbnail of the current viewport
-        return await execute_in_main_thread(self.create_thumbnail)
+        return await execute_in_main_thread(
+            self.create_thumbnail,
+            parameters["width"],
+            parameters["quality"],
+            parameters["use_cache"],
+            logger,
+        )
+
+    async def setup(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        sequence = parameters.get("sequence", False)
+        self.command_buffer.parameters["timeline_as_framerange"].hide = not sequence
+        self.command_buffer.parameters["fps"].hide = not sequence
+        self.command_buffer.parameters["frame_range"].hide = not sequence or (
+            parameters.get("timeline_as_framerange", True)
+        )
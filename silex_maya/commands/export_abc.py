@@ -11,14 +11,14 @@ from silex_client.utils.parameter_types import (
     IntArrayParameterMeta,
     MultipleSelectParameterMeta,
 )
+from silex_maya.utils.output_types import get_output_type
+from silex_maya.utils.plugins import load_plugins
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
 if typing.TYPE_CHECKING:
     from silex_client.action.action_query import ActionQuery
 
-import gazu
-import gazu.files
 from maya import cmds
 
 
@@ -68,8 +68,9 @@ class ExportABC(CommandBase):
         },
     }
 
+    @staticmethod
     def export_abc(
-        self, start: int, end: int, path: str, roots: List[str], options: List[str]
+        start: int, end: int, path: str, roots: List[str], options: List[str]
     ) -> str:
         """
         Build and execute the abc command with the given options
@@ -107,7 +108,7 @@ class ExportABC(CommandBase):
         os.makedirs(directory, exist_ok=True)
 
         # Compute path
-        extension: dict = await gazu.files.get_output_type_by_name("abc")
+        extension: dict = await get_output_type("abc")
         export_path: pathlib.Path = (directory / f"{file_name}").with_suffix(
             f".{extension['short_name']}"
         )
@@ -116,6 +117,9 @@ class ExportABC(CommandBase):
         if selection:
             roots = await execute_in_main_thread(cmds.ls, sl=True, l=True)
 
+        # The alembic plugin is not loaded at startup
+        await execute_in_main_thread(load_plugins, ["AbcExport"], logger)
+
         # Export in alembic
         cmd = await execute_in_main_thread(
             self.export_abc, start_frame, end_frame, export_path, roots, options
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import typing
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from silex_client.action.command_base import CommandBase
 from silex_client.utils.parameter_types import MultipleSelectParameterMeta
 from silex_maya.utils import thread as thread_maya
+from silex_maya.utils.resume import ExportJournal, has_complete_trailer
+from silex_maya.utils.transfer import (
+    TransferPipeline,
+    get_modified_files,
+    snapshot_directory,
+)
 
 # Forward references
 if typing.TYPE_CHECKING:
     from silex_client.action.action_query import ActionQuery
 
+import asyncio
 import logging
 import re
 import os
@@ -39,6 +46,13 @@ class ExportAss(CommandBase):
             "value": None,
             "hide": True,
         },
+        "destination": {
+            "label": "Destination directory",
+            "type": pathlib.Path,
+            "value": None,
+            "tooltip": "Copy each file to this directory as soon as it is exported",
+            "hide": True,
+        },
         "frame_range": {
             "label": "Frame range (start, end, step)",
             "type": fileseq.FrameSet,
@@ -49,6 +63,12 @@ class ExportAss(CommandBase):
             "type": MultipleSelectParameterMeta(),
             "value": ["masterLayer"],
         },
+        "resume": {
+            "label": "Resume the previous export",
+            "type": bool,
+            "value": False,
+            "tooltip": "Only export the frames that are missing or corrupted",
+        },
     }
 
     async def setup(
@@ -88,6 +108,36 @@ class ExportAss(CommandBase):
         # Return visible layer
         return renderSetup.instance().getVisibleRenderLayer()
 
+    @staticmethod
+    def _fix_frame_padding(ass: pathlib.Path) -> pathlib.Path:
+        # Fix bad incrementation '_0001.ass' -> '.0001.ass'
+        match = re.match(r"^.+(\_(\d+)\.)ass$", str(ass))
+        if match is None:
+            return ass
+
+        new_ass = pathlib.Path(
+            str(ass).replace(f"{match.group(1)}ass", f".{match.group(2)}.ass")
+        )
+        os.replace(ass, new_ass)
+        return new_ass
+
+    def _export_frame(
+        self, export_args: Dict[str, Any], directory: pathlib.Path
+    ) -> List[pathlib.Path]:
+        """
+        Export a frame and return the written files
+        """
+        # Without the list of written files, only the given directory is scanned
+        snapshot = snapshot_directory(directory)
+        exported = cmds.arnoldExportAss(**export_args)
+        if isinstance(exported, str):
+            exported = [exported]
+        if exported:
+            exported_files = [pathlib.Path(ass) for ass in exported]
+        else:
+            exported_files = get_modified_files(directory, snapshot)
+        return [self._fix_frame_padding(ass) for ass in exported_files]
+
     def _export_sequence(
         self,
         directory: pathlib.Path,
@@ -95,6 +145,9 @@ class ExportAss(CommandBase):
         file_name: pathlib.Path,
         frame_range: fileseq.FrameSet,
         selected_render_layers: List[str],
+        journal: ExportJournal,
+        valid_frames: Dict[str, List[pathlib.Path]],
+        transfer: Optional[TransferPipeline] = None,
     ):
         """Export ass for each frame and each render layers"""
 
@@ -125,12 +178,17 @@ class ExportAss(CommandBase):
         for layer_name in selected_render_layers:
             layer: Any = render_layers_dict[layer_name]
             logger.error(layer)
-
-            sequence = []
+            # Found from the first exported frame of the layer
+            layer_directory: Optional[pathlib.Path] = None
 
             # We export a ass file for every frame in the range
             for frame in frames_list:
 
+                # The frames that are still valid from the previous export are kept
+                frame_key = f"{layer_name}:{frame}"
+                if frame_key in valid_frames:
+                    continue
+
                 export_args = {'asciiAss':1, 'sf':frame, 'ef':frame, 'f':output_path}
                 
                 # Specific export for assets
@@ -146,20 +204,18 @@ class ExportAss(CommandBase):
                 # Export the active (visible) layer in the context
                 logger.error(renderSetup.instance().switchToLayer(layer))
                 renderSetup.instance().switchToLayer(layer)
-                cmds.arnoldExportAss(**export_args)
-
-                # Get exported sequence
-                ass_files = os.listdir(directory / layer_name)
-                sequence = [directory / layer_name / f for f in ass_files]
-
-            # Fix bad incrementation '_0001.ass' -> '.0001.ass'
-            regex = r"^.+(\_(\d+)\.)ass$"
-            if re.match(regex, str(sequence[0])):
-                for ass in sequence:
-                    match = re.match(regex, str(ass))
-                    new_ass = str(ass).replace(f'{match.group(1)}ass', f'.{match.group(2)}.ass')
-                    os.rename(ass , new_ass)
-
+                exported_files = self._export_frame(
+                    export_args, layer_directory or directory
+                )
+                if exported_files:
+                    layer_directory = exported_files[0].parent
+
+                # The exported frame is complete, it can be transferred
+                # while the next one is exported
+                journal.record(frame_key, exported_files)
+                if transfer is not None:
+                    for ass in exported_files:
+                        transfer.submit(ass)
 
     @CommandBase.conform_command()
     async def __call__(
@@ -176,15 +232,58 @@ class ExportAss(CommandBase):
 
         selected_render_layers: List[str] = parameters["render_layers"]
         frame_range: fileseq.FrameSet = parameters["frame_range"]
+        destination: Optional[pathlib.Path] = parameters["destination"]
+        resume: bool = parameters["resume"]
+        loop = asyncio.get_running_loop()
+
+        # The frames exported by a previous run are checked before being reused.
+        # The temp directory changes on every run, they are found in the destination
+        journal = ExportJournal(directory, destination)
+        valid_frames: Dict[str, List[pathlib.Path]] = {}
+        if resume:
+            journal.load()
+            frame_keys = [
+                f"{layer_name}:{frame}"
+                for layer_name in selected_render_layers
+                for frame in frame_range
+            ]
+            valid_frames = await loop.run_in_executor(
+                None, journal.get_valid_groups, frame_keys, has_complete_trailer
+            )
+            logger.info(
+                "Resuming the export, %s of %s frames are still valid",
+                len(valid_frames),
+                len(frame_keys),
+            )
+        else:
+            journal.clear()
+
+        transfer = None
+        if destination is not None:
+            transfer = TransferPipeline(directory, destination, logger=logger)
 
         # Export to a ass sequence for each frame (in an awsome, brand new temporary directory)
-        await thread_maya.execute_in_main_thread(
-            self._export_sequence,
-            directory,
-            logger,
-            file_name,
-            frame_range,
-            selected_render_layers,
-        )
+        try:
+            await thread_maya.execute_in_main_thread(
+                self._export_sequence,
+                directory,
+                logger,
+                file_name,
+                frame_range,
+                selected_render_layers,
+                journal,
+                valid_frames,
+                transfer,
+            )
+            if transfer is not None:
+                # Wait for the last transfers without blocking the event loop
+                transferred = await loop.run_in_executor(None, transfer.wait)
+                logger.info("Transferred %s files to %s", len(transferred), destination)
+                return destination
+        finally:
+            # The frames recorded since the last batch are kept for a resume
+            await loop.run_in_executor(None, journal.flush)
+            if transfer is not None:
+                await loop.run_in_executor(None, transfer.shutdown)
 
         return directory
@@ -9,14 +9,13 @@ from typing import Any, Dict, List
 from silex_client.action.command_base import CommandBase
 from silex_client.action.parameter_buffer import ParameterBuffer
 from silex_client.utils.parameter_types import IntArrayParameterMeta, TextParameterMeta
+from silex_maya.utils.output_types import get_output_type
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
 if typing.TYPE_CHECKING:
     from silex_client.action.action_query import ActionQuery
 
-import gazu
-import gazu.files
 from maya import cmds
 
 
@@ -69,7 +68,8 @@ class ExportFBX(CommandBase):
         return prompt["info"]
 
     # get selected objects
-    def selected_objects(self) -> List[str]:
+    @staticmethod
+    def selected_objects() -> List[str]:
         """Get selection in open scene"""
 
         # Authorized type
@@ -85,9 +85,8 @@ class ExportFBX(CommandBase):
         return selected
 
     # Get select objects
-    def export_fbx(
-        self, export_path, object_list, used_timeline, start_frame, end_frame
-    ):
+    @staticmethod
+    def export_fbx(export_path, object_list, used_timeline, start_frame, end_frame):
         """Export in fbx format"""
         if used_timeline:
             start_frame = cmds.playbackOptions(q=True, animationStartTime=True)
@@ -137,7 +136,7 @@ class ExportFBX(CommandBase):
             if root_name
             else directory / f"{file_name}"
         )
-        extension = await gazu.files.get_output_type_by_name("fbx")
+        extension = await get_output_type("fbx")
         export_path = export_path.with_suffix(f".{extension['short_name']}")
 
         # Export obj to fbx
@@ -5,7 +5,13 @@ from typing import Any, Dict, List
 
 from silex_client.action.command_base import CommandBase
 from silex_client.action.parameter_buffer import ParameterBuffer
-from silex_client.utils.parameter_types import TextParameterMeta
+from silex_client.utils.parameter_types import SelectParameterMeta, TextParameterMeta
+from silex_maya.utils.output_types import get_output_type
+from silex_maya.utils.scene_formats import (
+    SCENE_FORMATS,
+    get_scene_format,
+    log_scene_size,
+)
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
@@ -15,8 +21,8 @@ if typing.TYPE_CHECKING:
 import logging
 import os
 import pathlib
+import time
 
-import gazu.files
 import maya.cmds as cmds
 
 
@@ -36,6 +42,18 @@ class ExportMa(CommandBase):
             "type": pathlib.Path,
             "value": None,
         },
+        "file_format": {
+            "label": "Scene format",
+            "type": SelectParameterMeta("mayaAscii", "mayaBinary"),
+            "value": "mayaAscii",
+            "hide": True,
+        },
+        "fast": {
+            "label": "Fast export",
+            "type": bool,
+            "value": False,
+            "tooltip": "Export as maya binary, smaller and faster than maya ascii",
+        },
     }
 
     async def _prompt_warning(self, action_query: ActionQuery) -> bool:
@@ -83,7 +101,8 @@ class ExportMa(CommandBase):
         file_name: pathlib.Path = parameters["file_name"]
         selection: bool = False
 
-        extension = await gazu.files.get_output_type_by_name("ma")
+        file_format = get_scene_format(parameters["file_format"], parameters["fast"])
+        extension = await get_output_type(SCENE_FORMATS[file_format].lstrip("."))
         export_path: pathlib.Path = (directory / file_name).with_suffix(
             f".{extension['short_name']}"
         )
@@ -97,28 +116,20 @@ class ExportMa(CommandBase):
 
         # Export in temps directory
         directory.mkdir(parents=True, exist_ok=True)
-        if selection:
-            await execute_in_main_thread(
-                cmds.file,
-                export_path,
-                es=selection,
-                ea=not (selection),
-                pr=True,
-                typ="mayaAscii",
-            )
-        else:
-            current_path = await execute_in_main_thread(cmds.file, q=True, sn=True)
-            if current_path and pathlib.Path(current_path).exists():
-                await execute_in_main_thread(cmds.file, save=True)
-
-            await execute_in_main_thread(cmds.file, rename=export_path)
-            await execute_in_main_thread(cmds.file, save=True, typ="mayaAscii")
-
-            if current_path and pathlib.Path(current_path).exists():
-                await execute_in_main_thread(cmds.file, rename=current_path)
-            else:
-                await execute_in_main_thread(cmds.file, rename="untitled")
+        start = time.perf_counter()
+        # The export writes the scene once, the current scene name
+        # and its modified state are left untouched, unlike a save
+        await execute_in_main_thread(
+            cmds.file,
+            export_path,
+            es=selection,
+            ea=not (selection),
+            pr=True,
+            f=True,
+            typ=file_format,
+        )
 
+        log_scene_size(logger, export_path, file_format, time.perf_counter() - start)
         return export_path
 
     async def setup(
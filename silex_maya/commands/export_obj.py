@@ -6,6 +6,8 @@ from typing import Any, Dict
 from silex_client.action.command_base import CommandBase
 from silex_client.action.parameter_buffer import ParameterBuffer
 from silex_client.utils.parameter_types import TextParameterMeta
+from silex_maya.utils.output_types import get_output_type
+from silex_maya.utils.plugins import load_plugins
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
@@ -16,8 +18,6 @@ import logging
 import os
 import pathlib
 
-import gazu
-import gazu.files
 from maya import cmds
 
 
@@ -124,9 +124,12 @@ class ExportOBJ(CommandBase):
             if root_name
             else directory / f"{file_name}"
         )
-        extension = await gazu.files.get_output_type_by_name("obj")
+        extension = await get_output_type("obj")
         export_path = export_path.with_suffix(f".{extension['short_name']}")
 
+        # The obj plugin is not loaded at startup
+        await execute_in_main_thread(load_plugins, ["objExport"], logger)
+
         # Export in OBJ
         await execute_in_main_thread(
             cmds.file,
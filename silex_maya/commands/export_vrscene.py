@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import typing
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from silex_client.action.command_base import CommandBase
 from silex_client.utils.datatypes import SharedVariable
@@ -11,7 +11,14 @@ from silex_client.utils.parameter_types import (
     MultipleSelectParameterMeta,
     SelectParameterMeta,
 )
+from silex_maya.utils.output_types import get_output_type
+from silex_maya.utils.resume import ExportJournal
 from silex_maya.utils.thread import execute_in_main_thread
+from silex_maya.utils.transfer import (
+    TransferPipeline,
+    get_modified_files,
+    snapshot_directory,
+)
 
 # Forward references
 if typing.TYPE_CHECKING:
@@ -20,7 +27,6 @@ if typing.TYPE_CHECKING:
 import logging
 import pathlib
 
-import gazu.files
 from maya import cmds
 
 
@@ -42,6 +48,13 @@ class ExportVrscene(CommandBase):
             "value": None,
             "hide": True,
         },
+        "destination": {
+            "label": "Destination directory",
+            "type": pathlib.Path,
+            "value": None,
+            "tooltip": "Copy each file to this directory as soon as it is exported",
+            "hide": True,
+        },
         "camera": {
             "label": "Camera",
             "type": SelectParameterMeta(),
@@ -51,6 +64,12 @@ class ExportVrscene(CommandBase):
             "type": MultipleSelectParameterMeta(),
             "value": ["defaultRenderLayer"],
         },
+        "resume": {
+            "label": "Resume the previous export",
+            "type": bool,
+            "value": False,
+            "tooltip": "Only export the layers that are missing or corrupted",
+        },
         "parameter_overrides": {
             "type": bool,
             "label": "Parameter overrides",
@@ -99,6 +118,17 @@ class ExportVrscene(CommandBase):
         cmds.setAttr("defaultRenderGlobals.currentRenderer", l=False)
         cmds.setAttr("defaultRenderGlobals.currentRenderer", "vray", type="string")
 
+    @staticmethod
+    def _get_export_key(camera: str, output_name: str) -> str:
+        """
+        A layer exported with other settings can not be reused by a resume
+        """
+        start = cmds.getAttr("defaultRenderGlobals.startFrame")
+        end = cmds.getAttr("defaultRenderGlobals.endFrame")
+        step = cmds.getAttr("defaultRenderGlobals.byFrameStep")
+        animation = cmds.getAttr("defaultRenderGlobals.animation")
+        return f"{camera}|{start}-{end}x{step}|{animation}|{output_name}"
+
     @CommandBase.conform_command()
     async def __call__(
         self,
@@ -110,9 +140,12 @@ class ExportVrscene(CommandBase):
         file_name: pathlib.Path = parameters["file_name"]
         camera: str = parameters["camera"]
         render_layers: List[str] = parameters["render_layers"]
-        extension = await gazu.files.get_output_type_by_name("vrscene")
+        extension = await get_output_type("vrscene")
         parameter_overrides: bool = parameters["parameter_overrides"]
         frame_range: List[int] = parameters["frame_range"]
+        destination: Optional[pathlib.Path] = parameters["destination"]
+        resume: bool = parameters["resume"]
+        loop = asyncio.get_running_loop()
 
         # Batch: Export vrscene for each render layer
         command_label = self.command_buffer.label
@@ -128,51 +161,109 @@ class ExportVrscene(CommandBase):
                 cmds.setAttr, "defaultRenderGlobals.endFrame", frame_range[1]
             )
 
+        # The layers exported by a previous run are checked before being reused.
+        # The temp directory changes on every run, they are found in the destination.
+        # A layer is long to export, each one is written to the journal at once
+        journal = ExportJournal(directory, destination, flush_interval=1)
+        export_key = await execute_in_main_thread(
+            self._get_export_key, camera, f"{file_name}.{extension['short_name']}"
+        )
+        layer_keys = {layer: f"{layer}|{export_key}" for layer in render_layers}
+        valid_layers: Dict[str, List[pathlib.Path]] = {}
+        if resume:
+            journal.load()
+            valid_layers = await loop.run_in_executor(
+                None, journal.get_valid_groups, layer_keys.values()
+            )
+            logger.info(
+                "Resuming the export, %s of %s layers are still valid",
+                len(valid_layers),
+                len(render_layers),
+            )
+        else:
+            journal.clear()
+
+        transfer = None
+        if destination is not None:
+            transfer = TransferPipeline(directory, destination, logger=logger)
+
         layer_index = SharedVariable(0)
         task = asyncio.create_task(
             self.update_progress(action_query, layer_index, len(render_layers))
         )
-        for index, layer in enumerate(render_layers):
-            # Diplay feed back in front
-            new_label = f"{command_label}: ({index + 1}/{len(render_layers)}) --> Exporting: {layer}"
-            self.command_buffer.label = new_label
-            layer_index.value = index
-            self.command_buffer.progress = (index / len(render_layers)) * 100
-            await action_query.async_update_websocket(apply_response=False)
+        try:
+            for index, layer in enumerate(render_layers):
+                if layer_keys[layer] in valid_layers:
+                    logger.info("Skipping the layer %s, already exported", layer)
+                    continue
 
-            # The Output filename depends on the layer
-            output_name: pathlib.Path = pathlib.Path(f"{file_name}_{layer}")
-            output_path: pathlib.Path = (directory / output_name).with_suffix(
-                f".{extension['short_name']}"
-            )
+                # Diplay feed back in front
+                new_label = f"{command_label}: ({index + 1}/{len(render_layers)}) --> Exporting: {layer}"
+                self.command_buffer.label = new_label
+                layer_index.value = index
+                self.command_buffer.progress = (index / len(render_layers)) * 100
+                await action_query.async_update_websocket(apply_response=False)
 
-            await execute_in_main_thread(
-                cmds.setAttr,
-                "vraySettings.vrscene_filename",
-                output_path,
-                type="string",
-            )
-            await execute_in_main_thread(
-                cmds.editRenderLayerGlobals, currentRenderLayer=layer
-            )
-            logger.info("Executing: vrend on layer %s to %s", layer, output_path)
-            await execute_in_main_thread(cmds.setAttr, f"{camera}.renderable", 1)
-            await execute_in_main_thread(cmds.vrend, camera=camera)
-
-        task.cancel()
+                # The Output filename depends on the layer
+                output_name: pathlib.Path = pathlib.Path(f"{file_name}_{layer}")
+                output_path: pathlib.Path = (directory / output_name).with_suffix(
+                    f".{extension['short_name']}"
+                )
 
-        if "defaultRenderLayer" in await execute_in_main_thread(
-            cmds.ls, type="renderLayer"
-        ):
-            try:
                 await execute_in_main_thread(
-                    cmds.editRenderLayerGlobals, currentRenderLayer="defaultRenderLayer"
+                    cmds.setAttr,
+                    "vraySettings.vrscene_filename",
+                    output_path,
+                    type="string",
+                )
+                await execute_in_main_thread(
+                    cmds.editRenderLayerGlobals, currentRenderLayer=layer
                 )
-            except Exception as e:
-                logger.error(str(e))
+                logger.info("Executing: vrend on layer %s to %s", layer, output_path)
+                await execute_in_main_thread(cmds.setAttr, f"{camera}.renderable", 1)
+                snapshot = await loop.run_in_executor(
+                    None, snapshot_directory, directory
+                )
+                await execute_in_main_thread(cmds.vrend, camera=camera)
+
+                # The layer is complete, it is transferred during the next export
+                exported_files = await loop.run_in_executor(
+                    None, get_modified_files, directory, snapshot
+                )
+                await loop.run_in_executor(
+                    None, journal.record, layer_keys[layer], exported_files
+                )
+                if transfer is not None:
+                    for file_path in exported_files:
+                        transfer.submit(file_path)
+
+            task.cancel()
+
+            if "defaultRenderLayer" in await execute_in_main_thread(
+                cmds.ls, type="renderLayer"
+            ):
+                try:
+                    await execute_in_main_thread(
+                        cmds.editRenderLayerGlobals,
+                        currentRenderLayer="defaultRenderLayer",
+                    )
+                except Exception as e:
+                    logger.error(str(e))
+
+            await execute_in_main_thread(
+                cmds.setAttr, "vraySettings.vrscene_render_on", 1
+            )
+            await execute_in_main_thread(cmds.setAttr, "vraySettings.vrscene_on", 0)
 
-        await execute_in_main_thread(cmds.setAttr, "vraySettings.vrscene_render_on", 1)
-        await execute_in_main_thread(cmds.setAttr, "vraySettings.vrscene_on", 0)
+            if transfer is not None:
+                # Wait for the last transfers without blocking the event loop
+                transferred = await loop.run_in_executor(None, transfer.wait)
+                logger.info("Transferred %s files to %s", len(transferred), destination)
+                return destination
+        finally:
+            task.cancel()
+            if transfer is not None:
+                await loop.run_in_executor(None, transfer.shutdown)
 
         return directory
 
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import pathlib
+import threading
+import typing
+from typing import Any, Dict, List, Optional
+
+from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import (
+    IntArrayParameterMeta,
+    MultipleSelectParameterMeta,
+)
+from silex_maya.commands.export_fbx import ExportFBX
+from silex_maya.utils.fan_out import EXPORTER_PLUGINS, export_snapshot
+from silex_maya.utils.output_types import get_output_type
+from silex_maya.utils.snapshot import snapshot_registry
+from silex_maya.utils.thread import execute_in_main_thread
+from silex_maya.utils.transfer import TransferPipeline
+from silex_maya.utils.worker_pool import MayapyWorkerPool
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+from maya import cmds
+
+# The workers are kept alive between close publishes, starting mayapy takes seconds.
+# They are stopped after some time without publish
+WORKER_IDLE_TIMEOUT = 600
+worker_pool: Optional[MayapyWorkerPool] = None
+worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool(max_workers: int) -> MayapyWorkerPool:
+    """
+    Get the shared pool, with the plugins of all the formats preloaded
+    """
+    global worker_pool
+    with worker_pool_lock:
+        if worker_pool is not None and worker_pool.max_workers == max_workers:
+            return worker_pool
+        if worker_pool is not None:
+            # The jobs already queued in the previous pool still complete
+            threading.Thread(target=worker_pool.shutdown, daemon=True).start()
+
+        plugins = sorted(
+            {plugin for plugins in EXPORTER_PLUGINS.values() for plugin in plugins}
+        )
+        worker_pool = MayapyWorkerPool(
+            max_workers, plugins, idle_timeout=WORKER_IDLE_TIMEOUT
+        )
+        worker_pool.start()
+        return worker_pool
+
+
+def shutdown_worker_pool():
+    with worker_pool_lock:
+        if worker_pool is not None:
+            worker_pool.shutdown(cancel_pending=True)
+
+
+atexit.register(shutdown_worker_pool)
+
+
+class FanOutPublish(CommandBase):
+    """
+    Export the scene in multiple formats at once, each format in a mayapy worker
+    """
+
+    parameters = {
+        "directory": {
+            "label": "Publish directory",
+            "type": pathlib.Path,
+            "value": None,
+            "hide": True,
+        },
+        "temp_directory": {
+            "label": "Temp directory",
+            "type": pathlib.Path,
+            "value": None,
+            "hide": True,
+        },
+        "file_name": {
+            "label": "File name",
+            "type": pathlib.Path,
+            "value": None,
+            "hide": True,
+        },
+        "formats": {
+            "label": "Formats",
+            "type": MultipleSelectParameterMeta("ma", "abc", "fbx", "obj"),
+            "value": ["ma", "abc"],
+        },
+        "selection": {
+            "label": "Export selection",
+            "type": bool,
+            "value": True,
+        },
+        "timeline_as_framerange": {
+            "label": "Take timeline as frame-range?",
+            "type": bool,
+            "value": True,
+        },
+        "frame_range": {
+            "label": "Frame Range",
+            "type": IntArrayParameterMeta(2),
+            "value": [0, 0],
+        },
+        "max_workers": {
+            "label": "Parallel workers",
+            "type": int,
+            "value": 4,
+            "hide": True,
+        },
+    }
+
+    @staticmethod
+    def _get_selections(selection: bool) -> Dict[str, List[str]]:
+        """
+        Each exporter only accepts some node types
+        """
+        selected = cmds.ls(sl=True, long=True) or []
+        return {
+            "ma": selected if selection else [],
+            "abc": selected if selection else [],
+            # The fbx and obj exports always need a selection
+            "fbx": ExportFBX.selected_objects(),
+            "obj": [
+                node
+                for node in selected
+                if cmds.objectType(node) in ["mesh", "transform"]
+            ],
+        }
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        directory: pathlib.Path = parameters["directory"]
+        temp_directory: pathlib.Path = parameters["temp_directory"]
+        file_name: pathlib.Path = parameters["file_name"]
+        formats: List[str] = parameters["formats"]
+        frame_range: List[int] = parameters["frame_range"]
+        max_workers: int = parameters["max_workers"]
+
+        if parameters["timeline_as_framerange"]:
+            frame_range = [
+                await execute_in_main_thread(cmds.playbackOptions, q=True, min=True),
+                await execute_in_main_thread(cmds.playbackOptions, q=True, max=True),
+            ]
+        selections = await execute_in_main_thread(
+            self._get_selections, parameters["selection"]
+        )
+        for export_format in ["fbx", "obj"]:
+            if export_format in formats and not selections[export_format]:
+                raise Exception(f"Could not export to {export_format}: No selection")
+
+        export_paths: Dict[str, pathlib.Path] = {}
+        for export_format in formats:
+            extension = await get_output_type(export_format)
+            export_paths[export_format] = (temp_directory / file_name).with_suffix(
+                f".{extension['short_name']}"
+            )
+
+        # The workers open the current state of the scene, even if it is not saved
+        owner = self.command_buffer.uuid
+        snapshot = await execute_in_main_thread(snapshot_registry.acquire, owner)
+        options = {"frame_range": frame_range}
+        loop = asyncio.get_running_loop()
+
+        def on_log(name: str, level: int, text: str):
+            logger.log(level, "[%s] %s", name, text)
+
+        pool = await loop.run_in_executor(None, get_worker_pool, max_workers)
+        transfer = TransferPipeline(temp_directory, directory, logger=logger)
+        jobs = []
+        try:
+            jobs = [
+                pool.submit(
+                    export_snapshot,
+                    str(snapshot),
+                    export_format,
+                    str(export_paths[export_format]),
+                    selections[export_format],
+                    options,
+                    on_log=on_log,
+                )
+                for export_format in formats
+            ]
+            futures = {
+                asyncio.wrap_future(job): export_format
+                for job, export_format in zip(jobs, formats)
+            }
+
+            # Each format is moved to the publish directory as soon as it is ready
+            pending = set(futures)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    export_path = future.result()
+                    logger.info("Exported %s to %s", futures[future], export_path)
+                    transfer.submit(export_path)
+
+                completed = len(formats) - len(pending)
+                self.command_buffer.progress = (completed / len(formats)) * 100
+                await action_query.async_update_websocket(apply_response=False)
+
+            await loop.run_in_executor(None, transfer.wait)
+        finally:
+            # The pool is shared, only the exports of this publish are cancelled
+            for job in jobs:
+                job.cancel()
+            # The running exports still read the snapshot
+            await asyncio.gather(
+                *[asyncio.wrap_future(job) for job in jobs], return_exceptions=True
+            )
+            await loop.run_in_executor(None, transfer.shutdown)
+            snapshot_registry.release(owner)
+
+        return {
+            export_format: transfer.get_destination(export_path)
+            for export_format, export_path in export_paths.items()
+        }
+
+    async def setup(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        self.command_buffer.parameters["frame_range"].hide = parameters.get(
+            "timeline_as_framerange", True
+        )
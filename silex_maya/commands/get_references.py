@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
 import pathlib
 import typing
@@ -8,22 +10,20 @@ from typing import Any, Dict, List, Tuple
 import fileseq
 from silex_client.action.command_base import CommandBase
 from silex_client.action.parameter_buffer import ParameterBuffer
-from silex_client.utils.files import (
-    find_sequence_from_path,
-    is_valid_pipeline_path,
-    is_valid_path,
-    sequence_exists,
-    expand_template_to_sequence
-)
+from silex_client.utils.files import sequence_exists
 from silex_client.utils.parameter_types import ListParameterMeta, TextParameterMeta
+from silex_maya.utils.content_hash import find_duplicates
+from silex_maya.utils.pipeline_paths import (
+    PipelinePathClassifier,
+    get_pipeline_roots,
+)
+from silex_maya.utils.sequences import find_reference_sequences, get_frames_key
 from silex_maya.utils.thread import execute_in_main_thread
-from silex_maya.utils.constants import MATCH_FILE_SEQUENCE
 
 # Forward references
 if typing.TYPE_CHECKING:
     from silex_client.action.action_query import ActionQuery
 
-import maya.app.general.fileTexturePathResolver as ftpr
 from maya import cmds
 
 
@@ -56,6 +56,19 @@ class GetReferences(CommandBase):
             "type": bool,
             "value": False,
         },
+        "pipeline_roots": {
+            "label": "Pipeline roots",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "tooltip": "Conformed directories, from the environment or the projects",
+            "hide": True,
+        },
+        "deduplicate": {
+            "label": "Group the references with the same content",
+            "type": bool,
+            "value": False,
+            "hide": True,
+        },
     }
 
     async def _prompt_new_path(
@@ -168,27 +181,15 @@ class GetReferences(CommandBase):
         # Make sure to not have duplicates in the references
         return list(set(referenced_files))
 
-    def _get_reference_sequence(self, file_path: pathlib.Path) -> fileseq.FileSequence:
+    def _get_reference_sequences(
+        self, file_path: pathlib.Path
+    ) -> List[fileseq.FileSequence]:
         """
-        Convert the reference's file path into a sequence
+        Convert the reference's file path into sequences
         The reference is not a sequence, the returned value will be a sequence of one item
         """
-        # We need to get the real path first, expand the syntaxes like <UDIM> or <frame04>
-        match_sequence = expand_template_to_sequence(file_path, MATCH_FILE_SEQUENCE)
-        if len(match_sequence) > 1:
-            return match_sequence
-
-        pattern_match: List[str] = ftpr.findAllFilesForPattern(str(file_path), None)
-        if len(pattern_match) > 0:
-            file_path = pathlib.Path(str(pattern_match[0]))
-        elif not is_valid_path(str(file_path)):
-            for regex in MATCH_FILE_SEQUENCE:
-                match = regex.match(str(file_path))
-                if match is None:
-                    continue
-                file_path = pathlib.Path(str(file_path).replace(match.group(1), "0"))
-
-        return find_sequence_from_path(file_path)
+        # The syntaxes like <UDIM> or <frame04> are expanded from the parsed path
+        return find_reference_sequences(file_path)
 
     @CommandBase.conform_command()
     async def __call__(
@@ -201,6 +202,11 @@ class GetReferences(CommandBase):
         included_extensions = parameters["included_extensions"]
         skip_conformed = parameters["skip_conformed"]
         skip_prompt = parameters["skip_prompt"]
+        deduplicate = parameters["deduplicate"]
+        path_classifier = PipelinePathClassifier(
+            parameters["pipeline_roots"]
+            or await get_pipeline_roots(action_query.context_metadata)
+        )
 
         # Each referenced file must be verified
         references: List[Tuple[str, fileseq.FileSequence]] = []
@@ -212,11 +218,12 @@ class GetReferences(CommandBase):
         skip_all = False
         for attribute, file_path in referenced_files:
             # Get the sequence that correspond to the file path
-            file_paths = fileseq.FileSequence(file_path)
+            sequences = [fileseq.FileSequence(file_path)]
             if self._test_possible_sequence(attribute, file_path):
-                file_paths = await execute_in_main_thread(
-                    self._get_reference_sequence, file_path
+                sequences = await execute_in_main_thread(
+                    self._get_reference_sequences, file_path
                 )
+            file_paths = sequences[0]
 
             # Skip the custom extensions provided
             if file_paths.extension() in excluded_extensions:
@@ -245,22 +252,54 @@ class GetReferences(CommandBase):
                 )
                 if skip or file_path is None or skip_all:
                     break
-                file_paths = await execute_in_main_thread(
-                    self._get_reference_sequence, file_path
+                sequences = await execute_in_main_thread(
+                    self._get_reference_sequences, file_path
                 )
+                file_paths = sequences[0]
 
             # The user can decide to skip the references that are not reachable
             if skip or file_path is None:
                 logger.info("Skipping the reference at %s", attribute)
                 continue
 
-            # Skip the references that are already conformed
-            if skip_conformed and all(is_valid_pipeline_path(pathlib.Path(path)) for path in file_paths):
-                continue
+            # The uvtiles can be split into several sequences, they are all conformed
+            for file_paths in sequences:
+                # Skip the references that are already conformed
+                if skip_conformed and path_classifier.is_sequence_conformed(file_paths):
+                    continue
 
-            # Append to the verified path
-            references.append((attribute, file_paths))
-            logger.info("Referenced file(s) %s found at %s", file_paths, attribute)
+                # Append to the verified path
+                references.append((attribute, file_paths))
+                logger.info("Referenced file(s) %s found at %s", file_paths, attribute)
+
+        # The references with the same content only need to be conformed once,
+        # their attributes are repathed to the same conformed file
+        duplicate_attributes: List[List[str]] = [[] for _ in references]
+        if deduplicate and references:
+            groups = [
+                sorted(str(path) for path in file_paths) for _, file_paths in references
+            ]
+            # Only the references with the same frames and tiles are interchangeable
+            frames_keys = [get_frames_key(file_paths) for _, file_paths in references]
+            duplicates = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(find_duplicates, groups, keys=frames_keys)
+            )
+            unique_references = []
+            for index, (attribute, file_paths) in enumerate(references):
+                if duplicates[index] == index:
+                    unique_references.append(index)
+                    continue
+                original_attribute = references[duplicates[index]][0]
+                duplicate_attributes[duplicates[index]].append(attribute)
+                logger.info(
+                    "Attribute %s has the same content as %s",
+                    attribute,
+                    original_attribute,
+                )
+            references = [references[index] for index in unique_references]
+            duplicate_attributes = [
+                duplicate_attributes[index] for index in unique_references
+            ]
 
         # Send the message to inform the user
         if references and not skip_prompt:
@@ -291,6 +330,7 @@ class GetReferences(CommandBase):
         return {
             "attributes": reference_attributes,
             "file_paths": reference_file_paths,
+            "duplicate_attributes": duplicate_attributes,
         }
 
     async def setup(
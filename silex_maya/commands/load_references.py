@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import logging
+import typing
+from typing import Any, Dict, List
+
+from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import ListParameterMeta
+from silex_maya.utils.references import load_references
+from silex_maya.utils.thread import execute_in_main_thread
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+
+class LoadReferences(CommandBase):
+    """
+    Load on demand the references that were not loaded when the scene was opened
+    """
+
+    parameters = {
+        "references": {
+            "label": "Reference nodes to load",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+    }
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        references: List[str] = parameters["references"] or []
+
+        load_times = await execute_in_main_thread(load_references, references, logger)
+        logger.info(
+            "Loaded %s references in %.2fs", len(load_times), sum(load_times.values())
+        )
+
+        return list(load_times.keys())
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import pathlib
 import typing
-from typing import Any, Dict
+from typing import Any, Dict, List, Set
 
 from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import SelectParameterMeta
+from silex_maya.utils.maya_ascii import get_deferred_references
+from silex_maya.utils.plugins import get_required_plugins, load_plugins
+from silex_maya.utils.prefetch import (
+    apply_directory_mappings,
+    mapped_directories,
+    prefetch_scene,
+)
+from silex_maya.utils.references import REFERENCE_DEPTHS, list_unloaded_references
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
@@ -33,6 +43,31 @@ class Open(CommandBase):
             "type": bool,
             "value": True,
         },
+        "load_plugins": {
+            "label": "Load the required plugins before opening",
+            "type": bool,
+            "value": True,
+            "hide": True,
+        },
+        "load_references": {
+            "label": "References to load",
+            "type": SelectParameterMeta("all", "top_level", "none"),
+            "value": "all",
+            "hide": True,
+            "tooltip": "The references not loaded can be loaded later on demand",
+        },
+        "prefetch": {
+            "label": "Prefetch the references in a local cache",
+            "type": bool,
+            "value": False,
+            "hide": True,
+        },
+        "prefetch_workers": {
+            "label": "Parallel prefetch workers",
+            "type": int,
+            "value": 8,
+            "hide": True,
+        },
     }
 
     @CommandBase.conform_command()
@@ -52,7 +87,11 @@ class Open(CommandBase):
         # Test if the scene that we have to open exists
         if not os.path.exists(file_path) or not os.path.isabs(file_path):
             logger.error("Could not open %s: The file does not exists", file_path)
-            return {"old_path": current_file, "new_path": current_file}
+            return {
+                "old_path": current_file,
+                "new_path": current_file,
+                "deferred_references": [],
+            }
 
         # Define the function that will open the scene
         def open(file_path: str, force: bool = False):
@@ -69,10 +108,59 @@ class Open(CommandBase):
             # If the scene has unsaved changes we must force the open
             elif file_state:
                 force = True
-            cmds.file(file_path, o=True, force=force)
+            cmds.file(
+                file_path,
+                o=True,
+                force=force,
+                loadReferenceDepth=REFERENCE_DEPTHS[parameters["load_references"]],
+            )
+
+        # The scene that is already open is not opened again
+        already_open = pathlib.Path(current_file) == pathlib.Path(file_path)
+        loop = asyncio.get_running_loop()
+
+        # Only load the plugins that the scene requires, before maya tries to find them
+        if parameters["load_plugins"] and not already_open:
+            required_plugins = await loop.run_in_executor(
+                None, get_required_plugins, file_path
+            )
+            loaded_plugins = await execute_in_main_thread(
+                load_plugins, required_plugins, logger
+            )
+            if loaded_plugins:
+                logger.info("Loaded the required plugins %s", loaded_plugins)
+
+        # Copy the dependencies locally in parallel, maya then reads them from the cache
+        is_ascii = pathlib.Path(file_path).suffix == ".ma"
+        if parameters["prefetch"] and is_ascii and not already_open:
+            mappings = await loop.run_in_executor(
+                None, prefetch_scene, file_path, parameters["prefetch_workers"], logger
+            )
+            await execute_in_main_thread(apply_directory_mappings, mappings)
+            logger.info("Remapped %s directories to the local cache", len(mappings))
+        elif mapped_directories and not already_open:
+            # The mappings of a previous prefetch do not apply to this scene
+            await execute_in_main_thread(apply_directory_mappings, {})
 
         # Execute the open function in the main thread
         logger.info("Openning file %s", file_path)
         await execute_in_main_thread(open, file_path=file_path)
 
-        return {"old_path": current_file, "new_path": parameters["file_path"]}
+        # List the references left unloaded by the open, except the ones
+        # that are saved as unloaded, so they can be loaded on demand
+        deferred_references: List[str] = []
+        if parameters["load_references"] != "all":
+            saved_unloaded: Set[str] = set()
+            if pathlib.Path(file_path).suffix == ".ma":
+                saved_unloaded = get_deferred_references(file_path)
+            unloaded = await execute_in_main_thread(list_unloaded_references)
+            deferred_references = [
+                reference for reference in unloaded if reference not in saved_unloaded
+            ]
+            logger.info("%s references were not loaded", len(deferred_references))
+
+        return {
+            "old_path": current_file,
+            "new_path": parameters["file_path"],
+            "deferred_references": deferred_references,
+        }
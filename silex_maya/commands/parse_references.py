@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import pathlib
+import typing
+from typing import Any, Dict, List, Tuple
+
+import fileseq
+from silex_client.action.command_base import CommandBase
+from silex_client.utils.files import sequence_exists
+from silex_client.utils.parameter_types import ListParameterMeta
+from silex_maya.utils.maya_ascii import SceneDependencies, parse_dependencies
+from silex_maya.utils.pipeline_paths import (
+    PipelinePathClassifier,
+    get_pipeline_roots,
+)
+from silex_maya.utils.sequences import find_reference_sequences
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+
+class ParseReferences(CommandBase):
+    """
+    Find all the referenced files of a maya ascii file, without opening it in maya
+    """
+
+    parameters = {
+        "file_path": {
+            "label": "Maya ascii file",
+            "type": pathlib.Path,
+            "value": None,
+        },
+        "excluded_extensions": {
+            "label": "Excluded extensions",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "tooltip": "List of file extensions to ignore",
+            "hide": True,
+        },
+        "included_extensions": {
+            "label": "Included extensions",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "tooltip": "List of file extensions to accept",
+            "hide": True,
+        },
+        "skip_conformed": {
+            "label": "Skip existing conformed file",
+            "type": bool,
+            "value": True,
+        },
+        "pipeline_roots": {
+            "label": "Pipeline roots",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "tooltip": "Conformed directories, from the environment or the projects",
+            "hide": True,
+        },
+    }
+
+    def _get_scene_references(
+        self, dependencies: SceneDependencies
+    ) -> List[Tuple[str, fileseq.FileSequence]]:
+        """
+        Convert the parsed dependencies into the same form as GetReferences
+        """
+        references = [
+            (node, fileseq.FileSequence(pathlib.Path(file_path)))
+            for node, file_path in dependencies.references
+        ]
+
+        for attribute, file_path in sorted(set(dependencies.attributes)):
+            path = pathlib.Path(file_path)
+            sequences = [fileseq.FileSequence(path)]
+            if attribute in dependencies.sequence_attributes:
+                # The uvtiles can be split into several sequences
+                sequences = find_reference_sequences(path)
+            references += [(attribute, file_paths) for file_paths in sequences]
+
+        return references
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        file_path: pathlib.Path = parameters["file_path"]
+        excluded_extensions = parameters["excluded_extensions"]
+        included_extensions = parameters["included_extensions"]
+        skip_conformed = parameters["skip_conformed"]
+        path_classifier = PipelinePathClassifier(
+            parameters["pipeline_roots"]
+            or await get_pipeline_roots(action_query.context_metadata)
+        )
+
+        # The parsing is only reading the file, it does not need the main thread
+        loop = asyncio.get_running_loop()
+        dependencies = await loop.run_in_executor(None, parse_dependencies, file_path)
+        scene_references = await loop.run_in_executor(
+            None, self._get_scene_references, dependencies
+        )
+
+        references: List[Tuple[str, fileseq.FileSequence]] = []
+        for attribute, file_paths in scene_references:
+            # Skip the custom extensions provided
+            extension = file_paths.extension()
+            if extension in excluded_extensions or (
+                included_extensions and extension not in included_extensions
+            ):
+                logger.warning(
+                    "Excluded attribute %s pointing to %s", attribute, file_paths
+                )
+                continue
+
+            # Nobody can be prompted here, the unreachable files are just skipped
+            if not sequence_exists(file_paths):
+                logger.warning(
+                    "Could not reach the file(s) %s at %s", file_paths, attribute
+                )
+                continue
+
+            # Skip the references that are already conformed
+            if skip_conformed and path_classifier.is_sequence_conformed(file_paths):
+                continue
+
+            references.append((attribute, file_paths))
+            logger.info("Referenced file(s) %s found at %s", file_paths, attribute)
+
+        return {
+            "attributes": [reference[0] for reference in references],
+            "file_paths": [
+                [pathlib.Path(str(path)) for path in reference[1]]
+                for reference in references
+            ],
+            "plugins": dependencies.plugins,
+        }
@@ -2,10 +2,14 @@ from __future__ import annotations
 
 import logging
 import typing
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from silex_client.action.command_base import CommandBase
-from silex_client.utils.parameter_types import TaskFileParameterMeta
+from silex_client.utils.parameter_types import (
+    ListParameterMeta,
+    TaskFileParameterMeta,
+)
+from silex_maya.utils.references import load_references
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
@@ -31,6 +35,31 @@ class Reference(CommandBase):
         "enable_namespace": {"label": "Enable namespace", "type": bool, "value": True},
         "namespace": {"label": "Namespace", "type": str, "value": ""},
         "import": {"type": bool, "value": False, "hide": True},
+        "file_paths": {
+            "label": "Other reference files",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+            "tooltip": "Reference all the files at once, their loads are batched",
+        },
+        "namespaces": {
+            "label": "Namespaces of the reference files",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+        "proxies": {
+            "label": "Proxy files of the reference files",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+        "proxy_first": {
+            "label": "Load the proxies instead of the full references",
+            "type": bool,
+            "value": False,
+            "hide": True,
+        },
     }
 
     async def setup(
@@ -43,6 +72,111 @@ class Reference(CommandBase):
             "namespace"
         ].hide = not self.command_buffer.parameters["enable_namespace"].value
 
+    @staticmethod
+    def create_deferred_references(
+        file_paths: List[pathlib.Path], namespaces: List[Optional[str]]
+    ) -> List[str]:
+        """
+        Create the reference nodes without loading them
+        """
+        reference_nodes = []
+        for file_path, namespace in zip(file_paths, namespaces):
+            args: Dict[str, Any] = {"r": True, "deferReference": True}
+            if namespace is not None:
+                args["namespace"] = namespace
+            reference_path = cmds.file(str(file_path), **args)
+            reference_nodes.append(
+                cmds.referenceQuery(reference_path, referenceNode=True)
+            )
+        return reference_nodes
+
+    @staticmethod
+    def add_proxies(
+        reference_nodes: List[str], proxies: List[str], logger: logging.Logger
+    ) -> List[str]:
+        """
+        Add the proxy files to the references, return the nodes to load
+        """
+        nodes_to_load = []
+        for index, reference_node in enumerate(reference_nodes):
+            proxy = proxies[index] if index < len(proxies) else ""
+            if not proxy:
+                nodes_to_load.append(reference_node)
+                continue
+
+            proxy_node = cmds.proxyAdd(reference_node, proxy, "proxy")
+            if isinstance(proxy_node, list):
+                proxy_node = proxy_node[0]
+            logger.info("Added the proxy %s to %s", proxy, reference_node)
+            nodes_to_load.append(proxy_node)
+        return nodes_to_load
+
+    @staticmethod
+    def load_batch(reference_nodes: List[str], logger: logging.Logger):
+        # The viewport is not refreshed between the loads
+        cmds.refresh(suspend=True)
+        try:
+            return load_references(reference_nodes, logger)
+        finally:
+            cmds.refresh(suspend=False)
+
+    async def reference_batch(
+        self, parameters: Dict[str, Any], logger: logging.Logger
+    ) -> List[str]:
+        file_paths = [pathlib.Path(file_path) for file_path in parameters["file_paths"]]
+        namespaces: List[str] = list(parameters["namespaces"] or [])
+        proxies: List[str] = list(parameters["proxies"] or [])
+        if proxies and not parameters["proxy_first"]:
+            logger.warning("The proxies are only used with proxy_first, ignoring them")
+
+        # The selected reference file is the first of the batch, without proxy
+        if parameters["reference"] is not None:
+            file_paths.insert(0, pathlib.Path(parameters["reference"]))
+            namespaces.insert(0, parameters["namespace"])
+            proxies.insert(0, "")
+
+        # The namespaces are given in the same order as the files
+        file_namespaces: List[Optional[str]] = []
+        for index, file_path in enumerate(file_paths):
+            namespace = namespaces[index] if index < len(namespaces) else ""
+            if not parameters["enable_namespace"]:
+                file_namespaces.append(None)
+            else:
+                file_namespaces.append(namespace or file_path.stem)
+
+        if parameters["import"]:
+            for file_path, namespace in zip(file_paths, file_namespaces):
+                args: Dict[str, Any] = {"i": True, "ra": True}
+                if namespace is not None:
+                    args["namespace"] = namespace
+                await execute_in_main_thread(cmds.file, str(file_path), **args)
+            return []
+
+        # All the nodes are created first, then loaded in a single batch
+        reference_nodes = await execute_in_main_thread(
+            self.create_deferred_references, file_paths, file_namespaces
+        )
+        nodes_to_load = reference_nodes
+        if parameters["proxy_first"]:
+            nodes_to_load = await execute_in_main_thread(
+                self.add_proxies, reference_nodes, proxies, logger
+            )
+
+        load_times = await execute_in_main_thread(
+            self.load_batch, nodes_to_load, logger
+        )
+        if load_times:
+            slowest = max(load_times, key=lambda node: load_times[node])
+            logger.info(
+                "Loaded %s references in %.2fs, the slowest is %s (%.2fs)",
+                len(load_times),
+                sum(load_times.values()),
+                slowest,
+                load_times[slowest],
+            )
+
+        return reference_nodes
+
     @CommandBase.conform_command()
     async def __call__(
         self,
@@ -50,6 +184,9 @@ class Reference(CommandBase):
         action_query: ActionQuery,
         logger: logging.Logger,
     ):
+        if parameters["file_paths"]:
+            return await self.reference_batch(parameters, logger)
+
         reference: pathlib.Path = parameters["reference"]
         file_name = reference.stem
 
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import typing
+from typing import Any, Dict, List
+
+from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import AnyParameter, ListParameterMeta
+from silex_maya.utils.maya_ascii import rewrite_references
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+
+class RewriteReferences(CommandBase):
+    """
+    Repath the references that were left unloaded directly in the saved scenes,
+    and restore the load state they had before the scene was opened
+    """
+
+    parameters = {
+        "file_paths": {
+            "label": "Saved scenes",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+        "attributes": {
+            "label": "Repathed attributes",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+        "values": {
+            "label": "New paths of the attributes",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+        "duplicate_attributes": {
+            "label": "Attributes with the same content",
+            "type": ListParameterMeta(AnyParameter),
+            "value": [],
+            "hide": True,
+        },
+        "loaded_references": {
+            "label": "References to save as loaded",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+    }
+
+    @staticmethod
+    def _rewrite(
+        file_path: str,
+        reference_paths: Dict[str, str],
+        loaded_references: List[str],
+    ) -> int:
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            replaced = rewrite_references(
+                file_path, temp_path, reference_paths, loaded_references
+            )
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return replaced
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        file_paths: List[str] = parameters["file_paths"] or []
+        duplicate_attributes: List[List[str]] = (
+            parameters["duplicate_attributes"] or []
+        )
+        loaded_references: List[str] = parameters["loaded_references"] or []
+
+        # Only the reference nodes match a reference statement of the scene
+        reference_paths: Dict[str, str] = {}
+        for index, (attribute, value) in enumerate(
+            zip(parameters["attributes"] or [], parameters["values"] or [])
+        ):
+            if not value:
+                continue
+            reference_paths[attribute] = value
+            if index < len(duplicate_attributes):
+                for duplicate_attribute in duplicate_attributes[index]:
+                    reference_paths[duplicate_attribute] = value
+
+        loop = asyncio.get_running_loop()
+        for file_path in file_paths:
+            if not file_path.endswith(".ma"):
+                logger.warning("Could not repath the references of %s", file_path)
+                continue
+            replaced = await loop.run_in_executor(
+                None, self._rewrite, file_path, reference_paths, loaded_references
+            )
+            logger.info("Repathed %s references in %s", replaced, file_path)
+
+        return file_paths
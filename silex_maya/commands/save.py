@@ -1,21 +1,36 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import time
 import typing
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
 
 from silex_client.action.command_base import CommandBase
-from silex_client.utils.parameter_types import ListParameterMeta
+from silex_client.utils.parameter_types import ListParameterMeta, SelectParameterMeta
+from silex_maya.utils.background_sync import background_sync, save_in_background
+from silex_maya.utils.files import atomic_copy
+from silex_maya.utils.scene_formats import (
+    get_scene_format,
+    log_scene_size,
+    with_scene_extension,
+)
 from silex_maya.utils.thread import execute_in_main_thread
 
 # Forward references
 if typing.TYPE_CHECKING:
     from silex_client.action.action_query import ActionQuery
 
-import os
-
 import maya.cmds as cmds
 
+# The scene is serialized once on the local disk, then copied to every path
+STAGING_DIRECTORY = pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "staging"
+
 
 class Save(CommandBase):
     """
@@ -27,9 +42,34 @@ class Save(CommandBase):
             "label": "filename",
             "type": ListParameterMeta(str),
             "hide": False,
-        }
+        },
+        "file_format": {
+            "label": "Scene format",
+            "type": SelectParameterMeta("mayaAscii", "mayaBinary"),
+            "value": "mayaAscii",
+            "hide": True,
+        },
+        "fast": {
+            "label": "Fast save",
+            "type": bool,
+            "value": False,
+            "hide": True,
+            "tooltip": "Save as maya binary, smaller and faster than maya ascii",
+        },
+        "background": {
+            "label": "Sync to the network in the background",
+            "type": bool,
+            "value": False,
+            "hide": True,
+            "tooltip": "Save on the local disk and give the control back at once",
+        },
     }
 
+    @staticmethod
+    def save_staging(staging_path: str, file_format: str):
+        cmds.file(rename=staging_path)
+        cmds.file(save=True, type=file_format)
+
     @CommandBase.conform_command()
     async def __call__(
         self,
@@ -37,20 +77,66 @@ class Save(CommandBase):
         action_query: ActionQuery,
         logger: logging.Logger,
     ):
-        file_paths = parameters["file_paths"]
+        file_format = get_scene_format(parameters["file_format"], parameters["fast"])
+        file_paths: List[str] = [
+            with_scene_extension(file_path, file_format)
+            for file_path in parameters["file_paths"]
+        ]
+        if not file_paths:
+            return {"new_path": file_paths}
 
-        def save(file_path: str):
-            cmds.file(rename=file_path)
-            cmds.file(save=True, type="mayaAscii")
+        if parameters["background"]:
+            for file_path in file_paths:
+                logger.info("Saving scene to %s in the background", file_path)
+            await execute_in_main_thread(save_in_background, file_paths, file_format)
+            return {"new_path": file_paths}
 
+        # A pending background sync would overwrite this save with an older scene
         for file_path in file_paths:
-            if os.path.splitext(file_path)[1] != ".ma":
-                file_path = f"{os.path.splitext(file_path)[0]}.ma"
+            background_sync.discard(file_path)
+
+        # The staging file has the name of the primary path,
+        # maya writes that name in the header of the scene
+        staging_directory = STAGING_DIRECTORY / str(os.getpid())
+        os.makedirs(staging_directory, exist_ok=True)
+        staging_path = staging_directory / os.path.basename(file_paths[0])
+
+        start = time.perf_counter()
+        try:
+            await execute_in_main_thread(
+                self.save_staging, staging_path.as_posix(), file_format
+            )
+            save_time = time.perf_counter() - start
+            log_scene_size(logger, staging_path, file_format, save_time)
+
+            def copy(file_path: str) -> bool:
+                logger.info("Saving scene to %s", file_path)
+                # Linked paths would share their content, a later save of one of
+                # them would modify all of them. Only the primary path is linked,
+                # the staging file is removed after the save
+                link = file_path == file_paths[0]
+                return atomic_copy(staging_path, file_path, link=link)
 
-            logger.info("Saving scene to %s", file_path)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            await execute_in_main_thread(save, file_path=file_path)
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=len(file_paths)) as executor:
+                linked = await asyncio.gather(
+                    *[
+                        loop.run_in_executor(executor, copy, file_path)
+                        for file_path in file_paths
+                    ]
+                )
+        finally:
+            shutil.rmtree(staging_directory, ignore_errors=True)
+            # The scene must not keep the name of the staging file,
+            # the next save of the artist goes to the primary path
+            await execute_in_main_thread(cmds.file, rename=file_paths[0])
 
-            file_paths[file_paths.index(file_path)] = file_path
+        logger.info(
+            "Scene serialized in %.2fs, copied to %s paths (%s linked) in %.2fs",
+            save_time,
+            len(file_paths),
+            sum(linked),
+            time.perf_counter() - start - save_time,
+        )
 
         return {"new_path": file_paths}
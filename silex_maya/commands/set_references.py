@@ -8,10 +8,11 @@ from typing import Any, Dict, List
 import fileseq
 from maya import cmds
 from silex_client.action.command_base import CommandBase
-from silex_client.utils.files import format_sequence_string
 from silex_client.utils.parameter_types import AnyParameter, ListParameterMeta
+from silex_maya.utils.path_template import parse_path_template
+from silex_maya.utils.references import is_reference_loaded
+from silex_maya.utils.sequences import to_file_sequence
 from silex_maya.utils.thread import execute_in_main_thread
-from silex_maya.utils.constants import MATCH_FILE_SEQUENCE
 
 # Forward references
 if typing.TYPE_CHECKING:
@@ -42,6 +43,19 @@ class SetReferences(CommandBase):
             "type": ListParameterMeta(AnyParameter),
             "value": None,
         },
+        "duplicate_attributes": {
+            "label": "Attributes with the same content",
+            "type": ListParameterMeta(AnyParameter),
+            "value": [],
+            "hide": True,
+        },
+        "load_references": {
+            "label": "Load the repathed references",
+            "type": bool,
+            "value": True,
+            "hide": True,
+            "tooltip": "The unloaded references are only repathed in the saved scene",
+        },
     }
 
     def _get_attribute(self, attribute: str):
@@ -65,20 +79,24 @@ class SetReferences(CommandBase):
         )
         return ".".join([node_name, attrib_name])
 
-    def _set_reference(self, attribute: str, value: fileseq.FileSequence) -> str:
+    def _set_reference(
+        self, attribute: str, value: fileseq.FileSequence, load_reference: bool = True
+    ) -> str:
         # If the attribute is a maya reference
         if cmds.nodeType(attribute) == "reference":
             reference_value = str(pathlib.Path(str(value.index(0))))
-            cmds.file(reference_value, loadReference=attribute)
+            # Setting the path of a reference loads it, the unloaded ones are
+            # repathed later in the saved scene
+            if load_reference or is_reference_loaded(attribute):
+                cmds.file(reference_value, loadReference=attribute)
             return reference_value
         # If the attribute is from an other referenced scene
         if cmds.referenceQuery(attribute, isNodeReferenced=True):
             return ""
 
         previous_value = cmds.getAttr(attribute)
-        reference_value = format_sequence_string(
-            value, previous_value, MATCH_FILE_SEQUENCE
-        )
+        # Write the new path with the same tokens as the previous one
+        reference_value = parse_path_template(previous_value).reformat(value)
 
         # If it is just a file node or a texture...
         split_attributes = attribute.split(".")
@@ -105,6 +123,10 @@ class SetReferences(CommandBase):
         logger: logging.Logger,
     ):
         attributes: List[str] = parameters["attributes"]
+        duplicate_attributes: List[List[str]] = (
+            parameters["duplicate_attributes"] or []
+        )
+        load_references: bool = parameters["load_references"]
         values = []
         # TODO: This should be done in the get_value method of the ParameterBuffer
         for value in parameters["values"]:
@@ -114,16 +136,26 @@ class SetReferences(CommandBase):
 
         # Execute the function in the main thread
         new_values = []
-        for attribute, value in zip(attributes, values):
-            if not isinstance(value, list):
-                value = [value]
-            value = fileseq.findSequencesInList(value)[0]
+        for index, (attribute, value) in enumerate(zip(attributes, values)):
+            value = to_file_sequence(value)
 
             attribute = await execute_in_main_thread(self._get_attribute, attribute)
             new_value = await execute_in_main_thread(
-                self._set_reference, attribute, value
+                self._set_reference, attribute, value, load_references
             )
             logger.info("Attribute %s set to %s", attribute, value)
             new_values.append(new_value)
 
+            # The attributes that have the same content are repathed to the same file
+            if index >= len(duplicate_attributes):
+                continue
+            for duplicate_attribute in duplicate_attributes[index]:
+                duplicate_attribute = await execute_in_main_thread(
+                    self._get_attribute, duplicate_attribute
+                )
+                await execute_in_main_thread(
+                    self._set_reference, duplicate_attribute, value, load_references
+                )
+                logger.info("Attribute %s set to %s", duplicate_attribute, value)
+
         return new_values
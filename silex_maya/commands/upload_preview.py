@@ -8,6 +8,7 @@ from typing import Any, Dict, List
 
 import gazu.task
 from silex_client.action.command_base import CommandBase, CommandParameters
+from silex_maya.utils.upload_queue import upload_queue
 
 # Forward references
 if typing.TYPE_CHECKING:
@@ -26,6 +27,13 @@ class UploadPreview(CommandBase):
             "type": bool,
             "value": True,
         },
+        "background": {
+            "label": "Upload in the background",
+            "type": bool,
+            "value": False,
+            "tooltip": "Queue the preview, the upload is retried until it succeeds",
+            "hide": True,
+        },
     }
 
     required_metadata: List[str] = ["task_id"]
@@ -50,8 +58,14 @@ class UploadPreview(CommandBase):
                 )
             )
 
+        task_id = action_query.context_metadata["task_id"]
+        if parameters["background"]:
+            upload_queue.enqueue(task_id, parameters["preview_path"])
+            logger.info("Preview %s queued for upload", parameters["preview_path"])
+            return
+
         # Get current task
-        task = await gazu.task.get_task(action_query.context_metadata["task_id"])
+        task = await gazu.task.get_task(task_id)
 
         # Add an empty comment
         comment = await gazu.task.add_comment(task, task["task_status_id"])
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing
+from typing import Any, Dict, List
+
+from silex_client.action.command_base import CommandBase
+from silex_client.utils.parameter_types import ListParameterMeta
+from silex_maya.utils.manifest import find_manifest, verify_manifest
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+
+class VerifyManifest(CommandBase):
+    """
+    Check the published files against the manifest written by their publish
+    """
+
+    parameters = {
+        "file_paths": {
+            "label": "Files to verify",
+            "type": ListParameterMeta(str),
+            "value": [],
+            "hide": True,
+        },
+        "max_workers": {
+            "label": "Parallel workers",
+            "type": int,
+            "value": 8,
+            "hide": True,
+        },
+    }
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        file_paths: List[str] = parameters["file_paths"] or []
+        max_workers: int = parameters["max_workers"]
+
+        # The hashing is blocking, it is executed outside of the event loop
+        loop = asyncio.get_running_loop()
+        invalid_files: List[str] = []
+        verified_roots = set()
+        for file_path in file_paths:
+            manifest = await loop.run_in_executor(None, find_manifest, file_path)
+            if manifest is None:
+                logger.info("No manifest found for %s, it is not verified", file_path)
+                continue
+            if manifest["root"] in verified_roots:
+                continue
+            verified_roots.add(manifest["root"])
+
+            invalid = await loop.run_in_executor(
+                None, verify_manifest, manifest, max_workers
+            )
+            logger.info(
+                "Verified %s files of %s", len(manifest["files"]), manifest["root"]
+            )
+            invalid_files.extend(f"{manifest['root']}/{name}" for name in invalid)
+
+        if invalid_files:
+            raise Exception(
+                "The published files are missing or corrupted: "
+                + ", ".join(invalid_files)
+            )
+
+        return file_paths
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import pathlib
+import typing
+from typing import Any, Dict
+
+from silex_client.action.command_base import CommandBase
+from silex_maya.utils.manifest import (
+    build_manifest,
+    get_changed_files,
+    get_manifest_path,
+    get_previous_manifest,
+    write_manifest,
+)
+
+# Forward references
+if typing.TYPE_CHECKING:
+    from silex_client.action.action_query import ActionQuery
+
+
+class WriteManifest(CommandBase):
+    """
+    Record the size and the hash of every published file in a manifest
+    """
+
+    parameters = {
+        "directory": {
+            "label": "Published directory",
+            "type": pathlib.Path,
+            "value": None,
+            "hide": True,
+        },
+        "max_workers": {
+            "label": "Parallel workers",
+            "type": int,
+            "value": 8,
+            "hide": True,
+        },
+    }
+
+    @CommandBase.conform_command()
+    async def __call__(
+        self,
+        parameters: Dict[str, Any],
+        action_query: ActionQuery,
+        logger: logging.Logger,
+    ):
+        directory: pathlib.Path = parameters["directory"]
+        max_workers: int = parameters["max_workers"]
+        manifest_path = get_manifest_path(directory)
+
+        # The hashing is blocking, it is executed outside of the event loop
+        loop = asyncio.get_running_loop()
+        manifest = await loop.run_in_executor(
+            None, build_manifest, directory, max_workers
+        )
+
+        # The files are compared with the previous version of the publish
+        previous_manifest = await loop.run_in_executor(
+            None, get_previous_manifest, directory
+        )
+        changed_files = get_changed_files(previous_manifest, manifest)
+        await loop.run_in_executor(None, write_manifest, manifest, manifest_path)
+        logger.info(
+            "Manifest of %s files written to %s, %s changed since the last version",
+            len(manifest["files"]),
+            manifest_path,
+            len(changed_files),
+        )
+
+        return {"manifest": manifest_path, "changed_files": changed_files}
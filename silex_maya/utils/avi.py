@@ -0,0 +1,229 @@
+"""
+Minimal Motion-JPEG AVI writer, the frames are the jpeg files written by maya
+so no encoder is required
+"""
+
+import pathlib
+import queue
+import struct
+import threading
+import time
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+AVIF_HASINDEX = 0x10
+AVIIF_KEYFRAME = 0x10
+# Markers of the jpeg start of frame segments, that contain the image size
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def get_jpeg_size(data: bytes) -> Tuple[int, int]:
+    """
+    Read the width and the height of a jpeg image from its start of frame segment
+    """
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            position += 1
+            continue
+        marker = data[position + 1]
+        # Markers without payload
+        if marker == 0xFF or 0xD0 <= marker <= 0xD9 or marker == 0x01:
+            position += 2
+            continue
+        length = struct.unpack(">H", data[position + 2 : position + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[position + 5 : position + 9])
+            return width, height
+        position += 2 + length
+    raise ValueError("The image is not a valid jpeg")
+
+
+class MjpegAviWriter:
+    """
+    Write the jpeg frames one after the other, the headers are completed on close
+    """
+
+    def __init__(self, file_path: Union[str, pathlib.Path], fps: int = 24):
+        self.file_path = pathlib.Path(file_path)
+        self.fps = fps
+        self.file: Optional[BinaryIO] = None
+        self.size: Optional[Tuple[int, int]] = None
+        self.index: List[Tuple[int, int]] = []
+        self.max_frame_size = 0
+        self.movi_position = 0
+
+    def _build_headers(self) -> bytes:
+        width, height = self.size or (0, 0)
+        frame_count = len(self.index)
+        microseconds = int(1000000 / self.fps)
+
+        avih = struct.pack(
+            "<14I",
+            microseconds,
+            self.max_frame_size * self.fps,
+            0,
+            AVIF_HASINDEX,
+            frame_count,
+            0,
+            1,
+            self.max_frame_size,
+            width,
+            height,
+            0,
+            0,
+            0,
+            0,
+        )
+        strh = (
+            b"vids"
+            + b"MJPG"
+            + struct.pack(
+                "<IHHIIIIIIII",
+                0,
+                0,
+                0,
+                0,
+                1,
+                self.fps,
+                0,
+                frame_count,
+                self.max_frame_size,
+                0xFFFFFFFF,
+                0,
+            )
+            + struct.pack("<4h", 0, 0, width, height)
+        )
+        # BITMAPINFOHEADER of a 24 bits motion jpeg stream
+        strf = struct.pack(
+            "<IiiHH4sIiiII",
+            40,
+            width,
+            height,
+            1,
+            24,
+            b"MJPG",
+            width * height * 3,
+            0,
+            0,
+            0,
+            0,
+        )
+        strl = b"strl" + self._chunk(b"strh", strh) + self._chunk(b"strf", strf)
+        hdrl = b"hdrl" + self._chunk(b"avih", avih) + self._chunk(b"LIST", strl)
+        return self._chunk(b"LIST", hdrl)
+
+    @staticmethod
+    def _chunk(fourcc: bytes, data: bytes) -> bytes:
+        padding = b"\0" if len(data) % 2 else b""
+        return fourcc + struct.pack("<I", len(data)) + data + padding
+
+    def open(self):
+        self.file = open(self.file_path, "wb")
+        # The headers have a fixed size, they are rewritten with the final values
+        headers = self._build_headers()
+        self.file.write(b"RIFF" + struct.pack("<I", 0) + b"AVI ")
+        self.file.write(headers)
+        self.file.write(b"LIST" + struct.pack("<I", 0))
+        self.movi_position = self.file.tell()
+        self.file.write(b"movi")
+
+    def add_frame(self, data: bytes):
+        if self.file is None:
+            self.open()
+        if self.size is None:
+            self.size = get_jpeg_size(data)
+
+        assert self.file is not None
+        offset = self.file.tell() - self.movi_position
+        self.file.write(self._chunk(b"00dc", data))
+        self.index.append((offset, len(data)))
+        self.max_frame_size = max(self.max_frame_size, len(data))
+
+    def close(self):
+        if self.file is None:
+            self.open()
+        assert self.file is not None
+
+        movi_end = self.file.tell()
+        index = b"".join(
+            b"00dc" + struct.pack("<III", AVIIF_KEYFRAME, offset, size)
+            for offset, size in self.index
+        )
+        self.file.write(self._chunk(b"idx1", index))
+        file_end = self.file.tell()
+
+        # Complete the sizes now that all the frames are written
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", file_end - 8))
+        self.file.write(b"AVI ")
+        self.file.write(self._build_headers())
+        self.file.seek(self.movi_position - 4)
+        self.file.write(struct.pack("<I", movi_end - self.movi_position))
+        self.file.close()
+        self.file = None
+
+    def __enter__(self) -> "MjpegAviWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class BackgroundEncoder(threading.Thread):
+    """
+    Append the captured frames to a movie in a background thread,
+    so the encoding overlaps with the capture of the next frames
+    """
+
+    def __init__(self, file_path: Union[str, pathlib.Path], fps: int = 24):
+        super().__init__(name="silex-avi-encoder", daemon=True)
+        self.writer = MjpegAviWriter(file_path, fps)
+        self.frames: "queue.Queue[Optional[pathlib.Path]]" = queue.Queue()
+        self.encode_time = 0.0
+        self.frame_count = 0
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+
+    def add(self, frame_path: Union[str, pathlib.Path]):
+        self.frames.put(pathlib.Path(frame_path))
+
+    def run(self):
+        while True:
+            frame_path = self.frames.get()
+            if frame_path is None:
+                break
+            if self.error is not None or self.cancelled:
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.writer.add_frame(frame_path.read_bytes())
+                frame_path.unlink()
+                self.frame_count += 1
+            except Exception as exception:
+                self.error = exception
+            self.encode_time += time.perf_counter() - start
+
+        if self.error is None and not self.cancelled:
+            self.writer.close()
+        elif self.writer.file is not None:
+            # The incomplete movie is not finalized, only its file is released
+            self.writer.file.close()
+            self.writer.file = None
+
+    def finish(self):
+        """
+        Wait for the queued frames to be encoded, and raise the encoding error
+        """
+        self.frames.put(None)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self):
+        """
+        Stop the encoding, the frames still queued are dropped
+        """
+        self.cancelled = True
+        self.frames.put(None)
+        self.join()
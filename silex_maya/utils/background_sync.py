@@ -0,0 +1,416 @@
+import logging
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from maya import cmds, utils
+from maya.api import OpenMaya
+
+from silex_maya.utils.files import copy_to_temp
+
+BACKGROUND_SAVE_DIRECTORY = (
+    pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "background_save"
+)
+# Delay before retrying a failed sync, doubled after each failure
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+QUERY_FLAG = re.compile(r"\s-q(uery)?\b")
+
+logger = logging.getLogger(__name__)
+
+
+def show_status(message: str, error: bool = False):
+    """
+    Display the sync status in the viewport, from any thread
+    """
+    color = "#FF6060" if error else "#80C0FF"
+    utils.executeDeferred(
+        lambda: cmds.inViewMessage(
+            assistMessage=f"<span style='color:{color}'>{message}</span>",
+            position="topCenter",
+            fade=True,
+            fadeStayTime=4000 if error else 1500,
+        )
+    )
+
+
+class BackgroundSync:
+    """
+    Copy the scenes saved on the local disk to their work paths in a background
+    thread, so the artist does not wait for the network.
+    When a scene is saved again before its sync started, only the latest
+    version is copied. A failed sync is kept and retried later
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path = BACKGROUND_SAVE_DIRECTORY,
+        on_status: Callable[..., None] = show_status,
+    ):
+        self.directory = directory
+        self.on_status = on_status
+
+        self.condition = threading.Condition()
+        # Latest local copy to sync for each group of destinations
+        self.pending: Dict[Tuple[str, ...], pathlib.Path] = {}
+        self.callbacks: Dict[Tuple[str, ...], Callable[[], None]] = {}
+        self.failures: Dict[Tuple[str, ...], int] = {}
+        self.retry_at: Dict[Tuple[str, ...], float] = {}
+        self.in_progress: Optional[Tuple[str, ...]] = None
+        # The in progress sync must not replace a scene saved in the foreground
+        self.cancelled: Set[Tuple[str, ...]] = set()
+        self.thread: Optional[threading.Thread] = None
+        self.last_error: Optional[Exception] = None
+
+    def get_local_path(self, file_name: str) -> pathlib.Path:
+        """
+        Get a new local path, a save never overwrites a file being synced
+        """
+        local_directory = self.directory / str(os.getpid()) / uuid.uuid4().hex
+        os.makedirs(local_directory, exist_ok=True)
+        return local_directory / file_name
+
+    def is_syncing(self) -> bool:
+        with self.condition:
+            return bool(self.pending) or self.in_progress is not None
+
+    def is_stalled(self) -> bool:
+        """
+        Check if all the remaining scenes are waiting for a retry
+        """
+        with self.condition:
+            return self.in_progress is None and all(
+                key in self.failures for key in self.pending
+            )
+
+    def get_unsynced(self) -> List[Tuple[Tuple[str, ...], pathlib.Path]]:
+        with self.condition:
+            return list(self.pending.items())
+
+    def submit(
+        self,
+        local_path: pathlib.Path,
+        destinations: List[str],
+        on_synced: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Queue the copy of the local file to all its destinations,
+        on_synced is called from the sync thread once they are all written
+        """
+        key = tuple(destinations)
+        with self.condition:
+            outdated = self.pending.get(key)
+            self.pending[key] = local_path
+            self.callbacks.pop(key, None)
+            if on_synced is not None:
+                self.callbacks[key] = on_synced
+            # A new save is synced right away, even after a failure
+            self.retry_at.pop(key, None)
+            self.condition.notify_all()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name="silex-background-save", daemon=True
+                )
+                self.thread.start()
+
+        if outdated is not None:
+            self._remove_local(outdated)
+        self.on_status(f"Saved locally, syncing {os.path.basename(key[0])}...")
+
+    def discard(self, destination: str):
+        """
+        Drop the syncs to a destination that is about to be saved in the foreground,
+        they would overwrite it with an older scene. The sync in progress is
+        cancelled, once this returns it never writes to its destinations
+        """
+        destination = os.path.normpath(destination)
+
+        def is_discarded(key: Tuple[str, ...]) -> bool:
+            return destination in [os.path.normpath(path) for path in key]
+
+        with self.condition:
+            keys = [key for key in self.pending if is_discarded(key)]
+            local_paths = [self.pending.pop(key) for key in keys]
+            for key in keys:
+                self.callbacks.pop(key, None)
+                self.failures.pop(key, None)
+                self.retry_at.pop(key, None)
+            if self.in_progress is not None and is_discarded(self.in_progress):
+                self.cancelled.add(self.in_progress)
+            self.condition.notify_all()
+
+        for local_path in local_paths:
+            logger.info("Discarded the background sync of %s", local_path)
+            self._remove_local(local_path)
+
+    @staticmethod
+    def _remove_local(local_path: pathlib.Path):
+        shutil.rmtree(local_path.parent, ignore_errors=True)
+
+    def _sync(self, local_path: pathlib.Path, destinations: Tuple[str, ...]) -> bool:
+        """
+        Copy the local file to the destinations, return False if it was cancelled
+        """
+        start = time.perf_counter()
+        # The destinations must not share their content with each other
+        for destination in destinations:
+            temp_path, _ = copy_to_temp(local_path, destination, link=False)
+            # The rename can not happen after a discard of the destination
+            with self.condition:
+                if destinations in self.cancelled:
+                    os.remove(temp_path)
+                    logger.info("Cancelled the background sync of %s", local_path)
+                    return False
+                try:
+                    os.replace(temp_path, destination)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+        logger.info(
+            "Synced %s to %s in %.2fs",
+            local_path,
+            ", ".join(destinations),
+            time.perf_counter() - start,
+        )
+        return True
+
+    def _next(self) -> Optional[Tuple[Tuple[str, ...], pathlib.Path]]:
+        # Must be called with the condition acquired
+        while self.pending:
+            now = time.monotonic()
+            retry_at = {key: self.retry_at.get(key, 0) for key in self.pending}
+            ready = [key for key, at in retry_at.items() if at <= now]
+            if ready:
+                self.retry_at.pop(ready[0], None)
+                return ready[0], self.pending.pop(ready[0])
+            self.condition.wait(min(retry_at.values()) - now)
+        return None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                item = self._next()
+                if item is None:
+                    self.thread = None
+                    self.condition.notify_all()
+                    return
+                key, local_path = item
+                on_synced = self.callbacks.pop(key, None)
+                self.in_progress = key
+
+            try:
+                synced = self._sync(local_path, key)
+            except Exception as exception:
+                self.last_error = exception
+                with self.condition:
+                    failures = self.failures.get(key, 0) + 1
+                    self.failures[key] = failures
+                    # A newer save of the scene replaces the failed one
+                    outdated = key in self.pending or key in self.cancelled
+                    if not outdated:
+                        self.pending[key] = local_path
+                        if on_synced is not None:
+                            self.callbacks[key] = on_synced
+                        delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                        self.retry_at[key] = time.monotonic() + delay
+
+                if outdated:
+                    self._remove_local(local_path)
+                    continue
+                # The local copy is kept, so the scene is never lost
+                logger.error(
+                    "Could not sync %s, retrying in %.0fs, the scene is kept at %s: %s",
+                    key[0],
+                    delay,
+                    local_path,
+                    exception,
+                )
+                self.on_status(
+                    f"Sync of {os.path.basename(key[0])} failed, retrying", True
+                )
+            else:
+                self._remove_local(local_path)
+                # A cancelled sync was replaced by a foreground save
+                if not synced:
+                    continue
+                with self.condition:
+                    self.failures.pop(key, None)
+                    all_synced = not self.pending
+                if on_synced is not None:
+                    on_synced()
+                if all_synced:
+                    self.on_status(f"{os.path.basename(key[0])} synced")
+            finally:
+                with self.condition:
+                    self.in_progress = None
+                    self.cancelled.discard(key)
+                    self.condition.notify_all()
+
+    def sync_now(self) -> List[pathlib.Path]:
+        """
+        Sync the pending scenes in the calling thread, without waiting for the
+        retries. Return the local copies that could not be synced
+        """
+        with self.condition:
+            items = list(self.pending.items())
+            self.pending.clear()
+            self.callbacks.clear()
+            self.retry_at.clear()
+
+        failed = []
+        for key, local_path in items:
+            try:
+                synced = self._sync(local_path, key)
+            except Exception as exception:
+                logger.error("Could not sync %s: %s", key[0], exception)
+                failed.append(local_path)
+            else:
+                self._remove_local(local_path)
+                with self.condition:
+                    self.failures.pop(key, None)
+        return failed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all the syncs to complete, return False on timeout
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: not self.pending and self.in_progress is None, timeout
+            )
+
+    def block_until_synced(self):
+        """
+        Keep maya open with a progress window until all the scenes are synced,
+        the scenes that could not be synced are reported with a foreground save.
+
+        This runs while maya quits, it can not cancel the quit. The scenes stay
+        modified until they are synced, the save changes prompt of maya is the
+        confirmation that can cancel it
+        """
+        if not self.is_syncing():
+            return
+
+        cmds.progressWindow(
+            title="Silex background save",
+            status="Syncing the saved scenes to the network...",
+            isInterruptable=True,
+        )
+        try:
+            while not self.wait(0.2):
+                # Waiting for the retries would block maya for minutes
+                if self.is_stalled():
+                    break
+                if cmds.progressWindow(query=True, isCancelled=True):
+                    break
+        finally:
+            cmds.progressWindow(endProgress=True)
+
+        unsynced = self.get_unsynced()
+        if unsynced:
+            self.report_unsynced(unsynced)
+
+    def report_unsynced(self, unsynced: List[Tuple[Tuple[str, ...], pathlib.Path]]):
+        scene_names = "\n".join(key[0] for key, _ in unsynced)
+        answer = cmds.confirmDialog(
+            title="Silex background save",
+            message=f"These scenes are not synced to the network:\n{scene_names}",
+            button=["Save now", "Quit"],
+            defaultButton="Save now",
+            cancelButton="Quit",
+            dismissString="Quit",
+        )
+        if answer == "Save now":
+            failed = self.sync_now()
+        else:
+            failed = [local_path for _, local_path in unsynced]
+        if not failed:
+            return
+
+        local_paths = "\n".join(local_path.as_posix() for local_path in failed)
+        logger.warning("The unsynced scenes are kept in %s", local_paths)
+        cmds.confirmDialog(
+            title="Silex background save",
+            message=f"The unsynced scenes are kept at:\n{local_paths}",
+            button=["Ok"],
+        )
+
+
+class EditWatcher:
+    """
+    Count the commands that can edit the scene, so a background save only
+    marks the scene as saved if it was not edited before the end of the sync.
+    The foreground saves discard the syncs of the scene before writing it
+    """
+
+    def __init__(self, sync: BackgroundSync):
+        self.sync = sync
+        self.revision = 0
+        self.callback_ids: List[int] = []
+
+    def _on_command(self, command: str, *args):
+        if not QUERY_FLAG.search(command):
+            self.revision += 1
+
+    def _on_before_save(self, file_object: OpenMaya.MFileObject, *args) -> bool:
+        # The local saves are never a destination of a sync
+        self.sync.discard(file_object.resolvedFullName())
+        return True
+
+    def install(self):
+        """
+        Register the callbacks, must be executed in the main thread
+        """
+        if self.callback_ids:
+            return
+        self.callback_ids.append(
+            OpenMaya.MCommandMessage.addCommandCallback(self._on_command)
+        )
+        self.callback_ids.append(
+            OpenMaya.MSceneMessage.addCheckFileCallback(
+                OpenMaya.MSceneMessage.kBeforeSaveCheck, self._on_before_save
+            )
+        )
+
+
+background_sync = BackgroundSync()
+edit_watcher = EditWatcher(background_sync)
+
+
+def save_in_background(file_paths: List[str], file_type: str = "mayaAscii"):
+    """
+    Save the scene on the local disk and sync it to the file paths later.
+    The scene stays modified until it is synced. Must be called from the main thread
+    """
+    edit_watcher.install()
+    local_path = background_sync.get_local_path(os.path.basename(file_paths[0]))
+    cmds.file(rename=local_path.as_posix())
+    try:
+        cmds.file(save=True, type=file_type)
+    except Exception:
+        background_sync._remove_local(local_path)
+        raise
+    finally:
+        cmds.file(rename=file_paths[0])
+
+    # Quitting or opening an other scene must still ask for a save
+    cmds.file(modified=True)
+    state = [edit_watcher.revision, cmds.undoInfo(query=True, undoName=True)]
+
+    def clear_modified():
+        scene_path = cmds.file(query=True, sceneName=True)
+        if os.path.normpath(scene_path) != os.path.normpath(file_paths[0]):
+            return
+        undo_name = cmds.undoInfo(query=True, undoName=True)
+        if [edit_watcher.revision, undo_name] == state:
+            cmds.file(modified=False)
+
+    background_sync.submit(
+        local_path, file_paths, lambda: utils.executeDeferred(clear_modified)
+    )
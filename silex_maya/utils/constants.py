@@ -1,8 +1,14 @@
 import re
 
-# Regex used to expand and capture syntaxes for sequences like #### or <UDIM> ...
-MATCH_FILE_SEQUENCE = [
-    re.compile(r"^.+\W(\<.+\>)\W.+$"),  # Matches V-ray's <Whatever> syntax
-    re.compile(r"^.+[^\w#](#+)\W.+$"),  # Matches V-ray's ####  syntax
-    re.compile(r"^.+(\<.+\>)[\W_].+$"),  # Matches unique case for macula 
-]
+# Regex used to tokenize the syntaxes for sequences like #### or <UDIM> ...
+MATCH_PATH_TOKEN = re.compile(
+    r"(?P<udim><udim>)"  # Maya, V-ray and Arnold's udim syntax
+    r"|(?P<separated_uvtile><uvtile>|<tile>)"  # V-ray and Arnold's _u1_v1 syntaxes
+    r"|(?P<uvtile>u<u>_v<v>)"  # Maya's u1_v1 syntax
+    r"|<frame(?P<frame_padding>\d*)>"  # V-ray's <frame> and <frame04> syntax
+    r"|<f(?P<f_padding>\d*)>"  # Maya and Arnold's <f> and <f4> syntax
+    r"|(?P<hashes>#+)"  # #### syntax
+    r"|%(?P<printf_padding>0\d+)?d",  # %04d syntax
+    re.IGNORECASE,
+)
+
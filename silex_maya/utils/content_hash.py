@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+CHUNK_SIZE = 4 * 1024 * 1024
+HASH_CACHE_PATH = (
+    pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "content_hashes.json"
+)
+# Number of files kept in the cache, the least recently used are dropped
+MAX_CACHED_HASHES = 200000
+
+
+def hash_file(file_path: Union[str, pathlib.Path]) -> str:
+    """
+    Compute the hash of the file's content, reading it chunk by chunk
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    Cache of the file hashes, keyed by path. The size and modification time
+    are stored with the hash, so a modified file is always hashed again
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[pathlib.Path] = HASH_CACHE_PATH,
+        max_entries: int = MAX_CACHED_HASHES,
+    ):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        # Path -> [size, mtime, hash], ordered from the least recently used
+        self.hashes: Dict[str, List[Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.modified = False
+
+    def load(self):
+        with self.lock:
+            if self.loaded or self.cache_path is None:
+                return
+            self.loaded = True
+            try:
+                with open(self.cache_path, "r") as cache:
+                    hashes = json.load(cache)
+            except (OSError, ValueError):
+                return
+            if not isinstance(hashes, dict):
+                return
+            for path, entry in hashes.items():
+                if isinstance(entry, list) and len(entry) == 3:
+                    self.hashes[path] = entry
+
+    def save(self):
+        """
+        Write the cache if new hashes were computed since the last save
+        """
+        if self.cache_path is None:
+            return
+        with self.lock:
+            if not self.modified:
+                return
+            self.modified = False
+            while len(self.hashes) > self.max_entries:
+                self.hashes.popitem(last=False)
+            hashes = dict(self.hashes)
+        # Write in a temporary file first, the cache can be shared by multiple processes
+        os.makedirs(self.cache_path.parent, exist_ok=True)
+        temp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w") as cache:
+            json.dump(hashes, cache)
+        os.replace(temp_path, self.cache_path)
+
+    def get_hash(self, file_path: Union[str, pathlib.Path]) -> str:
+        path = os.path.realpath(file_path)
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.hashes.get(path)
+            if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                self.hashes.move_to_end(path)
+                return entry[2]
+
+        file_hash = hash_file(path)
+        with self.lock:
+            # The entry of the previous content of the file is replaced
+            self.hashes.pop(path, None)
+            self.hashes[path] = [stat.st_size, stat.st_mtime_ns, file_hash]
+            self.modified = True
+        return file_hash
+
+    def hash_files(
+        self, file_paths: Iterable[Union[str, pathlib.Path]], max_workers: int = 8
+    ) -> Dict[str, str]:
+        """
+        Hash the given files in parallel, the cached hashes are reused.
+        The cache is written once for the whole batch
+        """
+        self.load()
+        file_paths = list(dict.fromkeys(str(file_path) for file_path in file_paths))
+        with ThreadPoolExecutor(max_workers) as executor:
+            hashes = dict(zip(file_paths, executor.map(self.get_hash, file_paths)))
+        self.save()
+        return hashes
+
+
+hash_cache = HashCache()
+
+
+def find_duplicates(
+    groups: Sequence[Sequence[Union[str, pathlib.Path]]],
+    max_workers: int = 8,
+    keys: Optional[Sequence[Hashable]] = None,
+) -> List[int]:
+    """
+    Find the groups of files that have the same content as a previous group
+    The files of a group must be sorted, like the frames of a sequence.
+    The groups with different keys, like their frames, are never identical.
+    Return for each group the index of the first group that is identical
+    """
+    # Only the groups that have the same number of files and the same sizes
+    # can be identical, the others don't need to be hashed
+    by_length: Dict[Tuple[Hashable, int], List[int]] = defaultdict(list)
+    for index, group in enumerate(groups):
+        key = keys[index] if keys is not None else None
+        by_length[(key, len(group))].append(index)
+
+    by_sizes: Dict[Tuple[Hashable, Tuple[int, ...]], List[int]] = defaultdict(list)
+    for (key, _), indices in by_length.items():
+        if len(indices) < 2:
+            continue
+        for index in indices:
+            sizes = tuple(os.path.getsize(file_path) for file_path in groups[index])
+            by_sizes[(key, sizes)].append(index)
+
+    duplicates = list(range(len(groups)))
+    candidates = [
+        index for indices in by_sizes.values() if len(indices) > 1 for index in indices
+    ]
+    if not candidates:
+        return duplicates
+
+    hashes = hash_cache.hash_files(
+        [file_path for index in candidates for file_path in groups[index]], max_workers
+    )
+    first_groups: Dict[Tuple[Hashable, Tuple[str, ...]], int] = {}
+    for index in sorted(candidates):
+        signature = (
+            keys[index] if keys is not None else None,
+            tuple(hashes[str(file_path)] for file_path in groups[index]),
+        )
+        duplicates[index] = first_groups.setdefault(signature, index)
+
+    return duplicates
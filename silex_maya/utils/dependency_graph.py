@@ -0,0 +1,385 @@
+import json
+import logging
+import os
+import pathlib
+import re
+import shutil
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from silex_maya.utils.content_hash import find_duplicates
+from silex_maya.utils.files import link_or_copy
+from silex_maya.utils.maya_ascii import parse_dependencies, rewrite_file_paths
+from silex_maya.utils.processes import create_process_pool
+from silex_maya.utils.sequences import find_reference_sequences, get_frames_key
+
+# Only the maya ascii scenes can be parsed, the other files are leaves of the graph
+SCENE_EXTENSIONS = [".ma"]
+# Their dependencies cannot be found without maya, they would be bundled incomplete
+BINARY_SCENE_EXTENSIONS = [".mb"]
+# Maya appends a copy number to the path of a scene that is referenced several times
+MATCH_COPY_NUMBER = re.compile(r"\{\d+\}$")
+
+
+def get_path_key(file_path: Union[str, pathlib.Path]) -> str:
+    """
+    Build a key that is the same for every path that leads to the same file
+    """
+    return os.path.normcase(os.path.realpath(os.path.expandvars(str(file_path))))
+
+
+def find_scene_dependencies(scene_path: str) -> Dict[str, List[str]]:
+    """
+    Find the files used by a maya ascii scene, by the path written in the scene.
+    This function is executed in the worker processes
+    """
+    dependencies = parse_dependencies(scene_path)
+    scene_directory = os.path.dirname(scene_path)
+    file_paths: Dict[str, List[str]] = {}
+
+    written_paths = [path for _, path in dependencies.references]
+    written_paths += [path for _, path in dependencies.attributes]
+    sequence_paths = {
+        path
+        for attribute, path in dependencies.attributes
+        if attribute in dependencies.sequence_attributes
+    }
+
+    for written_path in written_paths:
+        if written_path in file_paths:
+            continue
+
+        # The relative paths are resolved from the scene's directory
+        resolved_path = MATCH_COPY_NUMBER.sub("", written_path)
+        path = pathlib.Path(os.path.expandvars(resolved_path))
+        if not path.is_absolute():
+            path = pathlib.Path(scene_directory) / path
+
+        if written_path in sequence_paths:
+            sequence = [
+                str(frame)
+                for frame_sequence in find_reference_sequences(path)
+                for frame in frame_sequence
+            ]
+        else:
+            sequence = [str(path)]
+        file_paths[written_path] = [
+            frame for frame in sequence if os.path.isfile(frame)
+        ]
+
+    return file_paths
+
+
+class DependencyNode:
+    """
+    Scene or file of the dependency graph
+    """
+
+    def __init__(self, path: str, is_scene: bool):
+        self.path = path
+        self.is_scene = is_scene
+        self.destination: Optional[str] = None
+        # Key of the node that has the same content
+        self.duplicate_of: Optional[str] = None
+        # The paths as written in the scene, with the keys of the nodes they point to
+        self.references: Dict[str, List[str]] = {}
+
+        # Used to tell if the file changed since the previous bundle
+        try:
+            stat = os.stat(path)
+            self.signature: Optional[List[int]] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            self.signature = None
+
+    @property
+    def dependencies(self) -> Set[str]:
+        return {key for keys in self.references.values() for key in keys}
+
+
+class DependencyGraph:
+    """
+    Graph of the scenes and the files they depend on, de-duplicated by resolved path
+    """
+
+    def __init__(self, root: Union[str, pathlib.Path]):
+        self.root = get_path_key(root)
+        self.nodes: Dict[str, DependencyNode] = {}
+        # The files referenced by a path, with the path that references the same content
+        self.canonical_references: Dict[
+            Tuple[str, ...], Tuple[Tuple[str, ...], str]
+        ] = {}
+
+    def add_node(self, file_path: Union[str, pathlib.Path]) -> DependencyNode:
+        key = get_path_key(file_path)
+        if key not in self.nodes:
+            path = os.path.realpath(os.path.expandvars(str(file_path)))
+            is_scene = os.path.splitext(path)[1] in SCENE_EXTENSIONS
+            self.nodes[key] = DependencyNode(path, is_scene)
+        return self.nodes[key]
+
+    @classmethod
+    def build(
+        cls, root: Union[str, pathlib.Path], executor: Executor
+    ) -> "DependencyGraph":
+        """
+        Parse the scenes level by level, the scenes of a level are parsed in parallel
+        """
+        graph = cls(root)
+        graph.add_node(root)
+        pending = [graph.root]
+
+        while pending:
+            futures = {
+                executor.submit(find_scene_dependencies, graph.nodes[key].path): key
+                for key in pending
+            }
+            pending = []
+            for future in as_completed(futures):
+                scene = graph.nodes[futures[future]]
+                for written_path, file_paths in future.result().items():
+                    keys = []
+                    for file_path in file_paths:
+                        key = get_path_key(file_path)
+                        if key not in graph.nodes:
+                            if graph.add_node(file_path).is_scene:
+                                pending.append(key)
+                        keys.append(key)
+                    scene.references[written_path] = keys
+
+        return graph
+
+    def deduplicate(self, max_workers: int = 8) -> int:
+        """
+        Find the files and the referenced sequences that have the same content,
+        return the amount of duplicated files
+        """
+        file_keys = sorted(key for key, node in self.nodes.items() if not node.is_scene)
+        duplicates = find_duplicates(
+            [[self.nodes[key].path] for key in file_keys], max_workers
+        )
+        for index, key in enumerate(file_keys):
+            if duplicates[index] != index:
+                self.nodes[key].duplicate_of = file_keys[duplicates[index]]
+
+        # A path that references the same content as an other one can be repathed to it
+        references: Dict[Tuple[str, ...], str] = {}
+        for node in self.nodes.values():
+            for written_path, keys in node.references.items():
+                if keys and not any(self.nodes[key].is_scene for key in keys):
+                    references.setdefault(tuple(sorted(keys)), written_path)
+
+        groups = list(references.items())
+        file_groups = [[self.nodes[key].path for key in keys] for keys, _ in groups]
+        # The written path keeps its tokens, the frames and tiles must be the same
+        duplicates = find_duplicates(
+            file_groups,
+            max_workers,
+            [get_frames_key(file_paths) for file_paths in file_groups],
+        )
+        for index, (keys, _) in enumerate(groups):
+            self.canonical_references[keys] = groups[duplicates[index]]
+
+        return sum(node.duplicate_of is not None for node in self.nodes.values())
+
+    def get_levels(self) -> List[List[DependencyNode]]:
+        """
+        Group the nodes by height, the leaves are first
+        """
+        heights: Dict[str, int] = {}
+
+        def get_height(key: str, visiting: Set[str]) -> int:
+            if key in heights:
+                return heights[key]
+            # Guard against the scenes that reference each other
+            if key in visiting:
+                return 0
+            visiting.add(key)
+            dependencies = self.nodes[key].dependencies
+            height = 1 + max(
+                (get_height(dependency, visiting) for dependency in dependencies),
+                default=-1,
+            )
+            visiting.discard(key)
+            heights[key] = height
+            return height
+
+        levels: List[List[DependencyNode]] = []
+        for key in self.nodes:
+            height = get_height(key, set())
+            while len(levels) <= height:
+                levels.append([])
+            levels[height].append(self.nodes[key])
+
+        return levels
+
+    def set_destinations(self, destination: Union[str, pathlib.Path]):
+        """
+        Place the root scene at the given destination and every dependencies
+        in a directory next to it. The files of the same directory stay together
+        so the sequences and the udims keep their names
+        """
+        destination = pathlib.Path(destination)
+        dependencies_directory = (
+            destination.parent / f"{destination.stem}_dependencies"
+        )
+        directories: Dict[str, pathlib.Path] = {}
+
+        for key, node in self.nodes.items():
+            if key == self.root:
+                node.destination = str(destination)
+                continue
+
+            source_directory = os.path.dirname(node.path)
+            if source_directory not in directories:
+                name = os.path.basename(source_directory) or "root"
+                directory = dependencies_directory / name
+                index = 1
+                while directory in directories.values():
+                    directory = dependencies_directory / f"{name}_{index}"
+                    index += 1
+                directories[source_directory] = directory
+
+            file_name = os.path.basename(node.path)
+            node.destination = str(directories[source_directory] / file_name)
+
+    def get_new_paths(self, scene: DependencyNode) -> Dict[str, str]:
+        """
+        Get the new value of the paths written in the scene
+        """
+        new_paths: Dict[str, str] = {}
+        for written_path, keys in scene.references.items():
+            # The unreachable files are kept as they are
+            if not keys:
+                continue
+            # Point to the first path that references the same content
+            keys, canonical_path = self.canonical_references.get(
+                tuple(sorted(keys)), (tuple(keys), written_path)
+            )
+            if self.nodes[keys[0]].destination is None:
+                continue
+            # Keep the file name as written, to preserve the tokens like <UDIM> or ####
+            directory = os.path.dirname(str(self.nodes[keys[0]].destination))
+            file_name = pathlib.PurePath(canonical_path.replace("\\", "/")).name
+            new_paths[written_path] = pathlib.Path(directory, file_name).as_posix()
+
+        return new_paths
+
+    def to_manifest(self) -> dict:
+        return {
+            "root": self.root,
+            "nodes": {
+                key: {
+                    "source": node.path,
+                    "destination": node.destination,
+                    "scene": node.is_scene,
+                    "duplicate_of": node.duplicate_of,
+                    "references": node.references,
+                    "signature": node.signature,
+                }
+                for key, node in self.nodes.items()
+            },
+        }
+
+    def write_manifest(self, file_path: Union[str, pathlib.Path]):
+        with open(file_path, "w") as manifest:
+            json.dump(self.to_manifest(), manifest, indent=4)
+
+    def get_unchanged_nodes(self, manifest_path: Union[str, pathlib.Path]) -> Set[str]:
+        """
+        Compare with the manifest of a previous bundle to find the files
+        that were already copied and did not change since
+        """
+        try:
+            with open(manifest_path, "r") as manifest:
+                previous_nodes = json.load(manifest).get("nodes", {})
+        except (OSError, ValueError):
+            return set()
+
+        unchanged_nodes: Set[str] = set()
+        for key, node in self.nodes.items():
+            previous_node = previous_nodes.get(key)
+            if node.is_scene or node.signature is None or previous_node is None:
+                continue
+            if previous_node.get("signature") != node.signature:
+                continue
+            if previous_node.get("destination") != node.destination:
+                continue
+            destination = str(node.destination)
+            if (
+                os.path.isfile(destination)
+                and os.path.getsize(destination) == node.signature[0]
+            ):
+                unchanged_nodes.add(key)
+
+        return unchanged_nodes
+
+
+def bundle_scene(
+    scene_path: Union[str, pathlib.Path],
+    destination: Union[str, pathlib.Path],
+    max_workers: int = 4,
+    logger: Optional[logging.Logger] = None,
+) -> DependencyGraph:
+    """
+    Copy the scene and all its nested dependencies, the leaves first,
+    and repath the copied scenes to the copied dependencies
+    """
+    logger = logger or logging.getLogger(__name__)
+    manifest_path = pathlib.Path(destination).with_suffix(".bundle.json")
+
+    with create_process_pool(max_workers) as processes, ThreadPoolExecutor(
+        max_workers
+    ) as threads:
+        graph = DependencyGraph.build(scene_path, processes)
+        binary_scenes = [
+            node.path
+            for node in graph.nodes.values()
+            if os.path.splitext(node.path)[1] in BINARY_SCENE_EXTENSIONS
+        ]
+        if binary_scenes:
+            raise Exception(
+                "Maya binary scenes cannot be bundled, save them as maya ascii: "
+                + ", ".join(binary_scenes)
+            )
+        graph.set_destinations(destination)
+        logger.info("Found %s files to bundle in %s", len(graph.nodes), scene_path)
+        duplicates = graph.deduplicate(max_workers)
+        logger.info("Found %s files with a duplicated content", duplicates)
+        unchanged_nodes = graph.get_unchanged_nodes(manifest_path)
+        logger.info(
+            "Found %s files unchanged since the last bundle", len(unchanged_nodes)
+        )
+
+        for level in graph.get_levels():
+            futures = []
+            duplicated_nodes = []
+            for node in level:
+                os.makedirs(os.path.dirname(str(node.destination)), exist_ok=True)
+                if get_path_key(node.path) in unchanged_nodes:
+                    continue
+                if node.duplicate_of is not None:
+                    duplicated_nodes.append(node)
+                elif node.is_scene:
+                    new_paths = graph.get_new_paths(node)
+                    futures.append(
+                        processes.submit(
+                            rewrite_file_paths, node.path, node.destination, new_paths
+                        )
+                    )
+                else:
+                    futures.append(
+                        threads.submit(shutil.copy2, node.path, node.destination)
+                    )
+
+            # The next level depends on this one, it must be complete
+            for future in as_completed(futures):
+                future.result()
+
+            # The files with a duplicated content are linked to the first copy
+            for node in duplicated_nodes:
+                original = graph.nodes[str(node.duplicate_of)]
+                link_or_copy(str(original.destination), str(node.destination))
+
+    graph.write_manifest(manifest_path)
+    logger.info("Bundle manifest written to %s", manifest_path)
+    return graph
@@ -0,0 +1,90 @@
+"""
+Exports executed in the mayapy workers, from a snapshot of the artist's scene
+"""
+
+import logging
+import os
+from typing import Any, Callable, Dict, List
+
+from maya import cmds
+
+from silex_maya.utils.plugins import get_required_plugins, load_plugins
+
+logger = logging.getLogger(__name__)
+
+
+def export_ma(export_path: str, selection: List[str], options: Dict[str, Any]):
+    cmds.file(
+        export_path,
+        exportSelected=bool(selection),
+        exportAll=not selection,
+        preserveReferences=True,
+        type="mayaAscii",
+        force=True,
+    )
+
+
+def export_abc(export_path: str, selection: List[str], options: Dict[str, Any]):
+    from silex_maya.commands.export_abc import ExportABC
+
+    load_plugins(["AbcExport"], logger)
+    start, end = options["frame_range"]
+    ExportABC.export_abc(
+        start, end, export_path, selection, options.get("abc_options", [])
+    )
+
+
+def export_fbx(export_path: str, selection: List[str], options: Dict[str, Any]):
+    from silex_maya.commands.export_fbx import ExportFBX
+
+    load_plugins(["fbxmaya"], logger)
+    start, end = options["frame_range"]
+    ExportFBX.export_fbx(export_path, selection, False, start, end)
+
+
+def export_obj(export_path: str, selection: List[str], options: Dict[str, Any]):
+    load_plugins(["objExport"], logger)
+    cmds.select(selection, replace=True)
+    cmds.file(
+        export_path,
+        exportSelected=True,
+        preserveReferences=True,
+        type="OBJexport",
+        force=True,
+    )
+
+
+EXPORTERS: Dict[str, Callable[[str, List[str], Dict[str, Any]], None]] = {
+    "ma": export_ma,
+    "abc": export_abc,
+    "fbx": export_fbx,
+    "obj": export_obj,
+}
+# Plugins that are worth preloading in the workers
+EXPORTER_PLUGINS = {"abc": ["AbcExport"], "fbx": ["fbxmaya"], "obj": ["objExport"]}
+
+
+def export_snapshot(
+    snapshot_path: str,
+    export_format: str,
+    export_path: str,
+    selection: List[str],
+    options: Dict[str, Any],
+) -> str:
+    """
+    Open the snapshot and export it in the given format, return the exported file
+    """
+    load_plugins(get_required_plugins(snapshot_path), logger)
+    cmds.file(snapshot_path, open=True, force=True)
+
+    # The selection is restored, the nodes keep their names in the snapshot
+    selection = cmds.ls(selection, long=True) if selection else []
+    if selection:
+        cmds.select(selection, replace=True)
+    else:
+        cmds.select(clear=True)
+
+    os.makedirs(os.path.dirname(export_path), exist_ok=True)
+    logger.info("Exporting %s to %s", export_format, export_path)
+    EXPORTERS[export_format](export_path, selection, options)
+    return export_path
@@ -0,0 +1,74 @@
+import os
+import pathlib
+import shutil
+import threading
+from typing import Tuple, Union
+
+
+def link_or_copy(
+    source: Union[str, pathlib.Path], destination: Union[str, pathlib.Path]
+) -> bool:
+    """
+    Hard link the destination to the source when the filesystem allows it,
+    copy it otherwise. Return True if the file was linked
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+        return True
+    except OSError:
+        shutil.copy2(source, destination)
+        return False
+
+
+def copy_to_temp(
+    source: Union[str, pathlib.Path],
+    destination: Union[str, pathlib.Path],
+    link: bool = True,
+) -> Tuple[pathlib.Path, bool]:
+    """
+    Write the file next to its destination under a temporary name,
+    the file is hard linked when allowed. Return the temp path and True if it
+    was linked, the caller renames it to the destination
+    """
+    destination = pathlib.Path(destination)
+    os.makedirs(destination.parent, exist_ok=True)
+    temp_name = f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    temp_path = destination.with_name(temp_name)
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+
+    if link:
+        try:
+            os.link(source, temp_path)
+            return temp_path, True
+        except OSError:
+            pass
+    try:
+        shutil.copy2(source, temp_path)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path, False
+
+
+def atomic_copy(
+    source: Union[str, pathlib.Path],
+    destination: Union[str, pathlib.Path],
+    link: bool = True,
+) -> bool:
+    """
+    Write the file next to its destination first and rename it,
+    so the readers of the destination never see a partial file.
+    The file is hard linked when allowed, return True if it was linked
+    """
+    temp_path, linked = copy_to_temp(source, destination, link)
+    try:
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+    return linked
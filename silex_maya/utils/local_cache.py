@@ -0,0 +1,162 @@
+import json
+import os
+import pathlib
+import threading
+from typing import IO, Iterable, List, Optional, Set, Tuple, Union
+
+# Files of the processes that protect cached files from the evictions
+LEASE_DIRECTORY = ".leases"
+
+
+def try_lock(file: IO) -> bool:
+    """
+    Lock the open file without waiting, the lock is released when the file
+    is closed or when the process exits
+    """
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class LocalCache:
+    """
+    Local scratch directory bounded in size.
+    The least recently used files are evicted when the size limit is exceeded
+    """
+
+    def __init__(self, directory: Union[str, pathlib.Path], max_size: int):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # Held open while this process has a lease, the other processes
+        # can lock it only once this process is gone
+        self.lease_lock: Optional[IO] = None
+
+    @property
+    def lease_directory(self) -> pathlib.Path:
+        return self.directory / LEASE_DIRECTORY
+
+    def get_path(self, name: str) -> pathlib.Path:
+        os.makedirs(self.directory, exist_ok=True)
+        return self.directory / name
+
+    def lookup(self, name: str) -> Optional[pathlib.Path]:
+        """
+        Get a cached file, and mark it as recently used
+        """
+        file_path = self.directory / name
+        try:
+            os.utime(file_path)
+        except OSError:
+            return None
+        return file_path
+
+    def lease(self, file_paths: Iterable[pathlib.Path]):
+        """
+        Protect the given files from the evictions of every process that shares
+        the cache, until the next lease or until this process exits
+        """
+        os.makedirs(self.lease_directory, exist_ok=True)
+        pid = os.getpid()
+        with self.lock:
+            # The lock is created before the lease, a lease without lock is stale
+            if self.lease_lock is None:
+                lease_lock = open(self.lease_directory / f"{pid}.lock", "a")
+                try_lock(lease_lock)
+                self.lease_lock = lease_lock
+
+            lease_path = self.lease_directory / f"{pid}.json"
+            temp_path = lease_path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(temp_path, "w") as lease_file:
+                json.dump([str(file_path) for file_path in file_paths], lease_file)
+            os.replace(temp_path, lease_path)
+
+    def release(self):
+        """
+        Remove the lease of this process
+        """
+        with self.lock:
+            try:
+                os.remove(self.lease_directory / f"{os.getpid()}.json")
+            except OSError:
+                pass
+
+    def get_leased_paths(self) -> Set[pathlib.Path]:
+        """
+        List the files leased by the running processes, the leases of the
+        processes that are gone are removed
+        """
+        leased: Set[pathlib.Path] = set()
+        if not self.lease_directory.is_dir():
+            return leased
+
+        for lease_path in self.lease_directory.glob("*.json"):
+            lock_path = lease_path.with_suffix(".lock")
+            if lease_path.stem != str(os.getpid()):
+                try:
+                    with open(lock_path, "a") as lease_lock:
+                        is_stale = try_lock(lease_lock)
+                except OSError:
+                    is_stale = True
+                if is_stale:
+                    for stale_path in [lease_path, lock_path]:
+                        try:
+                            stale_path.unlink()
+                        except OSError:
+                            pass
+                    continue
+
+            try:
+                with open(lease_path, "r") as lease_file:
+                    leased.update(pathlib.Path(path) for path in json.load(lease_file))
+            except (OSError, ValueError):
+                continue
+
+        return leased
+
+    def evict(self, keep: Iterable[pathlib.Path] = ()) -> List[pathlib.Path]:
+        """
+        Remove the least recently used files until the cache fits in its size,
+        except the kept ones and the ones leased by a process. Return the removed files
+        """
+        keep = set(keep) | self.get_leased_paths()
+        with self.lock:
+            if not self.directory.is_dir():
+                return []
+
+            files: List[Tuple[float, int, pathlib.Path]] = []
+            for file_path in self.directory.rglob("*"):
+                if LEASE_DIRECTORY in file_path.relative_to(self.directory).parts:
+                    continue
+                try:
+                    stat = file_path.stat()
+                except OSError:
+                    continue
+                if file_path.is_file():
+                    files.append((stat.st_mtime, stat.st_size, file_path))
+
+            total_size = sum(size for _, size, _ in files)
+            removed: List[pathlib.Path] = []
+            for _, size, file_path in sorted(files, key=lambda entry: entry[0]):
+                if total_size <= self.max_size:
+                    break
+                if file_path in keep:
+                    continue
+                try:
+                    file_path.unlink()
+                except OSError:
+                    continue
+                total_size -= size
+                removed.append(file_path)
+
+            return removed
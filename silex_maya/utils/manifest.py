@@ -0,0 +1,167 @@
+import json
+import os
+import pathlib
+import re
+from typing import Dict, List, Optional, Union
+
+from silex_maya.utils.content_hash import hash_cache
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+# Directory of a publish version, like v003
+MATCH_VERSION_DIRECTORY = re.compile(r"v(\d+)")
+
+
+def get_manifest_path(directory: Union[str, pathlib.Path]) -> pathlib.Path:
+    """
+    The manifest is written next to the published directory, not inside it
+    """
+    directory = pathlib.Path(directory)
+    return directory.with_name(f"{directory.name}{MANIFEST_SUFFIX}")
+
+
+def list_files(directory: Union[str, pathlib.Path]) -> List[pathlib.Path]:
+    directory = pathlib.Path(directory)
+    if directory.is_file():
+        return [directory]
+
+    return sorted(
+        pathlib.Path(root, file_name)
+        for root, _, file_names in os.walk(directory)
+        for file_name in file_names
+    )
+
+
+def build_manifest(directory: Union[str, pathlib.Path], max_workers: int = 8) -> dict:
+    """
+    Compute the size and the hash of every file in the directory,
+    the files are hashed in parallel
+    """
+    directory = pathlib.Path(os.path.abspath(directory))
+    file_paths = list_files(directory)
+    hashes = hash_cache.hash_files(file_paths, max_workers)
+    root = directory.parent if directory.is_file() else directory
+
+    files: Dict[str, dict] = {}
+    for file_path in file_paths:
+        files[file_path.relative_to(root).as_posix()] = {
+            "size": os.path.getsize(file_path),
+            "hash": hashes[str(file_path)],
+        }
+
+    return {"version": MANIFEST_VERSION, "root": str(directory), "files": files}
+
+
+def write_manifest(manifest: dict, file_path: Union[str, pathlib.Path]):
+    temp_path = pathlib.Path(file_path).with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    os.replace(temp_path, file_path)
+
+
+def read_manifest(file_path: Union[str, pathlib.Path]) -> Optional[dict]:
+    """
+    Read a manifest, return None if it is missing or unreadable
+    """
+    try:
+        with open(file_path, "r") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def get_changed_files(old_manifest: Optional[dict], new_manifest: dict) -> List[str]:
+    """
+    List the files of the new manifest that are not in the old one with the same content
+    """
+    old_files = old_manifest["files"] if old_manifest else {}
+    return [
+        file_name
+        for file_name, entry in new_manifest["files"].items()
+        if old_files.get(file_name) != entry
+    ]
+
+
+
+def get_previous_manifest(directory: Union[str, pathlib.Path]) -> Optional[dict]:
+    """
+    Read the manifest of the closest previous version of the publish.
+    The file names are renamed to the current version, so they can be compared
+    """
+    parts = pathlib.Path(directory).parts
+    for index in reversed(range(len(parts))):
+        match = MATCH_VERSION_DIRECTORY.fullmatch(parts[index])
+        if match is not None:
+            break
+    else:
+        return None
+
+    version_root = pathlib.Path(*parts[:index])
+    current_version = int(match.group(1))
+    try:
+        siblings = os.listdir(version_root)
+    except OSError:
+        return None
+
+    previous_versions = []
+    for sibling in siblings:
+        sibling_match = MATCH_VERSION_DIRECTORY.fullmatch(sibling)
+        if sibling_match is not None and int(sibling_match.group(1)) < current_version:
+            previous_versions.append((int(sibling_match.group(1)), sibling))
+
+    for _, sibling in sorted(previous_versions, reverse=True):
+        manifest = read_manifest(
+            get_manifest_path(version_root.joinpath(sibling, *parts[index + 1 :]))
+        )
+        if manifest is None:
+            continue
+        # The file names often contain the version too
+        manifest["files"] = {
+            file_name.replace(sibling, parts[index]): entry
+            for file_name, entry in manifest["files"].items()
+        }
+        return manifest
+
+    return None
+
+
+def find_manifest(file_path: Union[str, pathlib.Path]) -> Optional[dict]:
+    """
+    Find the manifest of the publish that contains the given file
+    """
+    file_path = pathlib.Path(file_path)
+    for directory in [file_path, *file_path.parents]:
+        manifest = read_manifest(get_manifest_path(directory))
+        if manifest is not None:
+            return manifest
+    return None
+
+
+def verify_manifest(manifest: dict, max_workers: int = 8) -> List[str]:
+    """
+    List the files that are missing or that don't match the manifest anymore
+    The sizes are compared first, only the files with the right size are hashed
+    """
+    root = pathlib.Path(manifest["root"])
+    if root.is_file():
+        root = root.parent
+
+    invalid_files: List[str] = []
+    to_hash: Dict[str, str] = {}
+    for file_name, entry in manifest["files"].items():
+        file_path = root / file_name
+        if not file_path.is_file() or os.path.getsize(file_path) != entry["size"]:
+            invalid_files.append(file_name)
+            continue
+        to_hash[str(file_path)] = file_name
+
+    hashes = hash_cache.hash_files(list(to_hash), max_workers)
+    for file_path, file_name in to_hash.items():
+        if hashes[file_path] != manifest["files"][file_name]["hash"]:
+            invalid_files.append(file_name)
+
+    return sorted(invalid_files)
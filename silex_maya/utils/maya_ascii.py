@@ -0,0 +1,392 @@
+import mmap
+import pathlib
+import re
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+# Match the quoted strings and the bare words of a mel statement
+MATCH_MEL_TOKEN = re.compile(rb'"((?:[^"\\]|\\.)*)"|([^\s;"]+)')
+# Match the escaped characters inside a mel string
+MATCH_MEL_ESCAPE = re.compile(r"\\(.)")
+
+# The requires statements are written before these statements in a maya ascii file
+HEADER_END_STATEMENTS = (b"currentUnit", b"fileInfo", b"createNode")
+
+
+class MelString(str):
+    """
+    String that was quoted in the mel statement
+    """
+
+
+def unescape_mel_string(value: str) -> str:
+    """
+    Convert an escaped mel string into a python string
+    """
+    escapes = {"n": "\n", "t": "\t", "r": "\r"}
+    return MATCH_MEL_ESCAPE.sub(
+        lambda match: escapes.get(match.group(1), match.group(1)), value
+    )
+
+
+def tokenize_statement(statement: bytes) -> List[Union[str, MelString]]:
+    """
+    Split a mel statement into its words and strings.
+    The quoted strings are returned as MelString to differentiate them from the flags
+    """
+    tokens: List[Union[str, MelString]] = []
+    for match in MATCH_MEL_TOKEN.finditer(statement):
+        if match.group(1) is not None:
+            value = match.group(1).decode("utf-8", errors="replace")
+            tokens.append(MelString(unescape_mel_string(value)))
+        else:
+            tokens.append(match.group(2).decode("utf-8", errors="replace"))
+    return tokens
+
+
+def _count_quotes(line: bytes) -> int:
+    """
+    Count the quotes of a line, ignoring the escaped ones
+    """
+    return line.replace(b"\\\\", b"").replace(b'\\"', b"").count(b'"')
+
+
+def _iter_chunks(
+    content: mmap.mmap,
+    prefixes: Optional[Tuple[bytes, ...]] = None,
+    stop_prefixes: Tuple[bytes, ...] = (),
+) -> Iterator[Tuple[bytes, bool]]:
+    """
+    Yield the raw content of the file, flagged when it is a buffered statement.
+    The statements that don't match the prefixes are yielded line by line, unbuffered
+    """
+    lines: List[bytes] = []
+    in_statement = False
+    buffer_statement = False
+    quotes = 0
+    for line in iter(content.readline, b""):
+        if not in_statement:
+            # The comments and empty lines are between the statements
+            if line.startswith(b"//") or not line.strip():
+                yield line, False
+                continue
+            in_statement = True
+            stripped = line.lstrip()
+            if stop_prefixes and stripped.startswith(stop_prefixes):
+                return
+            buffer_statement = prefixes is None or stripped.startswith(prefixes)
+
+        quotes += _count_quotes(line)
+        if buffer_statement:
+            lines.append(line)
+        else:
+            yield line, False
+        # A statement is complete when it ends with a semicolon that is not quoted
+        if quotes % 2 or not line.rstrip().endswith(b";"):
+            continue
+
+        if buffer_statement:
+            yield b"".join(lines), True
+        lines = []
+        in_statement = False
+        quotes = 0
+
+    # Unterminated statement at the end of the file
+    if lines:
+        yield b"".join(lines), False
+
+
+def iter_statements(
+    file_path: Union[str, pathlib.Path],
+    header_only: bool = False,
+    prefixes: Optional[Tuple[bytes, ...]] = None,
+) -> Iterator[bytes]:
+    """
+    Read the maya ascii file line by line from a memory mapped file
+    and yield every statement, even the ones that span over multiple lines.
+    When prefixes are given, the other statements are skipped without being buffered
+    """
+    stop_prefixes = HEADER_END_STATEMENTS if header_only else ()
+    with open(file_path, "rb") as file:
+        # mmap cannot map an empty file
+        if not file.seek(0, 2):
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for chunk, is_statement in _iter_chunks(content, prefixes, stop_prefixes):
+                if is_statement:
+                    yield chunk.strip()
+
+
+def get_required_plugins(file_path: Union[str, pathlib.Path]) -> List[str]:
+    """
+    List the plugins declared by the requires statements of a maya ascii file
+    """
+    plugins: List[str] = []
+    for statement in iter_statements(file_path, header_only=True):
+        if not statement.startswith(b"requires"):
+            continue
+
+        # The plugin name is always the last string before the version
+        tokens = tokenize_statement(statement)
+        strings = [token for token in tokens if isinstance(token, MelString)]
+        if len(strings) < 2 or strings[-2] == "maya" or strings[-2] in plugins:
+            continue
+        plugins.append(str(strings[-2]))
+
+    return plugins
+
+
+# Short and long names of the string attributes that store a file path, by node type
+FILE_ATTRIBUTES = {
+    "file": {"ftn": "fileTextureName"},
+    "psdFileTex": {"ftn": "fileTextureName"},
+    "aiImage": {"filename": "filename"},
+    "aiStandIn": {"dso": "dso"},
+    "aiVolume": {"filename": "filename"},
+    "AlembicNode": {"fn": "abc_File"},
+    "gpuCache": {"cfn": "cacheFileName"},
+    "VRayMesh": {"fn": "fileName"},
+    "VRayVolumeGrid": {"inPath": "inPath"},
+    "audio": {"f": "filename"},
+    "imagePlane": {"imn": "imageName"},
+}
+# Attributes that tell if the file path of a node is a sequence
+SEQUENCE_ATTRIBUTES = {
+    "file": ["uvt", "ufe"],
+    "aiStandIn": ["ufe"],
+}
+# Only these statements are buffered and parsed, the rest of the file is skipped
+DEPENDENCY_STATEMENTS = (
+    b"file ",
+    b"requires ",
+    b"createNode ",
+    b"select ",
+    *{
+        f'setAttr ".{short_name}"'.encode()
+        for attributes in [*FILE_ATTRIBUTES.values(), *SEQUENCE_ATTRIBUTES.values()]
+        for short_name in attributes
+    },
+)
+
+
+class SceneDependencies(NamedTuple):
+    """
+    Dependencies found in a maya ascii file
+    """
+
+    # The plugins declared with the requires statements
+    plugins: List[str]
+    # The reference node and the file path of every top level reference
+    references: List[Tuple[str, str]]
+    # The reference nodes that are not loaded
+    deferred_references: Set[str]
+    # The attribute and the file path of every file attribute
+    attributes: List[Tuple[str, str]]
+    # The attributes that are flagged as a sequence (udim or frame extension)
+    sequence_attributes: Set[str]
+
+
+def _get_flag(tokens: List[Union[str, MelString]], flag: str) -> Optional[str]:
+    """
+    Get the value that follows the given flag in a tokenized statement
+    """
+    for index, token in enumerate(tokens[:-1]):
+        if token == flag and not isinstance(token, MelString):
+            return tokens[index + 1]
+    return None
+
+
+def parse_dependencies(file_path: Union[str, pathlib.Path]) -> SceneDependencies:
+    """
+    Find the references, the file attributes and the plugins of a maya ascii file
+    without opening it in maya
+    """
+    dependencies = SceneDependencies([], [], set(), [], set())
+    node_name: Optional[str] = None
+    node_type: Optional[str] = None
+
+    for statement in iter_statements(file_path, prefixes=DEPENDENCY_STATEMENTS):
+        tokens = tokenize_statement(statement)
+        command = tokens[0]
+        strings = [token for token in tokens if isinstance(token, MelString)]
+
+        if command == "requires":
+            if len(strings) >= 2 and strings[-2] != "maya":
+                if strings[-2] not in dependencies.plugins:
+                    dependencies.plugins.append(str(strings[-2]))
+
+        # The -rdi statements describe the nested references, only -r are top level
+        elif command == "file" and "-r" in tokens:
+            reference_node = _get_flag(tokens, "-rfn")
+            if reference_node is None or not strings:
+                continue
+            dependencies.references.append((str(reference_node), str(strings[-1])))
+            if _get_flag(tokens, "-dr") == "1":
+                dependencies.deferred_references.add(str(reference_node))
+
+        elif command == "createNode":
+            node_type = tokens[1] if len(tokens) > 1 else None
+            node_name = _get_flag(tokens, "-n")
+
+        # The setAttr statements that follow a select apply to an other node
+        elif command == "select":
+            node_name = node_type = None
+
+        elif command == "setAttr" and node_name is not None:
+            short_name = str(tokens[1]).lstrip(".")
+            long_name = FILE_ATTRIBUTES.get(node_type or "", {}).get(short_name)
+            if long_name is not None and len(strings) >= 3 and strings[-1]:
+                attribute = f"{node_name}.{long_name}"
+                dependencies.attributes.append((attribute, str(strings[-1])))
+                continue
+
+            # Remember the nodes that are setup to read a sequence
+            if short_name in SEQUENCE_ATTRIBUTES.get(node_type or "", []):
+                if tokens[-1] not in ["0", "no", "off", "false"]:
+                    for long_name in FILE_ATTRIBUTES.get(node_type or "", {}).values():
+                        dependencies.sequence_attributes.add(f"{node_name}.{long_name}")
+
+    return dependencies
+
+
+def get_deferred_references(file_path: Union[str, pathlib.Path]) -> Set[str]:
+    """
+    List the reference nodes, top level or nested, that are saved as unloaded
+    in the header of a maya ascii file
+    """
+    deferred: Set[str] = set()
+    for statement in iter_statements(file_path, header_only=True):
+        if not statement.startswith(b"file "):
+            continue
+
+        tokens = tokenize_statement(statement)
+        if _get_flag(tokens, "-dr") == "1":
+            reference_node = _get_flag(tokens, "-rfn")
+            if reference_node is not None:
+                deferred.add(str(reference_node))
+
+    return deferred
+
+
+def escape_mel_string(value: str) -> str:
+    """
+    Convert a python string into an escaped mel string, without the quotes
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def rewrite_file_paths(
+    source: Union[str, pathlib.Path],
+    destination: Union[str, pathlib.Path],
+    file_paths: Dict[str, str],
+) -> int:
+    """
+    Stream a copy of the maya ascii file, replacing the file paths of the top level
+    references and the file attributes with the given mapping.
+    The -rdi statements of the nested references are kept as they are.
+    Return the count of replaced paths
+    """
+    replaced = 0
+
+    def replace_string(match: re.Match) -> bytes:
+        nonlocal replaced
+        value = unescape_mel_string(match.group(1).decode("utf-8", errors="replace"))
+        if value not in file_paths:
+            return match.group(0)
+        replaced += 1
+        return b'"' + escape_mel_string(file_paths[value]).encode("utf-8") + b'"'
+
+    with open(source, "rb") as file, open(destination, "wb") as output:
+        if not file.seek(0, 2):
+            return replaced
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for chunk, is_statement in _iter_chunks(content, DEPENDENCY_STATEMENTS):
+                statement = chunk.lstrip()
+                if is_statement and statement.startswith(b"file "):
+                    if "-r" not in tokenize_statement(statement):
+                        output.write(chunk)
+                        continue
+                elif not is_statement or not statement.startswith(b"setAttr"):
+                    output.write(chunk)
+                    continue
+
+                # The path is the last string of the statement
+                strings = [
+                    match
+                    for match in MATCH_MEL_TOKEN.finditer(chunk)
+                    if match.group(1) is not None
+                ]
+                if strings:
+                    last = strings[-1]
+                    chunk = (
+                        chunk[: last.start()]
+                        + replace_string(last)
+                        + chunk[last.end() :]
+                    )
+                output.write(chunk)
+
+    return replaced
+
+
+# Match the deferred flag of a reference statement
+MATCH_DEFERRED_FLAG = re.compile(rb"\s-dr\s+1(?=\s)")
+
+
+def rewrite_references(
+    source: Union[str, pathlib.Path],
+    destination: Union[str, pathlib.Path],
+    reference_paths: Dict[str, str],
+    loaded_references: Iterable[str] = (),
+) -> int:
+    """
+    Stream a copy of the maya ascii file, replacing the file paths of the given
+    top level reference nodes without loading them in maya.
+    The given loaded references are saved as loaded. Return the count of replaced
+    statements
+    """
+    loaded_references = set(loaded_references)
+    replaced = 0
+
+    with open(source, "rb") as file, open(destination, "wb") as output:
+        if not file.seek(0, 2):
+            return replaced
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for chunk, is_statement in _iter_chunks(content, (b"file ",)):
+                tokens = tokenize_statement(chunk) if is_statement else []
+                # The -rdi statements with a depth over 1 describe the nested
+                # references, they are left as they are
+                if "-r" not in tokens and _get_flag(tokens, "-rdi") != "1":
+                    output.write(chunk)
+                    continue
+
+                reference_node = _get_flag(tokens, "-rfn")
+                if reference_node in loaded_references:
+                    chunk = MATCH_DEFERRED_FLAG.sub(b"", chunk)
+                if reference_node in reference_paths:
+                    # The file path is the last string of the statement
+                    path_match = [
+                        match
+                        for match in MATCH_MEL_TOKEN.finditer(chunk)
+                        if match.group(1) is not None
+                    ][-1]
+                    new_path = escape_mel_string(reference_paths[reference_node])
+                    chunk = (
+                        chunk[: path_match.start()]
+                        + b'"'
+                        + new_path.encode("utf-8")
+                        + b'"'
+                        + chunk[path_match.end() :]
+                    )
+                    replaced += 1
+                output.write(chunk)
+
+    return replaced
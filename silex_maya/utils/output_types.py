@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+# A cache file is written per Kitsu host
+OUTPUT_TYPES_CACHE_DIRECTORY = (
+    pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "output_types"
+)
+# The output types are static metadata, they almost never change
+OUTPUT_TYPES_TTL = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+class OutputTypeCache:
+    """
+    Cache of the Kitsu output types, fetched all at once and kept in memory
+    and on disk for a limited time, separately for each Kitsu host.
+    The client is gazu.files by default, any object with the same async
+    all_output_types and get_output_type_by_name functions can replace it
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        cache_directory: Optional[pathlib.Path] = OUTPUT_TYPES_CACHE_DIRECTORY,
+        ttl: float = OUTPUT_TYPES_TTL,
+    ):
+        self.client = client
+        self.cache_directory = cache_directory
+        self.ttl = ttl
+        self.host: Optional[str] = None
+        self.output_types: Dict[str, dict] = {}
+        self.fetched_at = 0.0
+        # Created lazily, it must belong to the running event loop
+        self.lock: Optional[asyncio.Lock] = None
+
+    def get_client(self) -> Any:
+        if self.client is None:
+            import gazu.files
+
+            self.client = gazu.files
+        return self.client
+
+    def get_host(self) -> str:
+        """
+        Get the Kitsu host the client is connected to
+        """
+        if hasattr(self.get_client(), "get_host"):
+            return self.get_client().get_host()
+        import gazu.client
+
+        return gazu.client.get_host()
+
+    @property
+    def cache_path(self) -> Optional[pathlib.Path]:
+        if self.cache_directory is None or self.host is None:
+            return None
+        host_hash = hashlib.blake2b(self.host.encode(), digest_size=8).hexdigest()
+        return self.cache_directory / f"output_types_{host_hash}.json"
+
+    def is_expired(self) -> bool:
+        return time.time() - self.fetched_at > self.ttl
+
+    def load(self) -> bool:
+        """
+        Load the output types saved on disk, return False if there are none
+        """
+        cache_path = self.cache_path
+        if cache_path is None:
+            return False
+        try:
+            with open(cache_path, "r") as cache:
+                data = json.load(cache)
+        except (OSError, ValueError):
+            return False
+
+        self.output_types = data.get("output_types", {})
+        self.fetched_at = data.get("fetched_at", 0.0)
+        return bool(self.output_types)
+
+    def save(self):
+        cache_path = self.cache_path
+        if cache_path is None:
+            return
+        os.makedirs(cache_path.parent, exist_ok=True)
+        temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w") as cache:
+            json.dump(
+                {"fetched_at": self.fetched_at, "output_types": self.output_types},
+                cache,
+            )
+        os.replace(temp_path, cache_path)
+
+    async def refresh(self):
+        """
+        Fetch all the output types in a single request
+        """
+        output_types = await self.get_client().all_output_types()
+        self.output_types = {
+            output_type["name"]: output_type for output_type in output_types
+        }
+        self.fetched_at = time.time()
+        self.save()
+
+    async def get(self, name: str) -> dict:
+        """
+        Get an output type by name, Kitsu is only requested when the cache expired
+        """
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            # The output types of an other Kitsu server are not reused
+            host = self.get_host()
+            if host != self.host:
+                self.host = host
+                self.output_types = {}
+                self.fetched_at = 0.0
+
+            if self.is_expired() and not (self.load() and not self.is_expired()):
+                try:
+                    await self.refresh()
+                except Exception as exception:
+                    # Outdated output types are better than no output type
+                    if not self.output_types:
+                        raise
+                    logger.warning(
+                        "Could not refresh the output types, using the cache: %s",
+                        exception,
+                    )
+
+            if name not in self.output_types:
+                # The output type may have been created since the last refresh
+                output_type = await self.get_client().get_output_type_by_name(name)
+                if output_type is None:
+                    raise KeyError(f"The output type {name} does not exist")
+                self.output_types[name] = output_type
+                self.save()
+
+            return self.output_types[name]
+
+
+output_type_cache = OutputTypeCache()
+
+
+async def get_output_type(name: str) -> dict:
+    return await output_type_cache.get(name)
@@ -0,0 +1,180 @@
+import functools
+import glob
+import os
+import pathlib
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import fileseq
+from silex_client.utils.files import find_sequence_from_path
+
+from silex_maya.utils.constants import MATCH_PATH_TOKEN
+
+
+class PathToken(NamedTuple):
+    """
+    Sequence syntax found in a path, like <UDIM> or ####
+    """
+
+    # Either udim, uvtile or frame
+    kind: str
+    # The token as written in the path
+    text: str
+    padding: int
+    # Written before the value, the <uvtile> syntaxes expand to _u1_v1
+    separator: str = ""
+
+
+class PathTemplate:
+    """
+    Path parsed into its literal segments and its sequence tokens
+    The path is parsed once, the expansion and the formatting work from the segments
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        segments: List[Union[str, PathToken]] = []
+        position = 0
+        for match in MATCH_PATH_TOKEN.finditer(path):
+            if match.start() > position:
+                segments.append(path[position : match.start()])
+            segments.append(self._build_token(match))
+            position = match.end()
+        if position < len(path):
+            segments.append(path[position:])
+
+        self.segments: Tuple[Union[str, PathToken], ...] = tuple(segments)
+        self.tokens: Tuple[PathToken, ...] = tuple(
+            segment for segment in segments if isinstance(segment, PathToken)
+        )
+        self._regex: Optional[re.Pattern] = None
+
+    @staticmethod
+    def _build_token(match: re.Match) -> PathToken:
+        if match.group("udim"):
+            return PathToken("udim", match.group(0), 4)
+        if match.group("separated_uvtile"):
+            return PathToken("uvtile", match.group(0), 0, "_")
+        if match.group("uvtile"):
+            return PathToken("uvtile", match.group(0), 0)
+        if match.group("hashes"):
+            return PathToken("frame", match.group(0), len(match.group("hashes")))
+
+        padding = (
+            match.group("frame_padding")
+            or match.group("f_padding")
+            or match.group("printf_padding")
+            or "0"
+        )
+        return PathToken("frame", match.group(0), int(padding))
+
+    @property
+    def is_template(self) -> bool:
+        return bool(self.tokens)
+
+    @staticmethod
+    def _get_pattern(segments: Iterable[Union[str, PathToken]]) -> str:
+        pattern = ""
+        for segment in segments:
+            if isinstance(segment, str):
+                pattern += re.escape(segment)
+            elif segment.kind == "uvtile":
+                pattern += f"{re.escape(segment.separator)}u\\d+_v\\d+"
+            elif segment.padding:
+                pattern += f"-?\\d{{{segment.padding},}}"
+            else:
+                pattern += "-?\\d+"
+        return pattern
+
+    def get_regex(self) -> re.Pattern:
+        """
+        Regex that matches the paths that this template expands to
+        """
+        if self._regex is None:
+            self._regex = re.compile(f"^{self._get_pattern(self.segments)}$")
+        return self._regex
+
+    def get_glob(self) -> str:
+        return "".join(
+            glob.escape(segment) if isinstance(segment, str) else "*"
+            for segment in self.segments
+        )
+
+    def format(
+        self, frame: Optional[int] = None, tile: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """
+        Replace the tokens by the given values, the udim tokens use the frame value
+        """
+        path = ""
+        for segment in self.segments:
+            if isinstance(segment, str):
+                path += segment
+            elif segment.kind == "uvtile" and tile is not None:
+                path += f"{segment.separator}u{tile[0]}_v{tile[1]}"
+            elif segment.kind != "uvtile" and frame is not None:
+                path += str(frame).zfill(segment.padding)
+            else:
+                path += segment.text
+        return path
+
+    def find_files(self) -> List[str]:
+        """
+        List the existing files that this template expands to
+        """
+        if not self.is_template:
+            return [self.path] if os.path.isfile(self.path) else []
+
+        # The paths are compared with forward slashes, glob can mix them on windows
+        regex = parse_path_template(self.path.replace("\\", "/")).get_regex()
+        return sorted(
+            path
+            for path in glob.glob(self.get_glob())
+            if regex.match(path.replace("\\", "/"))
+        )
+
+    def find_sequences(self) -> List[fileseq.FileSequence]:
+        """
+        Convert the path into sequences, a path that is not a template
+        or that does not lead to any file is returned as a sequence of one item
+        """
+        if not self.is_template:
+            return [find_sequence_from_path(pathlib.Path(self.path))]
+
+        # When no file is found, the path is kept as it is, without guessing the tokens
+        file_paths = self.find_files() or [self.path]
+
+        # Fileseq can only represent one number, the uvtiles are split
+        # into a sequence for each u value
+        return list(fileseq.findSequencesInList(file_paths))
+
+    def reformat(self, sequence: fileseq.FileSequence) -> str:
+        """
+        Build the path of the given sequence, written with the tokens of this template
+        """
+        first_path = str(sequence.index(0))
+        if not self.is_template:
+            return first_path
+
+        # The text before the first token is changed by the conform, the text
+        # between and after the tokens is kept
+        first_token = self.segments.index(self.tokens[0])
+        segments = self.segments[first_token:]
+        match = re.match(
+            f"^(.*?){self._get_pattern(segments)}$", first_path, re.IGNORECASE
+        )
+        if match is None:
+            return first_path
+
+        return match.group(1) + "".join(
+            segment if isinstance(segment, str) else segment.text
+            for segment in segments
+        )
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_path_template(path: str) -> PathTemplate:
+    """
+    Parse the path into a template, the templates are memoized by path
+    """
+    return PathTemplate(path)
@@ -0,0 +1,133 @@
+import logging
+import ntpath
+import os
+import pathlib
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import fileseq
+from silex_client.utils.files import is_valid_pipeline_path
+
+# Environment variable that lists the pipeline roots, separated like the PATH
+PIPELINE_ROOTS_ENV = "SILEX_PIPELINE_ROOTS"
+
+logger = logging.getLogger(__name__)
+
+
+def split_path(path: str) -> List[str]:
+    """
+    Split the path into its components, regardless of the separators used
+    """
+    return [part for part in re.split(r"[\\/]+", os.path.normcase(path)) if part]
+
+
+class PipelinePathClassifier:
+    """
+    Tell if the paths are conformed in the pipeline.
+    The pipeline roots are compiled into a prefix trie, so the paths that are outside
+    of the pipeline are rejected in O(path length). The paths inside the pipeline are
+    validated once per sequence pattern, not once per frame
+    """
+
+    # Marks the end of a root in the trie
+    ROOT_END = ""
+
+    def __init__(self, roots: Iterable[str]):
+        self.trie: Dict[str, dict] = {}
+        for root in roots:
+            node = self.trie
+            for part in split_path(root):
+                node = node.setdefault(part, {})
+            node[self.ROOT_END] = {}
+
+        self.cache: Dict[Tuple[str, str, str], bool] = {}
+
+    def is_in_roots(self, path: str) -> bool:
+        """
+        Walk the trie along the path's components, until a root ends
+        Without any root, every path can be in the pipeline
+        """
+        if not self.trie:
+            return True
+
+        node = self.trie
+        for part in split_path(path):
+            if self.ROOT_END in node:
+                return True
+            if part not in node:
+                return False
+            node = node[part]
+        return self.ROOT_END in node
+
+    def is_sequence_conformed(self, sequence: fileseq.FileSequence) -> bool:
+        """
+        Classify the whole sequence from its directory and its pattern
+        """
+        if not self.is_in_roots(sequence.dirname()):
+            return False
+
+        # All the frames of a sequence share the same pattern, only one is tested
+        key = (sequence.dirname(), sequence.basename(), sequence.extension())
+        if key not in self.cache:
+            first_path = pathlib.Path(str(sequence.index(0)))
+            self.cache[key] = is_valid_pipeline_path(first_path)
+        return self.cache[key]
+
+
+def join_root(mountpoint: str, root: str) -> str:
+    """
+    Join the mountpoint and the root of a file tree. A windows drive like "P:"
+    is joined as "P:/root", not as the drive relative "P:root"
+    """
+    drive, tail = ntpath.splitdrive(mountpoint)
+    if drive and not tail.strip("\\/"):
+        mountpoint = f"{drive}/"
+    if not root:
+        return mountpoint
+    return mountpoint.rstrip("\\/") + "/" + root.strip("\\/")
+
+
+def get_file_tree_roots(file_tree: Dict[str, Any]) -> List[str]:
+    """
+    Get the roots of a project's file tree, as configured in Kitsu
+    """
+    roots = []
+    for section in file_tree.values():
+        if not isinstance(section, dict) or not section.get("mountpoint"):
+            continue
+        roots.append(join_root(section["mountpoint"], section.get("root", "")))
+    return roots
+
+
+async def get_project_roots(context_metadata: Dict[str, Any]) -> List[str]:
+    """
+    Get the roots of the file trees of every project, the scenes can reference
+    the files of other projects than the current one
+    """
+    file_trees = [context_metadata.get("project_file_tree") or {}]
+    try:
+        import gazu.project
+
+        projects = await gazu.project.all_projects()
+        file_trees += [project.get("file_tree") or {} for project in projects]
+    except Exception as exception:
+        logger.warning("Could not get the file trees of the projects: %s", exception)
+
+    roots = [
+        root for file_tree in file_trees for root in get_file_tree_roots(file_tree)
+    ]
+    return list(dict.fromkeys(roots))
+
+
+async def get_pipeline_roots(
+    context_metadata: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """
+    Get the pipeline roots listed in the environment, or the roots of the projects
+    when the environment does not list any
+    """
+    roots = os.environ.get(PIPELINE_ROOTS_ENV, "")
+    env_roots = [root for root in roots.split(os.pathsep) if root]
+    if env_roots or context_metadata is None:
+        return env_roots
+    return await get_project_roots(context_metadata)
@@ -0,0 +1,100 @@
+import logging
+import pathlib
+import string
+from typing import Iterable, List, Optional, Union
+
+from maya import cmds
+
+from silex_maya.utils.maya_ascii import get_required_plugins as get_ascii_plugins
+
+# The plugin requirements of a maya binary file are stored in its header,
+# we don't need to read further than that
+BINARY_HEADER_SIZE = 1024 * 1024
+# Offset and length of the size field after a chunk tag, depending on the IFF flavour
+BINARY_CHUNK_LAYOUTS = {
+    b"FOR4": [(0, 4)],
+    b"FOR8": [(4, 8), (0, 8)],
+}
+PRINTABLE_CHARACTERS = set(string.printable.encode())
+
+
+def _read_binary_chunk_name(
+    header: bytes, position: int, magic: bytes
+) -> Optional[str]:
+    """
+    Read the plugin name stored in the PLUG chunk at the given position
+    The plugin name is the first null terminated string of the chunk
+    """
+    for offset, length in BINARY_CHUNK_LAYOUTS[magic]:
+        size_start = position + 4 + offset
+        size = int.from_bytes(header[size_start : size_start + length], "big")
+        data_start = size_start + length
+        data = header[data_start : data_start + size]
+
+        fields = data.split(b"\0")
+        if len(fields) < 2 or not fields[0]:
+            continue
+        if not all(char in PRINTABLE_CHARACTERS for char in fields[0]):
+            continue
+        return fields[0].decode()
+
+    return None
+
+
+def get_binary_plugins(file_path: Union[str, pathlib.Path]) -> List[str]:
+    """
+    List the plugins declared in the PLUG chunks of a maya binary file header
+    """
+    with open(file_path, "rb") as file:
+        header = file.read(BINARY_HEADER_SIZE)
+
+    magic = header[:4]
+    if magic not in BINARY_CHUNK_LAYOUTS:
+        return []
+
+    plugins: List[str] = []
+    position = header.find(b"PLUG")
+    while position != -1:
+        plugin = _read_binary_chunk_name(header, position, magic)
+        if plugin is not None and plugin != "maya" and plugin not in plugins:
+            plugins.append(plugin)
+        position = header.find(b"PLUG", position + 4)
+
+    return plugins
+
+
+def get_required_plugins(file_path: Union[str, pathlib.Path]) -> List[str]:
+    """
+    List the plugins required by a scene file without opening it
+    """
+    suffix = pathlib.Path(file_path).suffix
+    if suffix == ".ma":
+        return get_ascii_plugins(file_path)
+    if suffix == ".mb":
+        return get_binary_plugins(file_path)
+    return []
+
+
+def load_plugins(
+    plugins: Iterable[str], logger: Optional[logging.Logger] = None
+) -> List[str]:
+    """
+    Load the given plugins if they are not already loaded
+    Must be executed in the main thread, return the plugins that were loaded
+    """
+    logger = logger or logging.getLogger(__name__)
+    loaded_plugins: List[str] = []
+
+    for plugin in plugins:
+        if cmds.pluginInfo(plugin, query=True, loaded=True):
+            continue
+
+        # Maya plugins can only be loaded one at a time from the main thread
+        try:
+            cmds.loadPlugin(plugin, quiet=True)
+        except RuntimeError:
+            logger.warning("Could not load the plugin %s", plugin)
+            continue
+        loaded_plugins.append(plugin)
+
+    return loaded_plugins
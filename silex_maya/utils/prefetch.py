@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from maya import cmds
+
+from silex_maya.utils.dependency_graph import DependencyGraph
+from silex_maya.utils.files import atomic_copy
+from silex_maya.utils.local_cache import LocalCache
+
+PREFETCH_DIRECTORY = pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "prefetch"
+# Size of the cache in gigabytes, the least recently used files are evicted
+PREFETCH_CACHE_SIZE_ENV = "SILEX_PREFETCH_CACHE_SIZE"
+DEFAULT_PREFETCH_CACHE_SIZE = 20
+# Suffix of the file that records the source of a cached file
+SOURCE_SUFFIX = ".source"
+
+prefetch_cache = LocalCache(
+    PREFETCH_DIRECTORY,
+    max_size=int(
+        float(os.getenv(PREFETCH_CACHE_SIZE_ENV, DEFAULT_PREFETCH_CACHE_SIZE))
+        * 1024**3
+    ),
+)
+# The directories remapped by the last prefetch
+mapped_directories: List[str] = []
+
+
+def get_cache_name(file_path: Union[str, pathlib.Path]) -> str:
+    """
+    Mirror the absolute path in the cache, the drive becomes the first directory
+    """
+    path = pathlib.PurePath(os.path.abspath(file_path))
+    drive = path.drive.replace(":", "").replace("\\", "/").strip("/")
+    parts = [part for part in path.parts[1:] if part not in ["/", "\\"]]
+    return "/".join([drive, *parts] if drive else parts)
+
+
+def fetch_file(
+    file_path: str, cache: LocalCache = prefetch_cache
+) -> Tuple[pathlib.Path, bool]:
+    """
+    Copy the file in the cache if the cached copy is missing or outdated,
+    return the cached path and True if it was already cached
+    """
+    name = get_cache_name(file_path)
+    cached_path = cache.get_path(name)
+    source_path = cache.get_path(f"{name}{SOURCE_SUFFIX}")
+    stat = os.stat(file_path)
+    source = [stat.st_size, stat.st_mtime_ns]
+
+    # The cached files are touched when used, their mtime can not be compared
+    # to the source. The size and mtime of the source are recorded instead
+    try:
+        with open(source_path) as source_file:
+            is_cached = json.load(source_file) == source
+        is_cached = is_cached and cached_path.stat().st_size == stat.st_size
+    except (OSError, ValueError):
+        is_cached = False
+
+    if not is_cached:
+        atomic_copy(file_path, cached_path, link=False)
+        temp_path = source_path.with_name(
+            f".{source_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(temp_path, "w") as source_file:
+            json.dump(source, source_file)
+        os.replace(temp_path, source_path)
+    cache.lookup(name)
+    cache.lookup(f"{name}{SOURCE_SUFFIX}")
+    return cached_path, is_cached
+
+
+def is_directory_cached(directory: str, cached_names: Iterable[str]) -> bool:
+    """
+    Check if all the files of a directory are cached, a remapped directory
+    also hides the files the scenes do not reference directly, like udim tiles
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return False
+    # The sub directories are remapped too, they are never checked
+    if any(entry.is_dir() for entry in entries):
+        return False
+    return {entry.name for entry in entries} <= set(cached_names)
+
+
+def get_directory_mappings(
+    graph: DependencyGraph, cached_paths: Dict[str, pathlib.Path]
+) -> Dict[str, str]:
+    """
+    Find the directories, as written in the scenes, that can be remapped to the
+    cache. A directory is remapped only if all its files are cached
+    """
+    cached_names: Dict[str, Set[str]] = {}
+    for key, cached_path in cached_paths.items():
+        source_directory = os.path.dirname(graph.nodes[key].path)
+        if cached_path.name == os.path.basename(graph.nodes[key].path):
+            cached_names.setdefault(source_directory, set()).add(cached_path.name)
+
+    scene_directory = os.path.dirname(graph.nodes[graph.root].path)
+    mappings: Dict[str, str] = {}
+    excluded: Set[str] = set()
+
+    for scene in graph.nodes.values():
+        for written_path, keys in scene.references.items():
+            # The relative paths are resolved by maya from the workspace
+            expanded_path = os.path.expandvars(written_path)
+            if not os.path.isabs(expanded_path) or not keys:
+                continue
+            directory = pathlib.Path(os.path.dirname(expanded_path)).as_posix()
+
+            cached_directories = set()
+            for key in keys:
+                cached_path = cached_paths.get(key)
+                node_path = graph.nodes[key].path
+                if cached_path is None:
+                    cached_directories.add(None)
+                elif cached_path.name != os.path.basename(node_path):
+                    cached_directories.add(None)
+                else:
+                    cached_directories.add(cached_path.parent.as_posix())
+
+            cached_directory = cached_directories.pop()
+            source_directory = os.path.dirname(graph.nodes[keys[0]].path)
+            if cached_directories or cached_directory is None:
+                excluded.add(directory)
+            elif not is_directory_cached(
+                source_directory, cached_names.get(source_directory, set())
+            ):
+                excluded.add(directory)
+            elif mappings.get(directory, cached_directory) != cached_directory:
+                excluded.add(directory)
+            else:
+                mappings[directory] = cached_directory
+
+    def is_excluded(directory: str) -> bool:
+        # A remapped directory also remaps all its sub directories
+        prefix = directory.rstrip("/") + "/"
+        if (pathlib.Path(scene_directory).as_posix() + "/").startswith(prefix):
+            return True
+        return any(
+            (path.rstrip("/") + "/").startswith(prefix) for path in excluded
+        )
+
+    return {
+        directory: cached_directory
+        for directory, cached_directory in mappings.items()
+        if not is_excluded(directory)
+    }
+
+
+def prefetch_scene(
+    scene_path: Union[str, pathlib.Path],
+    max_workers: int = 8,
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, str]:
+    """
+    Copy the nested references and the textures of a maya ascii scene
+    in the local cache, in parallel. Return the directories to remap
+    """
+    logger = logger or logging.getLogger(__name__)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        graph = DependencyGraph.build(scene_path, executor)
+        futures = {
+            executor.submit(fetch_file, node.path): key
+            for key, node in graph.nodes.items()
+            if key != graph.root
+        }
+
+        cached_paths: Dict[str, pathlib.Path] = {}
+        hits = 0
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                cached_paths[key], is_cached = future.result()
+            except OSError as exception:
+                logger.warning("Could not prefetch %s: %s", key, exception)
+                continue
+            hits += is_cached
+
+    # The files of the scene are kept, maya reads them for the whole session.
+    # The lease also protects them from the evictions of the other processes
+    kept: List[pathlib.Path] = []
+    for cached_path in cached_paths.values():
+        kept += [cached_path, cached_path.with_name(cached_path.name + SOURCE_SUFFIX)]
+    prefetch_cache.lease(kept)
+    evicted = prefetch_cache.evict(keep=kept)
+    logger.info(
+        "Prefetched %s files in %.2fs, %s were already cached, %s evicted",
+        len(cached_paths),
+        time.perf_counter() - start,
+        hits,
+        len(evicted),
+    )
+
+    # An other process could evict the files of a scene that does not fit
+    cached_size = sum(path.stat().st_size for path in cached_paths.values())
+    if cached_size > prefetch_cache.max_size:
+        logger.warning(
+            "The scene dependencies do not fit in the prefetch cache, "
+            "they are read from their original paths"
+        )
+        prefetch_cache.release()
+        return {}
+    return get_directory_mappings(graph, cached_paths)
+
+
+def apply_directory_mappings(mappings: Dict[str, str]):
+    """
+    Remap the prefetched directories to the cache, the previous mappings
+    are removed. Must be executed in the main thread
+    """
+    for directory in mapped_directories:
+        cmds.dirmap(unmapDirectory=directory)
+    mapped_directories.clear()
+    # The cached files of the previous scene are not read anymore
+    if not mappings:
+        prefetch_cache.release()
+
+    if mappings:
+        cmds.dirmap(enable=True)
+    for directory, cached_directory in mappings.items():
+        cmds.dirmap(mapDirectory=(directory, cached_directory))
+        mapped_directories.append(directory)
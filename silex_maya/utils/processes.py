@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+def get_python_executable() -> str:
+    """
+    Get the python interpreter to use for the child processes
+    Inside the maya GUI, sys.executable is maya itself and not mayapy
+    """
+    directory, executable = os.path.split(sys.executable)
+    name, extension = os.path.splitext(executable)
+    if name.lower() in ["maya", "mayabatch"]:
+        return os.path.join(directory, f"mayapy{extension}")
+    return sys.executable
+
+
+def create_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Create a pool of python processes that works in and outside of maya
+    """
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(get_python_executable())
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
@@ -0,0 +1,53 @@
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+from maya import cmds
+
+# Value of the loadReferenceDepth flag for each reference loading mode
+REFERENCE_DEPTHS = {"all": "all", "top_level": "topOnly", "none": "none"}
+# Reference nodes created by maya that do not point to a file
+INTERNAL_REFERENCE_NODES = ["sharedReferenceNode", "_UNKNOWN_REF_NODE_"]
+
+
+def is_reference_loaded(reference_node: str) -> bool:
+    try:
+        return cmds.referenceQuery(reference_node, isLoaded=True)
+    except RuntimeError:
+        return False
+
+
+def list_unloaded_references() -> List[str]:
+    """
+    List the reference nodes that are not loaded.
+    Must be executed in the main thread
+    """
+    return [
+        reference_node
+        for reference_node in cmds.ls(type="reference") or []
+        if reference_node not in INTERNAL_REFERENCE_NODES
+        and not is_reference_loaded(reference_node)
+    ]
+
+
+def load_references(
+    reference_nodes: Iterable[str], logger: Optional[logging.Logger] = None
+) -> Dict[str, float]:
+    """
+    Load the given reference nodes that are not loaded yet,
+    return the time taken by each one.
+    Must be executed in the main thread
+    """
+    logger = logger or logging.getLogger(__name__)
+    load_times: Dict[str, float] = {}
+    for reference_node in reference_nodes:
+        if is_reference_loaded(reference_node):
+            continue
+
+        start = time.perf_counter()
+        cmds.file(loadReference=reference_node)
+        load_times[reference_node] = time.perf_counter() - start
+        logger.info(
+            "Loaded reference %s in %.2fs", reference_node, load_times[reference_node]
+        )
+    return load_times
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+JOURNAL_DIRECTORY = pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "resume"
+TRAILER_SIZE = 256
+# Number of recorded steps buffered before they are appended to the journal
+FLUSH_INTERVAL = 20
+# The copies can round the modification time on some network filesystems
+MTIME_TOLERANCE = 2 * 10**9
+
+
+def get_journal_path(directory: Union[str, pathlib.Path]) -> pathlib.Path:
+    """
+    The journal is kept outside of the export directory,
+    so it is never published with the exported files.
+    It is found from the directory where the exported files end up
+    """
+    key = os.path.normcase(os.path.abspath(str(directory))).encode()
+    name = hashlib.blake2b(key, digest_size=10).hexdigest()
+    return JOURNAL_DIRECTORY / f"{name}.jsonl"
+
+
+def has_complete_trailer(file_path: Union[str, pathlib.Path]) -> bool:
+    """
+    An ascii ass file ends with the closing bracket of its last node,
+    a truncated file does not
+    """
+    with open(file_path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        file.seek(max(0, file.tell() - TRAILER_SIZE))
+        return file.read().rstrip().endswith(b"}")
+
+
+class ExportJournal:
+    """
+    Record the files written by each step of an export (a frame, a layer...)
+    with their size and their modification time, so an interrupted export
+    can be resumed. Recording only stats the files, the entries are appended
+    to the journal by batches.
+
+    The exports write to a new temp directory on every run, the files are
+    recorded relative to it and checked in the destination they are copied to
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, pathlib.Path],
+        destination: Optional[Union[str, pathlib.Path]] = None,
+        flush_interval: int = FLUSH_INTERVAL,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.destination = pathlib.Path(destination or directory)
+        self.path = get_journal_path(self.destination)
+        self.flush_interval = flush_interval
+        self.groups: Dict[str, Dict[str, List]] = {}
+        self.buffer: List[str] = []
+
+    def load(self):
+        try:
+            with open(self.path, "r") as journal:
+                lines = journal.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            # The last line can be incomplete if the export crashed while writing it
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.groups[entry["group"]] = entry["files"]
+
+    def clear(self):
+        self.groups = {}
+        self.buffer = []
+        if self.path.exists():
+            os.remove(self.path)
+
+    def record(self, group: str, file_paths: Iterable[Union[str, pathlib.Path]]):
+        """
+        Append the files of a completed step to the journal
+        """
+        files = {}
+        for file_path in file_paths:
+            stat = os.stat(file_path)
+            relative_path = os.path.relpath(file_path, self.directory)
+            files[relative_path] = [stat.st_size, stat.st_mtime_ns]
+        self.groups[group] = files
+
+        self.buffer.append(json.dumps({"group": group, "files": files}) + "\n")
+        if len(self.buffer) >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Append the buffered steps to the journal
+        """
+        if not self.buffer:
+            return
+        os.makedirs(self.path.parent, exist_ok=True)
+        with open(self.path, "a") as journal:
+            journal.write("".join(self.buffer))
+        self.buffer = []
+
+    def get_valid_files(
+        self,
+        group: str,
+        validator: Optional[Callable[[pathlib.Path], bool]] = None,
+    ) -> Optional[List[pathlib.Path]]:
+        """
+        Get the files of the step in the destination if they are all still intact,
+        None otherwise
+        """
+        files = self.groups.get(group)
+        if not files:
+            return None
+
+        file_paths = []
+        for relative_path, (size, mtime) in files.items():
+            file_path = self.destination / relative_path
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+            if stat.st_size != size or abs(stat.st_mtime_ns - mtime) > MTIME_TOLERANCE:
+                return None
+            if validator is not None and not validator(file_path):
+                return None
+            file_paths.append(file_path)
+
+        return file_paths
+
+    def get_valid_groups(
+        self,
+        groups: Iterable[str],
+        validator: Optional[Callable[[pathlib.Path], bool]] = None,
+        max_workers: int = 8,
+    ) -> Dict[str, List[pathlib.Path]]:
+        """
+        Check the given steps in parallel, return the files of the valid ones
+        """
+        groups = [group for group in groups if group in self.groups]
+        with ThreadPoolExecutor(max_workers) as executor:
+            results = executor.map(
+                lambda group: self.get_valid_files(group, validator), groups
+            )
+            valid_groups = dict(zip(groups, results))
+
+        return {
+            group: files for group, files in valid_groups.items() if files is not None
+        }
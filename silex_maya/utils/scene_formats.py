@@ -0,0 +1,54 @@
+import logging
+import os
+import pathlib
+from typing import Union
+
+# Extension of the scene files for each maya file type
+SCENE_FORMATS = {"mayaAscii": ".ma", "mayaBinary": ".mb"}
+# Maya binary is smaller and faster to write and to read than maya ascii
+FAST_FORMAT = "mayaBinary"
+
+
+def get_scene_format(file_format: str, fast: bool = False) -> str:
+    if fast:
+        return FAST_FORMAT
+    if file_format not in SCENE_FORMATS:
+        raise Exception(f"The scene format {file_format} is not supported")
+    return file_format
+
+
+def with_scene_extension(file_path: str, file_format: str) -> str:
+    """
+    Replace the extension of the path by the one of the scene format
+    """
+    return f"{os.path.splitext(file_path)[0]}{SCENE_FORMATS[file_format]}"
+
+
+def format_size(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}"
+
+
+def log_scene_size(
+    logger: logging.Logger,
+    file_path: Union[str, pathlib.Path],
+    file_format: str,
+    duration: float,
+):
+    """
+    Report the size of a written scene, to compare the formats
+    """
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return
+    logger.info(
+        "Wrote %s as %s: %s in %.2fs",
+        file_path,
+        file_format,
+        format_size(size),
+        duration,
+    )
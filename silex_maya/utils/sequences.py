@@ -0,0 +1,43 @@
+import pathlib
+import re
+from typing import Iterable, List, Sequence, Tuple, Union
+
+import fileseq
+
+from silex_maya.utils.path_template import parse_path_template
+
+# The uvtile sequences are split by u, the v is the frame of the sequence
+MATCH_UVTILE_BASENAME = re.compile(r"u(\d+)_v$", re.IGNORECASE)
+
+
+def find_reference_sequences(file_path: pathlib.Path) -> List[fileseq.FileSequence]:
+    """
+    Convert the reference's file path into sequences, without the help of maya
+    The uvtiles are split into several sequences, a reference that is not
+    a sequence is returned as a sequence of one item
+    """
+    return parse_path_template(str(file_path)).find_sequences()
+
+
+def to_file_sequence(
+    value: Union[str, pathlib.Path, Sequence[Union[str, pathlib.Path]]]
+) -> fileseq.FileSequence:
+    """
+    Convert a single path or a list of paths into a sequence
+    """
+    if isinstance(value, (str, pathlib.PurePath)):
+        value = [value]
+    return fileseq.findSequencesInList([str(path) for path in value])[0]
+
+
+def get_frames_key(file_paths: Iterable[Union[str, pathlib.Path]]) -> Tuple[str, ...]:
+    """
+    List the frames and the tiles of the files, two sets of files with the same
+    content but other frames or tiles can not replace each other
+    """
+    keys = []
+    for sequence in fileseq.findSequencesInList([str(path) for path in file_paths]):
+        match = MATCH_UVTILE_BASENAME.search(sequence.basename())
+        tile = f"u{match.group(1)}_v" if match is not None else ""
+        keys.append(f"{tile}{sequence.frameSet() or ''}")
+    return tuple(sorted(keys))
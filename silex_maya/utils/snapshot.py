@@ -0,0 +1,224 @@
+import atexit
+import contextlib
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Set
+
+from maya import cmds
+from maya.api import OpenMaya
+
+from silex_maya.utils.scene_formats import SCENE_FORMATS
+
+SNAPSHOT_DIRECTORY = pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "snapshots"
+# The snapshots left by a crashed session are removed after this delay
+STALE_SNAPSHOT_AGE = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+class SceneRevision:
+    """
+    Monotonic counter of the scene changes, bumped by maya callbacks on every
+    command that edits the scene and on the file operations
+    """
+
+    SCENE_MESSAGES = [
+        "kAfterOpen",
+        "kAfterNew",
+        "kAfterImport",
+        "kAfterSave",
+        "kAfterCreateReference",
+        "kAfterRemoveReference",
+        "kAfterLoadReference",
+        "kAfterUnloadReference",
+    ]
+    # Commands that only read the scene, the UI executes them constantly
+    READ_ONLY_COMMANDS = {
+        "ls",
+        "getAttr",
+        "objExists",
+        "nodeType",
+        "listAttr",
+        "listConnections",
+        "listRelatives",
+        "listHistory",
+        "attributeQuery",
+        "referenceQuery",
+        "pluginInfo",
+        "playblast",
+        "lookThru",
+        "currentTime",
+        "select",
+    }
+    QUERY_FLAGS = {"-q", "-query"}
+
+    def __init__(self):
+        # The revisions of two sessions are never compared
+        self.session = uuid.uuid4().hex
+        self.value = 0
+        self.ignored = 0
+        self.callback_ids: List[int] = []
+
+    def bump(self, *args):
+        if not self.ignored:
+            self.value += 1
+
+    def _on_command(self, command: str, *args):
+        words = command.split()
+        if not words or words[0] in self.READ_ONLY_COMMANDS:
+            return
+        if self.QUERY_FLAGS.intersection(words):
+            return
+        self.bump()
+
+    @contextlib.contextmanager
+    def ignore(self):
+        """
+        The commands executed by the captures of the scene are not edits
+        """
+        self.ignored += 1
+        try:
+            yield
+        finally:
+            self.ignored -= 1
+
+    def install(self):
+        """
+        Register the callbacks, must be executed in the main thread
+        """
+        if self.callback_ids:
+            return
+        for message in self.SCENE_MESSAGES:
+            self.callback_ids.append(
+                OpenMaya.MSceneMessage.addCallback(
+                    getattr(OpenMaya.MSceneMessage, message), self.bump
+                )
+            )
+        for event in ["Undo", "Redo"]:
+            self.callback_ids.append(
+                OpenMaya.MEventMessage.addEventCallback(event, self.bump)
+            )
+        # The edits made through the API do not execute commands
+        self.callback_ids.extend(
+            [
+                OpenMaya.MCommandMessage.addCommandCallback(self._on_command),
+                OpenMaya.MDGMessage.addNodeAddedCallback(self.bump),
+                OpenMaya.MDGMessage.addNodeRemovedCallback(self.bump),
+                OpenMaya.MDGMessage.addConnectionCallback(self.bump),
+            ]
+        )
+
+    def get(self) -> str:
+        self.install()
+        return f"{self.session}_{self.value}"
+
+
+scene_revision = SceneRevision()
+
+
+def get_scene_state() -> str:
+    """
+    Fingerprint the current state of the scene, without saving it.
+    Must be executed in the main thread
+    """
+    # The modified scenes are told apart by the revision of their edits
+    scene_path = cmds.file(query=True, sceneName=True)
+    state = [scene_path, scene_revision.get()]
+    return hashlib.blake2b(repr(state).encode(), digest_size=16).hexdigest()
+
+
+class SceneSnapshot:
+    def __init__(self, path: pathlib.Path, key: str):
+        self.path = path
+        self.key = key
+        self.owners: Set[str] = set()
+
+
+class SnapshotRegistry:
+    """
+    Local copies of the scene, shared by the exports that need the same scene state.
+    A snapshot is deleted when all its owners released it
+    """
+
+    def __init__(self, directory: pathlib.Path = SNAPSHOT_DIRECTORY):
+        self.directory = directory
+        self.snapshots: Dict[str, SceneSnapshot] = {}
+        self.lock = threading.Lock()
+        self.cleaned = False
+
+    def remove_stale_snapshots(self):
+        if not self.directory.is_dir():
+            return
+        for file_path in self.directory.iterdir():
+            try:
+                if time.time() - file_path.stat().st_mtime > STALE_SNAPSHOT_AGE:
+                    file_path.unlink()
+            except OSError:
+                continue
+
+    def acquire(self, owner: str, file_type: str = "mayaBinary") -> pathlib.Path:
+        """
+        Get a snapshot of the current scene state, it is written only if
+        the scene changed since the last snapshot. Must be executed in the main thread
+        """
+        key = f"{get_scene_state()}_{file_type}"
+        with self.lock:
+            if not self.cleaned:
+                self.remove_stale_snapshots()
+                self.cleaned = True
+
+            snapshot = self.snapshots.get(key)
+            if snapshot is None or not snapshot.path.is_file():
+                os.makedirs(self.directory, exist_ok=True)
+                path = self.directory / f"{key}{SCENE_FORMATS[file_type]}"
+                start = time.perf_counter()
+                # The references stay references, only the scene itself is written
+                with scene_revision.ignore():
+                    cmds.file(
+                        str(path),
+                        exportAll=True,
+                        preserveReferences=True,
+                        type=file_type,
+                        force=True,
+                    )
+                logger.info(
+                    "Scene snapshot written to %s in %.2fs",
+                    path,
+                    time.perf_counter() - start,
+                )
+                snapshot = self.snapshots.setdefault(key, SceneSnapshot(path, key))
+
+            snapshot.owners.add(owner)
+            return snapshot.path
+
+    def release(self, owner: str):
+        """
+        Release the snapshots used by the owner, the unused ones are deleted
+        """
+        with self.lock:
+            for key, snapshot in list(self.snapshots.items()):
+                snapshot.owners.discard(owner)
+                if not snapshot.owners:
+                    self._remove(key)
+
+    def _remove(self, key: str):
+        snapshot = self.snapshots.pop(key)
+        try:
+            snapshot.path.unlink()
+        except OSError:
+            pass
+
+    def cleanup(self):
+        with self.lock:
+            for key in list(self.snapshots):
+                self._remove(key)
+
+
+snapshot_registry = SnapshotRegistry()
+atexit.register(snapshot_registry.cleanup)
@@ -0,0 +1,66 @@
+import contextlib
+import os
+import sys
+from typing import List
+
+
+def initialize_standalone() -> bool:
+    """
+    Initialize maya when the interpreter is mayapy,
+    return False when maya is not available
+    """
+    with contextlib.suppress(ImportError, RuntimeError):
+        import maya.standalone
+
+        maya.standalone.initialize(name="python")
+        return True
+    return False
+
+
+def run_silex_cli(argv: List[str]) -> int:
+    """
+    Run the silex command line with the given arguments in the current process,
+    return the exit code
+    """
+    from silex_client.cli.parser import main
+
+    previous_argv = sys.argv
+    sys.argv = ["silex"] + list(argv)
+    try:
+        main()
+    except SystemExit as exit:
+        if exit.code is None:
+            return 0
+        return exit.code if isinstance(exit.code, int) else 1
+    finally:
+        sys.argv = previous_argv
+    return 0
+
+
+def reset_scene():
+    """
+    Start from an empty scene, the changes of the current scene are discarded
+    """
+    from maya import cmds
+
+    cmds.file(new=True, force=True)
+
+
+def get_memory_usage() -> int:
+    """
+    Get the memory currently used by the current process in bytes,
+    0 if it is unknown. The peak usage would never go down between two jobs
+    """
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    # The second field is the count of resident pages
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
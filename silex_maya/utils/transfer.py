@@ -0,0 +1,124 @@
+import logging
+import os
+import pathlib
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Union
+
+from silex_maya.utils.files import atomic_copy
+
+
+def snapshot_directory(directory: Union[str, pathlib.Path]) -> Dict[str, int]:
+    """
+    Get the modification time of every file in the directory, recursively
+    """
+    snapshot: Dict[str, int] = {}
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            try:
+                snapshot[file_path] = os.stat(file_path).st_mtime_ns
+            except OSError:
+                continue
+    return snapshot
+
+
+def get_modified_files(
+    directory: Union[str, pathlib.Path], snapshot: Dict[str, int]
+) -> List[pathlib.Path]:
+    """
+    List the files that were created or modified since the snapshot was taken
+    """
+    return [
+        pathlib.Path(file_path)
+        for file_path, mtime in snapshot_directory(directory).items()
+        if snapshot.get(file_path) != mtime
+    ]
+
+
+def transfer_file(
+    source: Union[str, pathlib.Path], destination: Union[str, pathlib.Path]
+) -> pathlib.Path:
+    """
+    Copy the file to its destination, the readers never see a partial file
+    """
+    atomic_copy(source, destination, link=False)
+    return pathlib.Path(destination)
+
+
+class TransferPipeline:
+    """
+    Copy the exported files to their final directory in background threads,
+    while the export of the next files continues
+    """
+
+    def __init__(
+        self,
+        source_directory: Union[str, pathlib.Path],
+        destination_directory: Union[str, pathlib.Path],
+        max_workers: int = 4,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.source_directory = pathlib.Path(source_directory)
+        self.destination_directory = pathlib.Path(destination_directory)
+        self.logger = logger or logging.getLogger(__name__)
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.futures: Dict[str, Future] = {}
+        self.submitted: List[Future] = []
+
+    def get_destination(self, file_path: Union[str, pathlib.Path]) -> pathlib.Path:
+        """
+        The files keep the layout they have in the source directory
+        """
+        relative_path = pathlib.Path(file_path).relative_to(self.source_directory)
+        return self.destination_directory / relative_path
+
+    def submit(self, file_path: Union[str, pathlib.Path]) -> Future:
+        """
+        Queue a finalized file, a file submitted again is copied again once
+        the previous copy to the same destination is done
+        """
+        destination = self.get_destination(file_path)
+        self.logger.debug("Queued transfer of %s to %s", file_path, destination)
+        previous = self.futures.get(str(destination))
+        if previous is None:
+            future = self.executor.submit(transfer_file, file_path, destination)
+        else:
+            future = self.executor.submit(
+                self._transfer_after, previous, file_path, destination
+            )
+        self.futures[str(destination)] = future
+        self.submitted.append(future)
+        return future
+
+    @staticmethod
+    def _transfer_after(
+        previous: Future,
+        source: Union[str, pathlib.Path],
+        destination: Union[str, pathlib.Path],
+    ) -> pathlib.Path:
+        # The previous copy was queued first, so it is already running or done
+        wait([previous])
+        return transfer_file(source, destination)
+
+    def wait(self) -> List[pathlib.Path]:
+        """
+        Wait for the queued transfers to complete, and raise the first error
+        """
+        wait(self.submitted)
+        for future in self.submitted:
+            future.result()
+        return [future.result() for future in self.futures.values()]
+
+    def shutdown(self):
+        """
+        Cancel the transfers that are not started and wait for the running ones
+        """
+        for future in self.submitted:
+            future.cancel()
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self) -> "TransferPipeline":
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
@@ -0,0 +1,314 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+UPLOAD_QUEUE_DIRECTORY = (
+    pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "upload_queue"
+)
+# Delay before the first retry, doubled after each failure
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 30 * 60
+# The claims not refreshed for this long belong to a process that died
+STALE_CLAIM_AGE = 5 * 60
+# The claims of the uploads in progress are refreshed at this interval
+CLAIM_REFRESH_INTERVAL = STALE_CLAIM_AGE / 5
+# The wake up flag is set from other threads, it is polled to keep the loop free
+WAKE_UP_POLL_INTERVAL = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+class UploadQueue:
+    """
+    Persistent queue of previews to upload to Kitsu, on the event loop of
+    silex_client. Every item is journaled on disk with a copy of its preview,
+    so the uploads that did not complete are resumed after a crash.
+    The queue is shared by all the maya sessions, an item is claimed by moving
+    it to the directory of the session before it is uploaded.
+    The client is gazu.task by default, any object with the same async
+    get_task, add_comment and add_preview functions can replace it
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path = UPLOAD_QUEUE_DIRECTORY,
+        max_concurrent: int = 2,
+        max_attempts: int = 10,
+        client: Any = None,
+        event_loop: Any = None,
+    ):
+        self.directory = directory
+        self.max_concurrent = max_concurrent
+        self.max_attempts = max_attempts
+        self.client = client
+        self.event_loop = event_loop
+        self.session = f"{os.getpid()}_{uuid.uuid4().hex}"
+
+        self.lock = threading.Lock()
+        self.wake_up = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def failed_directory(self) -> pathlib.Path:
+        return self.directory / "failed"
+
+    @property
+    def claims_directory(self) -> pathlib.Path:
+        return self.directory / "claimed"
+
+    @property
+    def claimed_directory(self) -> pathlib.Path:
+        return self.claims_directory / self.session
+
+    def get_client(self) -> Any:
+        if self.client is None:
+            import gazu.task
+
+            self.client = gazu.task
+        return self.client
+
+    def get_event_loop(self) -> Any:
+        # The gazu session is bound to the event loop of silex_client
+        if self.event_loop is None:
+            from silex_client.core.context import Context
+
+            self.event_loop = Context.get().event_loop
+        return self.event_loop
+
+    def _get_item_path(self, item: Dict[str, Any], claimed: bool) -> pathlib.Path:
+        directory = self.claimed_directory if claimed else self.directory
+        return directory / f"{item['id']}.json"
+
+    def _write_item(self, item: Dict[str, Any], claimed: bool = False):
+        item_path = self._get_item_path(item, claimed)
+        temp_path = item_path.with_suffix(".tmp")
+        with open(temp_path, "w") as item_file:
+            json.dump(item, item_file)
+        os.replace(temp_path, item_path)
+
+    def _claim(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Move the item to the directory of the session, only one session can
+        succeed. Return the claimed item, or None if it was claimed by another one
+        """
+        os.makedirs(self.claimed_directory, exist_ok=True)
+        claimed_path = self._get_item_path(item, True)
+        try:
+            os.replace(self._get_item_path(item, False), claimed_path)
+            with open(claimed_path, "r") as item_file:
+                return json.load(item_file)
+        except (OSError, ValueError):
+            return None
+
+    def _release(self, item: Dict[str, Any]):
+        self._write_item(item, claimed=True)
+        os.replace(self._get_item_path(item, True), self._get_item_path(item, False))
+
+    def release_stale_claims(self):
+        """
+        Put the items claimed by the sessions that died back in the queue
+        """
+        if not self.claims_directory.is_dir():
+            return
+        for claimed_directory in self.claims_directory.iterdir():
+            try:
+                age = time.time() - claimed_directory.stat().st_mtime
+                if claimed_directory == self.claimed_directory:
+                    continue
+                if age < STALE_CLAIM_AGE:
+                    continue
+                for item_path in claimed_directory.glob("*.json"):
+                    os.replace(item_path, self.directory / item_path.name)
+                claimed_directory.rmdir()
+            except OSError:
+                continue
+
+    def _remove_item(self, item: Dict[str, Any], failed: bool = False):
+        item_path = self._get_item_path(item, True)
+        preview_path = pathlib.Path(item["preview_path"])
+        if failed:
+            # The failed uploads are kept aside so they can be retried by hand
+            os.makedirs(self.failed_directory, exist_ok=True)
+            os.replace(item_path, self.failed_directory / item_path.name)
+            if preview_path.exists():
+                os.replace(preview_path, self.failed_directory / preview_path.name)
+            return
+
+        for file_path in [item_path, preview_path]:
+            try:
+                file_path.unlink()
+            except OSError:
+                pass
+
+    def get_pending(self) -> List[Dict[str, Any]]:
+        items = []
+        if not self.directory.is_dir():
+            return items
+        for item_path in sorted(self.directory.glob("*.json")):
+            try:
+                with open(item_path, "r") as item_file:
+                    items.append(json.load(item_file))
+            except (OSError, ValueError):
+                continue
+        return items
+
+    def enqueue(self, task_id: str, preview_path: Union[str, pathlib.Path]) -> str:
+        """
+        Queue a preview and return at once, the upload is done in the background
+        """
+        item_id = uuid.uuid4().hex
+        os.makedirs(self.directory, exist_ok=True)
+
+        # The original preview can be deleted before the upload completes
+        preview_copy = self.directory / f"{item_id}{pathlib.Path(preview_path).suffix}"
+        shutil.copy2(preview_path, preview_copy)
+        self._write_item(
+            {
+                "id": item_id,
+                "task_id": task_id,
+                "preview_path": str(preview_copy),
+                "comment": None,
+                "attempts": 0,
+                "next_attempt": 0,
+            }
+        )
+
+        # The flag is set first, so a thread about to stop sees the new item
+        self.wake_up.set()
+        self.start()
+        return item_id
+
+    def start(self):
+        """
+        Schedule the uploads on the event loop, the pending items of a previous
+        session are resumed
+        """
+        with self.lock:
+            if self.future is not None and not self.future.done():
+                return
+            self.future = self.get_event_loop().register_task(self._run())
+
+    async def _upload(self, item: Dict[str, Any]):
+        client = self.get_client()
+        task = await client.get_task(item["task_id"])
+
+        # The comment is journaled, a retry must not create a second one
+        if item["comment"] is None:
+            item["comment"] = await client.add_comment(task, task["task_status_id"])
+            self._write_item(item, claimed=True)
+
+        await client.add_preview(task, item["comment"], item["preview_path"])
+
+    async def _process(self, item: Dict[str, Any], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                await self._upload(item)
+            except Exception as exception:
+                item["attempts"] += 1
+                if item["attempts"] >= self.max_attempts:
+                    logger.error(
+                        "Giving up the upload of %s: %s",
+                        item["preview_path"],
+                        exception,
+                    )
+                    self._remove_item(item, failed=True)
+                    return
+
+                delay = min(RETRY_DELAY * 2 ** (item["attempts"] - 1), MAX_RETRY_DELAY)
+                item["next_attempt"] = time.time() + delay
+                # The retry can be done by any session
+                self._release(item)
+                logger.warning(
+                    "Upload of %s failed, retrying in %ss: %s",
+                    item["preview_path"],
+                    delay,
+                    exception,
+                )
+                return
+
+            logger.info("Preview %s uploaded", item["preview_path"])
+            self._remove_item(item)
+
+    async def _wait(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while not self.wake_up.is_set() and time.monotonic() < deadline:
+            remaining = deadline - time.monotonic()
+            await asyncio.sleep(max(0.0, min(WAKE_UP_POLL_INTERVAL, remaining)))
+
+    def _scan(
+        self, refresh_claims: bool
+    ) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        """
+        Claim the items that are due, return them with the time of the next retry.
+        The directories are scanned on disk, this is executed outside of the event loop
+        """
+        self.release_stale_claims()
+        # The claims of this session are refreshed while it uploads them
+        if refresh_claims:
+            os.utime(self.claimed_directory)
+
+        now = time.time()
+        next_attempt = None
+        claimed_items = []
+        for item in self.get_pending():
+            if item["next_attempt"] > now:
+                next_attempt = min(
+                    next_attempt or item["next_attempt"], item["next_attempt"]
+                )
+                continue
+
+            claimed_item = self._claim(item)
+            if claimed_item is not None:
+                claimed_items.append(claimed_item)
+        return claimed_items, next_attempt
+
+    def _on_task_done(self, task: asyncio.Task, tasks: Set[asyncio.Task]):
+        tasks.discard(task)
+        # A failed upload can be retried, the queue is scanned again
+        self.wake_up.set()
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        tasks: Set[asyncio.Task] = set()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            self.wake_up.clear()
+            claimed_items, next_attempt = await loop.run_in_executor(
+                None, self._scan, bool(tasks)
+            )
+            for claimed_item in claimed_items:
+                task = asyncio.ensure_future(self._process(claimed_item, semaphore))
+                tasks.add(task)
+                task.add_done_callback(
+                    functools.partial(self._on_task_done, tasks=tasks)
+                )
+
+            if not tasks and next_attempt is None:
+                # Nothing left to do, the uploads are scheduled again by enqueue
+                with self.lock:
+                    if not self.wake_up.is_set():
+                        self.future = None
+                        return
+
+            # Wait for a new item, a retry or the end of an upload. The end of
+            # an upload wakes the loop up, the claims are refreshed meanwhile
+            timeout = CLAIM_REFRESH_INTERVAL
+            if next_attempt is not None:
+                timeout = max(0.0, next_attempt - time.time())
+            if tasks:
+                timeout = min(timeout, CLAIM_REFRESH_INTERVAL)
+            await self._wait(timeout)
+
+
+upload_queue = UploadQueue()
@@ -0,0 +1,296 @@
+import logging
+import os
+import queue
+import subprocess
+import threading
+import uuid
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Connection
+from typing import Any, Callable, List, Optional, Tuple
+
+from silex_maya.utils.processes import get_python_executable
+
+AUTHKEY_ENV = "SILEX_WORKER_AUTHKEY"
+# Printed by the workers on their standard output to give their address
+ADDRESS_PREFIX = "SILEX_WORKER_ADDRESS"
+# Seconds given to a worker to initialize maya and connect to the pool
+STARTUP_TIMEOUT = 300
+
+# Callback that receives the logger name, the level and the message of a job's logs
+LogCallback = Callable[[str, int, str], None]
+
+
+class WorkerError(RuntimeError):
+    """
+    Raised when a job failed in a worker, or when the worker died
+    """
+
+
+class WorkerProcess:
+    """
+    Handle on a mayapy worker and the connection to it
+    """
+
+    def __init__(
+        self,
+        plugins: List[str],
+        logger: logging.Logger,
+        startup_timeout: float = STARTUP_TIMEOUT,
+    ):
+        self.logger = logger
+        self.alive = True
+        authkey = os.urandom(32)
+        env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+
+        self.process = subprocess.Popen(
+            [get_python_executable(), "-m", "silex_maya.cli.worker", "--plugins"]
+            + plugins,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+        )
+
+        # The output must be drained, or the worker blocks when the pipe is full
+        self.addresses: "queue.Queue[Optional[Tuple[str, int]]]" = queue.Queue()
+        threading.Thread(target=self._read_output, daemon=True).start()
+
+        try:
+            # Maya prints a lot during its initialization, the address comes after
+            try:
+                address = self.addresses.get(timeout=startup_timeout)
+            except queue.Empty:
+                raise WorkerError(
+                    f"The worker {self.process.pid} did not start "
+                    f"in {startup_timeout}s"
+                )
+            if address is None:
+                raise WorkerError(
+                    f"The worker {self.process.pid} exited during startup"
+                )
+
+            self.connection: Connection = Client(address, authkey=authkey)
+            if not self.connection.poll(startup_timeout):
+                raise WorkerError(
+                    f"The worker {self.process.pid} did not answer "
+                    f"in {startup_timeout}s"
+                )
+            _, self.pid, self.start_memory = self.connection.recv()
+        except BaseException:
+            self.kill()
+            raise
+
+        self.memory = self.start_memory
+        self.job_count = 0
+
+    def _read_output(self):
+        found = False
+        for line in self.process.stdout:
+            if not found and line.startswith(ADDRESS_PREFIX):
+                host, port = line.split()[1].rsplit(":", 1)
+                self.addresses.put((host, int(port)))
+                found = True
+                continue
+            self.logger.debug("[worker %s] %s", self.process.pid, line.rstrip())
+        self.addresses.put(None)
+
+    def run(self, job: tuple, on_log: Optional[LogCallback]) -> Any:
+        """
+        Send the job and wait for its result, forwarding the logs meanwhile
+        """
+        try:
+            self.connection.send(job)
+            while True:
+                message = self.connection.recv()
+                if message[0] == "log":
+                    _, _, name, level, text = message
+                    if on_log is not None:
+                        on_log(name, level, text)
+                    else:
+                        self.logger.log(level, "[worker %s] %s", self.pid, text)
+                    continue
+
+                _, _, value, error, self.memory = message
+                self.job_count += 1
+                if error is not None:
+                    raise WorkerError(error)
+                return value
+        except (EOFError, OSError) as exception:
+            # The connection is lost, the worker can not be used anymore
+            self.alive = False
+            raise WorkerError(f"The worker {self.pid} died: {exception}")
+
+    def stop(self, timeout: float = 30):
+        try:
+            self.connection.send(("stop", None))
+            self.connection.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def kill(self):
+        self.alive = False
+        connection = getattr(self, "connection", None)
+        if connection is not None:
+            connection.close()
+        self.process.kill()
+        self.process.wait()
+
+
+class MayapyWorkerPool:
+    """
+    Pool of long lived mayapy processes, initialized once with the plugins preloaded.
+    A worker is replaced after a number of jobs or when its memory grew too much,
+    it is stopped when it did not receive a job for idle_timeout seconds
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        plugins: Optional[List[str]] = None,
+        max_jobs: int = 50,
+        max_memory_growth: int = 4 * 1024 ** 3,
+        idle_timeout: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.max_workers = max_workers
+        self.plugins = plugins or []
+        self.max_jobs = max_jobs
+        self.max_memory_growth = max_memory_growth
+        self.idle_timeout = idle_timeout
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.threads: List[threading.Thread] = []
+
+    def start(self):
+        for index in range(self.max_workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"mayapy-worker-{index}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def _should_recycle(self, worker: WorkerProcess) -> bool:
+        if worker.job_count >= self.max_jobs:
+            return True
+        return worker.memory - worker.start_memory > self.max_memory_growth
+
+    def _start_worker(self) -> Tuple[Optional[WorkerProcess], Optional[Exception]]:
+        try:
+            return WorkerProcess(self.plugins, self.logger), None
+        except Exception as exception:
+            self.logger.error("Could not start a mayapy worker: %s", exception)
+            return None, exception
+
+    def _worker_loop(self):
+        worker: Optional[WorkerProcess] = None
+        startup_error: Optional[Exception] = None
+        idle = False
+        while True:
+            # The worker is started before the job comes, so it is ready to execute it
+            if worker is None and not idle:
+                worker, startup_error = self._start_worker()
+
+            try:
+                item = self.jobs.get(
+                    timeout=self.idle_timeout if worker is not None else None
+                )
+            except queue.Empty:
+                # An idle worker does not keep its memory for the whole session,
+                # it is started again by the next job
+                self.logger.info("Stopping the idle worker %s", worker.pid)
+                worker.stop()
+                worker = None
+                idle = True
+                continue
+
+            if item is None:
+                break
+            job, future, on_log = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if idle:
+                worker, startup_error = self._start_worker()
+                idle = False
+            if worker is None:
+                future.set_exception(WorkerError(str(startup_error)))
+                continue
+
+            try:
+                future.set_result(worker.run(job, on_log))
+            except Exception as exception:
+                future.set_exception(exception)
+
+            if not worker.alive or worker.process.poll() is not None:
+                # A worker that lost its connection can be hanging, it is killed
+                self.logger.warning("Replacing the lost worker %s", worker.pid)
+                worker.kill()
+                worker = None
+            elif self._should_recycle(worker):
+                self.logger.info(
+                    "Recycling the worker %s after %s jobs",
+                    worker.pid,
+                    worker.job_count,
+                )
+                worker.stop()
+                worker = None
+
+        if worker is not None:
+            worker.stop()
+
+    def _submit(self, job: tuple, on_log: Optional[LogCallback]) -> Future:
+        future: Future = Future()
+        self.jobs.put((job, future, on_log))
+        return future
+
+    def submit_action(
+        self, argv: List[str], on_log: Optional[LogCallback] = None
+    ) -> Future:
+        """
+        Run the silex command line with the given arguments in a worker,
+        the result is the exit code
+        """
+        return self._submit(("cli", uuid.uuid4().hex, list(argv)), on_log)
+
+    def submit(
+        self,
+        function: Callable,
+        *args,
+        on_log: Optional[LogCallback] = None,
+        **kwargs,
+    ) -> Future:
+        """
+        Call an importable function in a worker, the arguments and the result
+        must be picklable
+        """
+        return self._submit(("call", uuid.uuid4().hex, function, args, kwargs), on_log)
+
+    def shutdown(self, cancel_pending: bool = False):
+        """
+        Stop the workers once the queued jobs are done, or cancel the queued jobs
+        """
+        if cancel_pending:
+            while True:
+                try:
+                    item = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[1].cancel()
+
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def __enter__(self) -> "MayapyWorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
@@ -0,0 +1,156 @@
+"""
+Local service that executes the jobs of the command lines in a pool of warm mayapy
+workers, so the command lines don't have to initialize maya themselves
+"""
+
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Optional, Union
+
+from silex_maya.utils.worker_pool import LogCallback, MayapyWorkerPool, WorkerError
+
+# Written by the running service with its address and its key
+SERVICE_FILE = pathlib.Path(tempfile.gettempdir()) / "silex_maya" / "worker_service.json"
+# Set this environment variable to execute a command line in its own process
+NO_SERVICE_ENV = "SILEX_NO_WORKER_SERVICE"
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerService:
+    """
+    Accept the jobs sent by connect_service and execute them in the pool.
+    The logs of a job are streamed back to its client while it runs
+    """
+
+    def __init__(
+        self,
+        pool: MayapyWorkerPool,
+        service_file: pathlib.Path = SERVICE_FILE,
+    ):
+        self.pool = pool
+        self.service_file = service_file
+        self.authkey = os.urandom(32)
+
+    def _write_service_file(self, address: tuple):
+        os.makedirs(self.service_file.parent, exist_ok=True)
+        temp_path = self.service_file.with_suffix(f".{os.getpid()}.tmp")
+        # Only the user can read the key of the service
+        descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as service_file:
+            json.dump(
+                {
+                    "address": list(address),
+                    "authkey": self.authkey.hex(),
+                    "pid": os.getpid(),
+                },
+                service_file,
+            )
+        os.replace(temp_path, self.service_file)
+
+    def _remove_service_file(self):
+        try:
+            with open(self.service_file, "r") as service_file:
+                if json.load(service_file).get("pid") != os.getpid():
+                    return
+            os.remove(self.service_file)
+        except (OSError, ValueError):
+            pass
+
+    def _handle(self, connection: Connection):
+        send_lock = threading.Lock()
+
+        def send(message: tuple):
+            with send_lock:
+                try:
+                    connection.send(message)
+                except OSError:
+                    logger.warning("The client of the job is gone")
+
+        def on_log(name: str, level: int, text: str):
+            send(("log", name, level, text))
+
+        with connection:
+            try:
+                kind, *arguments = connection.recv()
+            except (EOFError, OSError, ValueError):
+                return
+
+            if kind == "cli":
+                future = self.pool.submit_action(arguments[0], on_log=on_log)
+            else:
+                function, args, kwargs = arguments
+                future = self.pool.submit(function, *args, on_log=on_log, **kwargs)
+
+            try:
+                send(("result", future.result(), None))
+            except Exception as exception:
+                send(("result", None, str(exception)))
+
+    def serve_forever(self):
+        with Listener(("localhost", 0), authkey=self.authkey) as listener:
+            self._write_service_file(listener.address)
+            logger.info("Worker service listening on %s:%s", *listener.address)
+            try:
+                while True:
+                    try:
+                        connection = listener.accept()
+                    except Exception as exception:
+                        # A client with a wrong key must not stop the service
+                        logger.warning("Refused a connection: %s", exception)
+                        continue
+                    threading.Thread(
+                        target=self._handle, args=(connection,), daemon=True
+                    ).start()
+            finally:
+                self._remove_service_file()
+
+
+def connect_service(
+    service_file: Union[str, pathlib.Path] = SERVICE_FILE
+) -> Optional[Connection]:
+    """
+    Connect to the running service, return None when there is none
+    """
+    if os.environ.get(NO_SERVICE_ENV):
+        return None
+    try:
+        with open(service_file, "r") as service:
+            data = json.load(service)
+        return Client(tuple(data["address"]), authkey=bytes.fromhex(data["authkey"]))
+    except Exception:
+        # The file of a service that is not running anymore is ignored
+        return None
+
+
+def run_in_service(
+    connection: Connection, job: tuple, on_log: Optional[LogCallback] = None
+) -> Any:
+    """
+    Send a job to the service and wait for its result, forwarding the logs meanwhile.
+    The job is ("cli", argv) or ("call", function, args, kwargs)
+    """
+    with connection:
+        try:
+            connection.send(job)
+            while True:
+                message = connection.recv()
+                if message[0] == "log":
+                    _, name, level, text = message
+                    if on_log is not None:
+                        on_log(name, level, text)
+                    else:
+                        logging.getLogger(name).log(level, text)
+                    continue
+
+                _, value, error = message
+                if error is not None:
+                    raise WorkerError(error)
+                return value
+        except (EOFError, OSError) as exception:
+            raise WorkerError(f"The worker service stopped: {exception}")
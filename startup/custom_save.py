@@ -1,9 +1,23 @@
 import maya.cmds as cmds
 import maya.mel as mel
 
+# Option variable that enables the save to the local disk with a background sync
+BACKGROUND_SAVE_OPTION = "silexBackgroundSave"
+
+
+def silex_save():
+    from silex_client.action.action_query import ActionQuery
+
+    background = cmds.optionVar(query=BACKGROUND_SAVE_OPTION)
+    ActionQuery("background_save" if background else "save").execute()
+
+
+def toggle_background_save(enabled: bool):
+    cmds.optionVar(intValue=(BACKGROUND_SAVE_OPTION, int(enabled)))
+
 
 def custom_save():
-    save_cmd = "python(\"from silex_client.action.action_query import ActionQuery;ActionQuery('save').execute()\")"
+    save_cmd = 'python("import custom_save;custom_save.silex_save()")'
 
     # Hijack save button
     cmds.iconTextButton(
@@ -16,6 +30,14 @@ def custom_save():
 
     cmds.setParent(u"mainFileMenu", menu=True)
     cmds.menuItem(u"saveItem", edit=True, label="Save Scene", command=save_cmd)
+    cmds.menuItem(
+        "silexBackgroundSaveItem",
+        label="Background Save",
+        annotation="Save on the local disk and sync to the network in background",
+        checkBox=bool(cmds.optionVar(query=BACKGROUND_SAVE_OPTION)),
+        command=toggle_background_save,
+        insertAfter="saveItem",
+    )
 
     # Create ctrl-s save command
     cmds.nameCommand(u"NameComSave_File", annotation="silex save", command=save_cmd)
@@ -25,4 +47,14 @@ def custom_save():
             "NameComSave_File", annotation="silex save", command="file -save"
         )
 
+    def wait_for_sync():
+        from silex_maya.utils.background_sync import background_sync
+
+        # The scenes saved in background are synced before maya quits, or reported
+        # with a foreground save when they can not be. The quit can not be
+        # cancelled from here, the scenes stay modified until they are synced
+        # so the save changes prompt of maya asks for them first
+        background_sync.block_until_synced()
+
     cmds.scriptJob(event=["quitApplication", reset_save])
+    cmds.scriptJob(event=["quitApplication", wait_for_sync])
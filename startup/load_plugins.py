@@ -1,6 +0,0 @@
-import maya.cmds as cmds
-
-
-def load_plugins():
-    cmds.loadPlugin("objExport")
-    cmds.loadPlugin("AbcExport")
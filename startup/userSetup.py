@@ -1,10 +1,12 @@
 import maya
 from create_shelf import create_shelf
 from custom_save import custom_save
-from load_plugins import load_plugins
 from silex_client.core.context import Context
 
+from silex_maya.utils.upload_queue import upload_queue
+
 Context.get().start_services()
 maya.utils.executeDeferred(create_shelf)
 maya.utils.executeDeferred(custom_save)
-maya.utils.executeDeferred(load_plugins)
+# Resume the preview uploads that did not complete in a previous session
+maya.utils.executeDeferred(upload_queue.start)